@@ -0,0 +1,131 @@
+# benchmarks/bench_async_agent.py
+"""
+Wall time of agent turns in which the model asks for several tools at once, with the
+tools run one after another (what the synchronous AgentExecutor does) versus the
+AsyncToolAgent in src/agent/async_agent.py, which runs them concurrently with a deadline
+per tool. Uses fake slow tools and the chat stand-in, so no LangChain or API key is needed.
+
+    python -m benchmarks.bench_async_agent [--turns 5]
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+
+from benchmarks.common import summarize
+from benchmarks.standins import chat_server, tool_call
+
+MODEL = "llama3-70b-8192"
+SCHEMA = {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]}
+
+
+def slow_tool(seconds):
+    def run(query):
+        time.sleep(seconds)
+        return f"{seconds:.1f}s worth of results for {query}"
+    return run
+
+
+def hung_tool(query):
+    time.sleep(30)
+    return "too late"
+
+
+def plan(messages):
+    """Stand-in model: asks for every tool named in the user message, then answers."""
+    if messages[-1]["role"] == "tool":
+        return "Here is what I found."
+    names = json.loads(messages[-1]["content"])
+    return {"content": "", "tool_calls": [tool_call(f"call_{i}", name, query=f"q{i}") for i, name in enumerate(names)]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    server = chat_server(latency=0.05, reply=plan).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    from src import llm_client
+    from src.agent.async_agent import AsyncToolAgent, ToolSpec
+
+    specs = [
+        ToolSpec("search_web", slow_tool(0.8), {"type": "function", "function": {"name": "search_web", "parameters": SCHEMA}}, 10),
+        ToolSpec("search_news", slow_tool(0.6), {"type": "function", "function": {"name": "search_news", "parameters": SCHEMA}}, 10),
+        ToolSpec("get_weather", slow_tool(0.4), {"type": "function", "function": {"name": "get_weather", "parameters": SCHEMA}}, 10),
+        ToolSpec("hung_tool", hung_tool, {"type": "function", "function": {"name": "hung_tool", "parameters": SCHEMA}}, 1.0),
+    ]
+    by_name = {spec.name: spec for spec in specs}
+    agent = AsyncToolAgent("You are a test agent.", specs, MODEL)
+
+    def sequential_turn(user_input):
+        """The synchronous executor: each tool call waits for the previous one, no deadlines."""
+        messages = [{"role": "user", "content": user_input}]
+        while True:
+            message = llm_client.chat_completion(messages, MODEL, tools=[s.schema for s in specs]).choices[0].message
+            if not message.tool_calls:
+                return message.content
+            messages.append({"role": "assistant", "content": "", "tool_calls": [
+                {"id": c.id, "type": "function", "function": {"name": c.function.name, "arguments": c.function.arguments}}
+                for c in message.tool_calls]})
+            for call in message.tool_calls:
+                result = by_name[call.function.name].func(**json.loads(call.function.arguments))
+                messages.append({"role": "tool", "tool_call_id": call.id, "content": result})
+
+    async def heartbeat(stop):
+        """Other work on the same event loop; it should keep ticking during agent turns."""
+        ticks = 0
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks
+
+    async def concurrent_turns(user_input):
+        stop = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(stop))
+        latencies = []
+        for _ in range(args.turns):
+            start = time.perf_counter()
+            await agent.run(user_input, [])
+            latencies.append(time.perf_counter() - start)
+        stop.set()
+        return latencies, await beat
+
+    three_tools = json.dumps(["search_web", "search_news", "get_weather"])
+    print(f"{args.turns} agent turns with 3 tool calls (0.8s + 0.6s + 0.4s) per turn")
+    latencies = []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        sequential_turn(three_tools)
+        latencies.append(time.perf_counter() - start)
+    stats = summarize(latencies)
+    print(f"  sequential tools: p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s")
+
+    latencies, ticks = asyncio.run(concurrent_turns(three_tools))
+    stats = summarize(latencies)
+    print(f"  concurrent tools: p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s "
+          f"(event loop stayed free: {ticks} heartbeat ticks meanwhile)")
+
+    start = time.perf_counter()
+    reply = asyncio.run(agent.run(json.dumps(["search_web", "hung_tool"]), []))
+    print(f"Turn with a 30s hung tool (1s deadline): answered {reply!r} in {time.perf_counter() - start:.2f}s")
+
+    async def cancel_midway():
+        task = asyncio.create_task(agent.run(three_tools, []))
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return time.perf_counter() - start
+    print(f"Cancelling a turn mid-way returned control in {asyncio.run(cancel_midway()) * 1000:.1f}ms")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
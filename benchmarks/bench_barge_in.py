@@ -0,0 +1,213 @@
+# benchmarks/bench_barge_in.py
+"""
+Barge-in on a file-driven microphone: the assistant speaks a long answer (its voice is
+my_voice.wav), the microphone hears that answer back as echo and, part way through,
+the user talking (temp_recording.wav). Measures how long it takes from the user's
+first word until the assistant is silent, with and without the BargeInMonitor
+(src/barge_in.py), how many queued sentences were never synthesized, and whether the
+echo alone sets it off with and without echo suppression.
+
+    python -m benchmarks.bench_barge_in [--user-at 3.0] [--echo 0.3] [--runs 3]
+"""
+import os
+import time
+import argparse
+import threading
+from collections import deque
+
+import numpy as np
+
+from benchmarks.common import REPO_ROOT, SAMPLE_RATE, load_wav_16k, summarize
+
+VOICE_RATE = 24000
+FRAME = 480 # 30ms at 16kHz
+
+
+def first_speech(samples):
+    import webrtcvad
+    vad = webrtcvad.Vad(3)
+    for start in range(0, len(samples) - FRAME, FRAME):
+        if vad.is_speech(samples[start:start + FRAME].tobytes(), SAMPLE_RATE):
+            return start / SAMPLE_RATE
+    return 0.0
+
+
+class Room:
+    """
+    Mixes what the microphone hears: the assistant's playback (scaled by `echo` and
+    delayed by `delay` seconds) and, from `user_at` on, the user's recording. A thread
+    writes it into the AudioCapture in real time, 30ms at a time.
+    """
+    def __init__(self, capture, echo, delay, user_audio=None, user_at=None):
+        self.capture = capture
+        self.echo = echo
+        self.user_audio = user_audio
+        self.user_at = user_at
+        self.user_started = None
+        self._played = deque([np.zeros(int(SAMPLE_RATE * delay), dtype=np.float32)])
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.noise = np.random.default_rng(0)
+
+    def play(self, samples_24k):
+        # 24kHz float playback -> 16kHz int16 scale at the microphone
+        positions = np.arange(0, len(samples_24k), VOICE_RATE / SAMPLE_RATE)
+        resampled = np.interp(positions, np.arange(len(samples_24k)), samples_24k) * 32767 * self.echo
+        with self._lock:
+            self._played.append(resampled.astype(np.float32))
+
+    def _echo_frame(self):
+        with self._lock:
+            while len(self._pending) < FRAME and self._played:
+                self._pending = np.concatenate([self._pending, self._played.popleft()])
+            frame = np.zeros(FRAME, dtype=np.float32)
+            n = min(FRAME, len(self._pending))
+            frame[:n] = self._pending[:n]
+            self._pending = self._pending[n:]
+        return frame
+
+    def _run(self):
+        started = time.perf_counter()
+        next_time = started
+        user_position = 0
+        while not self._stop.is_set():
+            frame = self._echo_frame() + self.noise.normal(0, 20, FRAME)
+            if self.user_audio is not None and time.perf_counter() - started >= self.user_at:
+                if self.user_started is None:
+                    self.user_started = time.perf_counter()
+                chunk = self.user_audio[user_position:user_position + FRAME]
+                frame[:len(chunk)] += chunk
+                user_position += FRAME
+            self.capture.write(np.clip(frame, -32768, 32767).astype(np.int16))
+            next_time += FRAME / SAMPLE_RATE
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def fake_voice(voice_audio, real_time_factor):
+    from src.local_tts import LocalTTS
+
+    class FakeStream:
+        def __init__(self, tts):
+            self.tts = tts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def write(self, block):
+            self.tts.room.play(block.reshape(-1))
+            time.sleep(len(block) / VOICE_RATE)
+
+        def abort(self):
+            self.tts.silent_at = time.perf_counter()
+
+    class FakeVoice(LocalTTS):
+        """LocalTTS that "synthesizes" slices of a recording and plays them into the Room."""
+        def __init__(self, room):
+            self.room = room
+            self.primary_voice = object()
+            self.feedback_voice = None
+            self.last_time_to_first_audio = None
+            self.last_interrupt_to_silence = None
+            self.on_playback = []
+            self._interrupt = threading.Event()
+            self._interrupted_at = None
+            self.silent_at = None
+            self.synthesized = 0
+
+        def _synthesize_primary(self, sentence, language):
+            # Each sentence is voiced by a 2s slice of the recording
+            index = int(sentence.split()[1]) % 4
+            clip = voice_audio[index * 2 * SAMPLE_RATE:(index + 1) * 2 * SAMPLE_RATE].astype(np.float32) / 32768
+            time.sleep(2 * real_time_factor)
+            self.synthesized += 1
+            positions = np.arange(0, len(clip), SAMPLE_RATE / VOICE_RATE)
+            return np.interp(positions, np.arange(len(clip)), clip).astype(np.float32)
+
+        def _open_output_stream(self, sample_rate=VOICE_RATE, dtype="float32"):
+            return FakeStream(self)
+
+    return FakeVoice
+
+
+def run(args, voice_class, user_audio, monitor_options):
+    from src.audio_capture import AudioCapture
+    from src.barge_in import BargeInMonitor
+
+    capture = AudioCapture()
+    room = Room(capture, args.echo, args.delay, user_audio, args.user_at).start()
+    tts = voice_class(room)
+    monitor = BargeInMonitor(capture, **monitor_options)
+    answer = " ".join(f"Sentence {i} of a long answer." for i in range(args.sentences))
+    start = time.perf_counter()
+    with monitor.listening(tts):
+        tts.speak_primary(answer)
+    ended = tts.silent_at or time.perf_counter()
+    room.stop()
+    capture.close()
+    return {
+        "interrupted": monitor.detected_at is not None,
+        "user_to_silence": ended - room.user_started - args.onset if room.user_started else None,
+        "detection": monitor.detected_time - room.user_started - args.onset if monitor.detected_time and room.user_started else None,
+        "trigger_to_silence": tts.last_interrupt_to_silence,
+        "synthesized": tts.synthesized,
+        "echo_frames": monitor.echo_frames,
+        "duration": ended - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=8, help="2s of speech each")
+    parser.add_argument("--user-at", type=float, default=3.0, help="Seconds into the answer the user starts")
+    parser.add_argument("--echo", type=float, default=0.3, help="How loud our voice comes back at the mic")
+    parser.add_argument("--delay", type=float, default=0.05, help="Speaker to microphone delay in seconds")
+    parser.add_argument("--real-time-factor", type=float, default=0.3)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    voice_audio = load_wav_16k(os.path.join(REPO_ROOT, "my_voice.wav"))
+    user_audio = load_wav_16k(os.path.join(REPO_ROOT, "temp_recording.wav")).astype(np.float32) * 1.5
+    args.onset = first_speech(user_audio.astype(np.int16))
+    voice_class = fake_voice(voice_audio, args.real_time_factor)
+    print(f"{args.sentences * 2}s answer, user starts talking {args.user_at + args.onset:.1f}s in, "
+          f"echo at {args.echo:.0%} with {args.delay * 1000:.0f}ms delay")
+
+    result = run(args, voice_class, user_audio, {"mode": "off"})
+    print(f"  no barge-in:   user's first word -> silence {result['user_to_silence']:5.2f}s "
+          f"({result['synthesized']}/{args.sentences} sentences synthesized)")
+
+    results = [run(args, voice_class, user_audio, {"mode": "vad"}) for _ in range(args.runs)]
+    caught = [r for r in results if r["interrupted"]]
+    if caught:
+        detection = summarize([r["detection"] for r in caught])
+        silence = summarize([r["trigger_to_silence"] for r in caught])
+        total = summarize([r["user_to_silence"] for r in caught])
+        print(f"  barge-in (vad): user's first word -> silence p50 {total['p50']:5.2f}s "
+              f"(detection {detection['p50'] * 1000:.0f}ms + interrupt -> silence {silence['p50'] * 1000:.0f}ms), "
+              f"{sum(r['synthesized'] for r in caught) / len(caught):.0f}/{args.sentences} sentences synthesized, "
+              f"caught {len(caught)}/{len(results)}")
+    else:
+        print(f"  barge-in (vad): the user was never detected in {len(results)} runs")
+
+    # Echo only: nobody interrupts, so any detection is the assistant hearing itself
+    args_no_user = argparse.Namespace(**vars(args))
+    for label, margin in (("with echo suppression", None), ("without (margin 0)", 0.0)):
+        options = {"mode": "vad"} if margin is None else {"mode": "vad", "echo_margin": margin}
+        result = run(args_no_user, voice_class, None, options)
+        outcome = f"cut itself off after {result['duration']:.1f}s" if result["interrupted"] else "spoke to the end"
+        print(f"  echo only, {label:>21}: {outcome} ({result['echo_frames']} speech frames put down to echo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/bench_conversation_store.py
+"""
+Agent prompt size and LLM latency as a conversation grows, with the old unbounded
+in-memory history versus the token-budgeted ConversationStore (src/conversation_store.py)
+under the "drop" and "summarize" policies. Several synthetic conversations are run to
+500 turns; prompt size and latency are sampled at turns 1, 50 and 500. The chat
+stand-in charges time per prompt character, like prompt processing on the real model.
+
+    python -m benchmarks.bench_conversation_store [--sessions 10] [--turns 500]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.common import summarize
+from benchmarks.standins import chat_server
+
+MODEL = "llama3-70b-8192"
+SYSTEM_PROMPT = "You are a powerful and helpful multilingual desktop assistant named TAM-VA. " * 30
+WORDS = ["open", "chrome", "email", "aswin", "weather", "meeting", "tomorrow", "draft", "send",
+         "search", "news", "notepad", "project", "report", "please", "thanks", "schedule", "call"]
+CHECKPOINTS = (1, 50, 500)
+
+
+def sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))) + "."
+
+
+def standin_reply(messages):
+    if "Update the running summary" in messages[-1]["content"]:
+        return "The user asked about emails to Aswin, the weather and opening Chrome. " * 3
+    return "Done."
+
+
+class ListHistory:
+    """The previous StateManager behaviour: every turn, forever, in a list."""
+    def __init__(self):
+        self.turns = []
+
+    def add(self, role, content):
+        self.turns.append({"role": role, "content": content})
+
+    def history(self):
+        return self.turns
+
+    def close(self):
+        pass
+
+
+def run_session(make_history, rng, turns, llm_client):
+    history = make_history()
+    samples = {}
+    overhead = []
+    for turn in range(1, turns + 1):
+        user_text = sentence(rng, 5, 30)
+        start = time.perf_counter()
+        window = history.history()
+        overhead.append(time.perf_counter() - start)
+
+        if turn in CHECKPOINTS:
+            messages = [{"role": "system", "content": SYSTEM_PROMPT}, *window, {"role": "user", "content": user_text}]
+            prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+            start = time.perf_counter()
+            llm_client.chat_completion(messages, MODEL)
+            samples[turn] = (prompt_tokens, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        history.add("user", user_text)
+        history.add("assistant", sentence(rng, 20, 120))
+        overhead.append(time.perf_counter() - start)
+        if turn in CHECKPOINTS and hasattr(history, "wait_for_summary"):
+            history.wait_for_summary() # Keep later checkpoints comparable across runs
+    history.close()
+    return samples, overhead
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=1500, help="History token budget")
+    args = parser.parse_args()
+
+    server = chat_server(latency=0.01, reply=standin_reply, seconds_per_prompt_char=2e-6).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    from src import llm_client
+    from src.conversation_store import ConversationStore
+    from src.agent.agent_planner import summarize_conversation
+
+    workdir = tempfile.mkdtemp(prefix="conversation-bench-")
+    counter = iter(range(10**6))
+
+    def store(policy):
+        def make():
+            path = os.path.join(workdir, f"{policy}-{next(counter)}.db")
+            return ConversationStore(path, token_budget=args.budget, policy=policy, summarizer=summarize_conversation)
+        return make
+
+    modes = (("unbounded list", ListHistory), ("store, drop", store("drop")), ("store, summarize", store("summarize")))
+    print(f"{args.sessions} conversations of {args.turns} turns, history budget {args.budget} tokens")
+    for name, make_history in modes:
+        rng = random.Random(42)
+        per_turn = {turn: [] for turn in CHECKPOINTS if turn <= args.turns}
+        overhead = []
+        for _ in range(args.sessions):
+            samples, session_overhead = run_session(make_history, rng, args.turns, llm_client)
+            for turn, sample in samples.items():
+                per_turn[turn].append(sample)
+            overhead.extend(session_overhead)
+
+        print(f"{name}:")
+        for turn, samples in per_turn.items():
+            tokens = summarize([s[0] for s in samples])
+            latency = summarize([s[1] for s in samples])
+            print(f"  turn {turn:>3}: prompt p50 {tokens['p50']:6.0f} / p95 {tokens['p95']:6.0f} tokens, "
+                  f"LLM p50 {latency['p50'] * 1000:6.1f} / p95 {latency['p95'] * 1000:6.1f}ms")
+        stats = summarize(overhead)
+        print(f"  history read/append: p50 {stats['p50'] * 1e6:.0f}us, p95 {stats['p95'] * 1e6:.0f}us")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
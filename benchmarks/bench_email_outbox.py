@@ -0,0 +1,73 @@
+# benchmarks/bench_email_outbox.py
+"""
+Time an email costs the voice path, and end-to-end delivery time, with a new SMTP
+connection + login per email (the old send_email) versus the background EmailOutbox
+(src/agent/email_outbox.py). Also checks that the outbox reconnects when the server
+hangs up between messages. Runs against a local SMTP stand-in.
+
+    python -m benchmarks.bench_email_outbox [--emails 20] [--interval 0.05]
+"""
+import time
+import smtplib
+import argparse
+from email.mime.text import MIMEText
+
+from benchmarks.common import summarize
+from benchmarks.standins import SMTPStandin
+
+
+def ms(stats):
+    return f"p50 {stats['p50'] * 1000:7.1f}ms, p95 {stats['p95'] * 1000:7.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between emails")
+    args = parser.parse_args()
+
+    from src.agent.email_outbox import EmailOutbox
+
+    server = SMTPStandin().start()
+    host, port = server.address
+    print(f"{args.emails} emails, one every {args.interval * 1000:.0f}ms, stand-in handshake "
+          f"{server.connect_delay * 1000:.0f}ms + login {server.login_delay * 1000:.0f}ms")
+
+    # Old behaviour: connect, log in, send and quit inside the tool call
+    latencies = []
+    for i in range(args.emails):
+        start = time.perf_counter()
+        message = MIMEText(f"Body {i}")
+        message["From"], message["To"], message["Subject"] = "me@example.com", "you@example.com", f"Test {i}"
+        with smtplib.SMTP(host, port) as connection:
+            connection.login("me@example.com", "secret")
+            connection.send_message(message)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(args.interval)
+    print(f"  connection per email: voice path {ms(summarize(latencies))} (= end to end), "
+          f"{server.connections_opened} connections")
+
+    def run_outbox(label):
+        outbox = EmailOutbox(host, port, use_ssl=False, username="me@example.com", password="secret")
+        enqueue_times, items = [], []
+        for i in range(args.emails):
+            start = time.perf_counter()
+            items.append(outbox.enqueue("you@example.com", f"Test {i}", f"Body {i}"))
+            enqueue_times.append(time.perf_counter() - start)
+            time.sleep(args.interval)
+        for item in items:
+            item.done.wait(30)
+        outbox.close()
+        sent = sum(item.status == "sent" for item in items)
+        print(f"  {label}: voice path {ms(summarize(enqueue_times))}, end to end "
+              f"{ms(summarize([item.latency for item in items]))}, {sent}/{len(items)} sent over "
+              f"{outbox.connections_opened} connection(s)")
+
+    run_outbox("outbox              ")
+    server.drop_after = 5
+    run_outbox("outbox, drops every 5")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/bench_flirt_sessions.py
+"""
+Many flirt sessions at once on the FlirtSessionManager (src/agent/flirt_sessions.py)
+against a fake messaging backend with --contacts chats. Each contact replies to our
+messages after a random delay; the fake reply generator takes longer the more
+history it is sent. Reports reply/answer latency, how the reply time grows over a
+long chat with the full history versus the token-budgeted one, the threads used and
+how long a voice-loop tick is held up while the sessions run. The WhatsApp desktop
+backend allows one session at a time (it has to click through the app's UI) and the
+WhatsApp Web one (FLIRT_BACKEND=web) four, one browser per chat.
+
+    python -m benchmarks.bench_flirt_sessions [--contacts 50] [--exchanges 20] [--scale 0.01]
+"""
+import io
+import time
+import random
+import argparse
+import threading
+import contextlib
+
+from benchmarks.common import summarize
+from src.async_runner import AsyncRunner
+from src.agent.reply_poller import StopEvent
+from src.agent.flirt_sessions import FlirtSessionManager
+
+
+class FakeMessagingBackend:
+    """Every contact answers each of our messages `exchanges` times, then goes quiet."""
+    def __init__(self, scale, exchanges, call_seconds, seed):
+        self.scale = scale
+        self.exchanges = exchanges
+        self.call_seconds = call_seconds
+        self.rng = random.Random(seed)
+        self.inbox = {}
+        self.replies = {}
+        self.in_call = 0
+        self.overlapping_calls = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.in_call += 1
+            if self.in_call > 1:
+                self.overlapping_calls += 1
+        time.sleep(self.call_seconds)
+        with self._lock:
+            self.in_call -= 1
+
+    def open_chat(self, contact):
+        self._enter()
+        self.inbox[contact] = []
+        self.replies[contact] = 0
+        return True
+
+    def send(self, contact, text):
+        self._enter()
+        if self.replies[contact] < self.exchanges:
+            self.replies[contact] += 1
+            # Most replies come within seconds, some after a long pause
+            delay = self.rng.uniform(2, 20) if self.rng.random() < 0.8 else self.rng.uniform(60, 180)
+            reply = f"{contact} says something longer than a word or two ({self.replies[contact]})"
+            threading.Timer(delay * self.scale, lambda: self.inbox[contact].append(reply)).start()
+        return True
+
+    def read_new(self, contact):
+        self._enter()
+        new_messages, self.inbox[contact] = self.inbox[contact], []
+        return new_messages
+
+
+def make_generator(seconds_per_token, base_seconds, prompt_tokens):
+    def generate(history):
+        tokens = sum(len(turn["text"]) for turn in history) // 4
+        prompt_tokens.append(tokens)
+        time.sleep(base_seconds + tokens * seconds_per_token)
+        return "A playful answer with an emoji 😉"
+    return generate
+
+
+def run(label, args, history_tokens):
+    with contextlib.redirect_stdout(io.StringIO()): # The sessions' status messages
+        lines = _run(args, history_tokens)
+    print(f"  {label}:")
+    print("\n".join(lines))
+
+
+def _run(args, history_tokens):
+    scale = args.scale
+    stop = StopEvent()
+    runner = AsyncRunner("flirt")
+    backend = FakeMessagingBackend(scale, args.exchanges, args.call_ms / 1000 * scale, args.seed)
+    prompt_tokens = []
+    generate = make_generator(args.ms_per_token / 1000, 0.02, prompt_tokens)
+    manager = FlirtSessionManager(backend, generate, runner, stop, history_tokens=history_tokens,
+                                  min_interval=1 * scale, max_interval=15 * scale, backoff=1.5)
+    contacts = [f"Contact {i:02d}" for i in range(args.contacts)]
+
+    start_times = []
+    for contact in contacts:
+        start = time.perf_counter()
+        manager.start(contact)
+        start_times.append(time.perf_counter() - start)
+
+    # The voice loop, meanwhile: how late does a 10ms tick come back?
+    tick_lag = []
+    threads_peak = 0
+    while any(backend.replies.get(c, 0) < args.exchanges or backend.inbox.get(c) for c in contacts) \
+            or sum(s.received for s in manager.sessions.values()) < args.contacts * args.exchanges:
+        start = time.perf_counter()
+        time.sleep(0.01)
+        tick_lag.append(time.perf_counter() - start - 0.01)
+        threads_peak = max(threads_peak, sum(t.name.startswith("flirt") for t in threading.enumerate()))
+    time.sleep(0.2) # Let the last answers go out
+
+    sessions = list(manager.sessions.values())
+    manager.close()
+    runner.stop()
+    stop.set()
+
+    answers = summarize([t for s in sessions for t in s.answer_latencies])
+    detection = summarize([t / scale for s in sessions for t in s.poller.detection_latencies])
+    lag = summarize(tick_lag)
+    early, late = prompt_tokens[:args.contacts], prompt_tokens[-args.contacts:]
+    return [
+        f"    {sum(s.received for s in sessions)} replies answered across {len(sessions)} chats, "
+          f"start() {max(start_times) * 1000:.2f}ms max",
+        f"    reply detection p50 {detection['p50']:.1f}s (session time), answer p50 "
+          f"{answers['p50'] * 1000:.0f}ms, p95 {answers['p95'] * 1000:.0f}ms",
+        f"    prompt tokens first turn ~{sum(early) // len(early)}, last turn ~{sum(late) // len(late)}",
+        f"    {threads_peak} session threads, {backend.overlapping_calls} overlapping backend calls, "
+          f"voice loop tick lag p95 {lag['p95'] * 1000:.1f}ms, max {lag['max'] * 1000:.1f}ms",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=50)
+    parser.add_argument("--exchanges", type=int, default=20, help="Replies per contact")
+    parser.add_argument("--scale", type=float, default=0.01, help="Real seconds per session second")
+    parser.add_argument("--call-ms", type=float, default=50, help="Cost of one backend call (session time)")
+    parser.add_argument("--ms-per-token", type=float, default=0.2, help="Reply generation cost per prompt token")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    print(f"{args.contacts} contacts x {args.exchanges} replies, time compressed x{1 / args.scale:.0f}")
+    run("full history (old)", args, history_tokens=10 ** 9)
+    run("token-budgeted history", args, history_tokens=200)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_intent_classifier.py
+"""
+How much agent traffic the on-device IntentClassifier (src/agent/intent_classifier.py)
+keeps local, how often those local decisions are right, and how long a prediction
+takes. The utterances below are not among the classifier's training examples.
+
+    python -m benchmarks.bench_intent_classifier [--repeat 200]
+"""
+import time
+import argparse
+
+from benchmarks.common import summarize
+from src.agent.intent_classifier import IntentClassifier
+
+# (utterance, expected tool or None for "needs the agent", expected main argument)
+HELD_OUT = [
+    ("Open Notepad.", "open_application", "notepad"),
+    ("open note pad", "open_application", "notepad"),
+    ("Could you open Chrome?", "open_application", "chrome"),
+    ("launch calculator", "open_application", "calculator"),
+    ("start chrome for work", "open_application", "chrome"),
+    ("open the browser please", "open_application", "chrome"),
+    ("bring up the calculator", "open_application", "calculator"),
+    # Searches need the agent to turn the results into an answer
+    ("Search for weather today.", None, None),
+    ("look up train timings to madurai", None, None),
+    ("what is the weather in chennai tomorrow", None, None),
+    ("who won the cricket match today", None, None),
+    ("latest news about tesla", None, None),
+    ("start the meeting notes", None, None),
+    ("send a mail to parthiban that the meeting moved", None, None),
+    ("email my manager i'm on leave", None, None),
+    ("yes, send it", None, None),
+    ("tell me something funny", None, None),
+    ("how's your day going", None, None),
+    ("remind me to call mom", None, None),
+    ("open chrome and search for cats", None, None),
+    ("what did you just do", None, None),
+    ("thanks a lot", None, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Timing passes over the utterances")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = IntentClassifier()
+    print(f"Classifier built in {(time.perf_counter() - start) * 1000:.1f}ms "
+          f"({classifier.matrix.shape[0]} examples, {classifier.matrix.shape[1]} n-grams)")
+
+    local = correct = wrongly_local = 0
+    for text, expected_tool, expected_arg in HELD_OUT:
+        prediction = classifier.predict(text)
+        if prediction is None:
+            status = "agent"
+        else:
+            local += 1
+            main_arg = next(iter(prediction.args.values()))
+            if expected_tool is None:
+                wrongly_local += 1
+                status = "WRONG (should go to agent)"
+            elif (prediction.tool, main_arg) == (expected_tool, expected_arg):
+                correct += 1
+                status = "ok"
+            else:
+                status = f"WRONG (expected {expected_tool} {expected_arg!r})"
+        detail = f"{prediction.tool} {prediction.args}" if prediction else ""
+        print(f"  {text!r:<48} {status:<6} {detail}")
+
+    tool_requests = sum(1 for _, tool, _ in HELD_OUT if tool)
+    print(f"Kept local: {local}/{len(HELD_OUT)} requests ({local / len(HELD_OUT):.0%}), "
+          f"{correct}/{tool_requests} of the tool requests handled correctly, "
+          f"{wrongly_local} agent requests wrongly handled locally")
+
+    latencies = []
+    for _ in range(args.repeat):
+        for text, _, _ in HELD_OUT:
+            begin = time.perf_counter()
+            classifier.predict(text)
+            latencies.append(time.perf_counter() - begin)
+    stats = summarize(latencies)
+    print(f"Prediction latency over {len(latencies)} calls: p50 {stats['p50'] * 1000:.3f}ms, "
+          f"p95 {stats['p95'] * 1000:.3f}ms, max {stats['max'] * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
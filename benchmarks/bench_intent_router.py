@@ -0,0 +1,104 @@
+# benchmarks/bench_intent_router.py
+"""
+Routing time for synthetic utterances against a large command set, using the old
+linear substring scan (every command checked with `in` on every utterance) versus
+the compiled CommandRegistry in src/intent_registry.py. Also counts how often the
+substring scan fires on a command word hidden inside another word ("commute" -> "mute").
+
+    python -m benchmarks.bench_intent_router [--commands 1000] [--utterances 10000]
+"""
+import time
+import random
+import argparse
+
+from benchmarks.common import summarize
+from src.intent_registry import CommandRegistry, tokenize
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "ne", "so", "vi", "da", "pe", "zu", "ho"]
+FILLER = ["please", "hey", "can", "you", "now", "the", "and", "then", "maybe", "quickly"]
+
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def make_commands(rng, count):
+    words = sorted({make_word(rng) for _ in range(count)})
+    phrases = set()
+    while len(phrases) < count:
+        phrases.add(" ".join(rng.sample(words, rng.randint(1, 3))))
+    return sorted(phrases), words
+
+
+def make_utterances(rng, phrases, words, count):
+    utterances = []
+    for _ in range(count):
+        noise = [rng.choice(FILLER + words) for _ in range(rng.randint(2, 8))]
+        roll = rng.random()
+        if roll < 0.5:
+            noise.insert(rng.randint(0, len(noise)), rng.choice(phrases))
+        elif roll < 0.6:
+            # A command glued onto another word, which must not count as a match
+            noise.insert(rng.randint(0, len(noise)), "co" + rng.choice(phrases))
+        utterances.append(" ".join(noise))
+    return utterances
+
+
+def linear_route(phrases, text):
+    text_lower = text.lower()
+    for phrase in phrases:
+        if phrase in text_lower:
+            return phrase
+    return None
+
+
+def timed(route, utterances):
+    latencies, results = [], []
+    for text in utterances:
+        start = time.perf_counter()
+        results.append(route(text))
+        latencies.append(time.perf_counter() - start)
+    return results, summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=1000)
+    parser.add_argument("--utterances", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    phrases, words = make_commands(rng, args.commands)
+    utterances = make_utterances(rng, phrases, words, args.utterances)
+
+    registry = CommandRegistry(filler_words=FILLER)
+    for phrase in phrases:
+        registry.register(phrase, [phrase], handler=lambda slots: None)
+    start = time.perf_counter()
+    registry.compile()
+    print(f"{len(phrases)} commands compiled in {(time.perf_counter() - start) * 1000:.1f}ms, "
+          f"{len(utterances)} utterances")
+
+    def compiled_route(text):
+        match = registry.match(text)
+        return match.command.name if match else None
+
+    linear, linear_stats = timed(lambda text: linear_route(phrases, text), utterances)
+    compiled, compiled_stats = timed(compiled_route, utterances)
+    for name, stats in (("linear scan", linear_stats), ("compiled", compiled_stats)):
+        print(f"{name:>12}: p50 {stats['p50'] * 1e6:7.1f}us, p95 {stats['p95'] * 1e6:7.1f}us, "
+              f"max {stats['max'] * 1e6:7.1f}us")
+
+    # A substring hit is only genuine if the phrase appears as whole words
+    def whole_words(phrase, text):
+        tokens, target = tokenize(text), phrase.split()
+        return any(tokens[i:i + len(target)] == target for i in range(len(tokens)))
+
+    false_hits = sum(1 for text, hit in zip(utterances, linear) if hit and not whole_words(hit, text))
+    compiled_false = sum(1 for text, hit in zip(utterances, compiled) if hit and not whole_words(hit, text))
+    print(f"Matches inside other words: linear scan {false_hits}, compiled {compiled_false}")
+
+
+if __name__ == "__main__":
+    main()
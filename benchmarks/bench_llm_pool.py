@@ -0,0 +1,61 @@
+# benchmarks/bench_llm_pool.py
+"""
+Connections opened and latency for a burst of LLM calls, with a brand-new Groq
+client per call (the old behaviour) versus the shared pooled client in
+src/llm_client.py. Also checks that retries recover from transient 503s.
+
+    python -m benchmarks.bench_llm_pool [--calls 50]
+"""
+import os
+import time
+import argparse
+
+from benchmarks.common import summarize
+from benchmarks.standins import chat_server
+
+MESSAGES = [{"role": "user", "content": "open calculator"}]
+MODEL = "llama3-8b-8192"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    server = chat_server(latency=0.01).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    from groq import Groq
+    from src import llm_client
+
+    def fresh_client_call():
+        client = Groq(api_key="standin", base_url=server.base_url)
+        return client.chat.completions.create(messages=MESSAGES, model=MODEL)
+
+    def pooled_call():
+        return llm_client.chat_completion(MESSAGES, MODEL)
+
+    print(f"{args.calls} sequential chat completions against {server.base_url}")
+    for name, call in (("client per call", fresh_client_call), ("shared pool", pooled_call)):
+        opened_before = server.connections_opened
+        latencies = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+        stats = summarize(latencies)
+        print(f"{name:>16}: {server.connections_opened - opened_before:3d} connections opened, "
+              f"p50 {stats['p50'] * 1000:.1f}ms, p95 {stats['p95'] * 1000:.1f}ms")
+
+    server.failures_left = 2
+    served_before = server.requests_served
+    start = time.perf_counter()
+    reply = llm_client.chat_completion(MESSAGES, MODEL, retries=3)
+    print(f"Retry check: answered {reply.choices[0].message.content!r} after "
+          f"{server.requests_served - served_before} requests in {time.perf_counter() - start:.2f}s")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
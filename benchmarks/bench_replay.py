@@ -0,0 +1,192 @@
+# benchmarks/bench_replay.py
+"""
+The assistant loop end to end, offline: recordings from a corpus are played into the
+real WakeWordDetector and main.py's VoiceTurn (SpeechToText -> correction -> router ->
+intent classifier -> AgentPlanner, async and streamed -> LocalTTS, with the StateManager
+and barge-in listening). The microphone is a FileAudioSource, the speakers a
+NullAudioSink, Porcupine/Whisper/Groq/XTTS are stand-ins with configurable latency (see
+benchmarks/replay.py and standins.py).
+
+Reports per-stage latency (the spans of src/tracing.py), end of the user's speech ->
+first audio of the answer, throughput and peak RSS. --json saves the results and
+--baseline compares against saved ones, exiting with 1 on a regression, for CI runs.
+--speed > 1 compresses audio time (capture, VAD endpoint, playback); stand-in
+latencies and synthesis stay real.
+
+    python -m benchmarks.bench_replay [--rounds 2] [--json out.json] [--baseline base.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+
+from benchmarks.common import REPO_ROOT, summarize
+from benchmarks.standins import chat_server, transcription_server
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1) # KB on Linux, bytes on macOS
+
+
+def compare(results, baseline, tolerance, slack=0.02):
+    """Regressions of p95 latency (beyond `tolerance` plus `slack` seconds) and of peak RSS."""
+    regressions = []
+    for name, current, before in (
+            [("end to end", results["end_to_end"], baseline.get("end_to_end"))]
+            + [(stage, s, baseline.get("stages", {}).get(stage)) for stage, s in results["stages"].items()]):
+        if before and current["p95"] > before["p95"] * (1 + tolerance) + slack:
+            regressions.append(f"{name} p95 {current['p95']:.3f}s, baseline {before['p95']:.3f}s")
+    if results["peak_rss_mb"] and baseline.get("peak_rss_mb") and \
+            results["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {results['peak_rss_mb']:.0f}MB, baseline {baseline['peak_rss_mb']:.0f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(REPO_ROOT, "benchmarks", "replay_corpus.json"))
+    parser.add_argument("--rounds", type=int, default=2, help="Times to replay the whole corpus")
+    parser.add_argument("--speed", type=float, default=1.0, help="Audio time compression")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="Whisper stand-in base latency")
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="Chat stand-in time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--tool-latency", type=float, default=0.4, help="Upper bound of a stand-in tool call")
+    parser.add_argument("--json", help="Write the results here")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the baseline")
+    args = parser.parse_args()
+
+    from benchmarks.replay import load_corpus, FileAudioSource, WakeTone, replay_voice_class, make_chat_reply, replay_planner
+    entries = load_corpus(args.corpus, REPO_ROOT)
+    current = {}
+    # One server for both Groq endpoints, like the real API
+    groq = chat_server(latency=args.llm_latency, reply=make_chat_reply(entries),
+                       seconds_per_token=1 / args.tokens_per_second)
+    groq.routes.update(transcription_server(
+        base_latency=args.stt_latency, transcript=lambda seconds: (current["transcript"], current["avg_logprob"])).routes)
+    groq.start()
+    # src.config reads these on import
+    os.environ["GROQ_BASE_URL"] = groq.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+    os.environ["STT_BACKEND"] = "groq"
+    os.environ["TRACE_PATH"] = ""
+
+    os.environ["CONVERSATION_DB_PATH"] = "" # In memory
+    os.environ["CONVERSATION_POLICY"] = "drop"
+
+    from src.tracing import tracer
+    from src.config import LOCAL_INTENTS
+    from src.startup import StartupProfiler, LazyComponents
+    from src.audio_capture import AudioCapture
+    from src.wake_word import WakeWordDetector
+    from src.barge_in import BargeInMonitor
+    from src.speech_to_text import SpeechToText
+    from src.state_manager import StateManager
+    from src.async_runner import AsyncRunner
+    from src.local_tts import WAKE_ACKNOWLEDGEMENT
+    from src.agent.intent_classifier import IntentClassifier
+    from src.voice_turn import VoiceTurn
+
+    tool_names = sorted({name for entry in entries for name in entry.get("tools", ())})
+    capture = AudioCapture()
+    source = FileAudioSource(capture, speed=args.speed).start()
+    detector = WakeWordDetector(None, capture, porcupine=WakeTone())
+    voice = replay_voice_class(speed=args.speed)()
+    # The same components main.py builds, with the stand-ins in place of the models
+    components = LazyComponents(StartupProfiler())
+    components.add("stt", lambda: SpeechToText(capture=capture))
+    components.add("tts", lambda: voice)
+    if LOCAL_INTENTS:
+        components.add("intent_classifier", IntentClassifier)
+    components.add("agent_planner", lambda: replay_planner(tool_names, args.tool_latency))
+    components.add("state_manager", StateManager)
+    runner = AsyncRunner("agent")
+    barge_in = BargeInMonitor(capture, detector)
+    stop = threading.Event()
+    voice_turn = VoiceTurn(components, runner, stop, barge_in)
+
+    def turn(entry):
+        current.update(transcript=entry["transcript"], avg_logprob=entry.get("avg_logprob", -0.1))
+        # The user waits for the "Yes?", the recording only starts once it has played
+        source.say(entry["samples"], pause=0.6)
+        timeout = threading.Timer(len(entry["samples"]) / capture.RATE / args.speed + 5, stop.set)
+        timeout.start()
+        heard = detector.wait_for_wake_word(stop_event=stop)
+        timeout.cancel()
+        if not heard:
+            return None
+        tracer.start_turn()
+        tracer.record("wake word", (capture.position - detector.detected_at) / capture.RATE / args.speed)
+        with tracer.span("acknowledgement"):
+            voice.speak_feedback(WAKE_ACKNOWLEDGEMENT)
+        voice.first_audio_at = None
+        voice_turn.run(capture.position, preroll_ms=0) # As main.py, after the acknowledgement
+        end_to_end = voice.first_audio_at - source.speech_ended
+        tracer.end_turn()
+        return end_to_end
+
+    end_to_end, missed = [], 0
+    started = time.perf_counter()
+    print(f"Replaying {len(entries)} utterances x {args.rounds} rounds at {args.speed}x audio speed...")
+    for _ in range(args.rounds):
+        for entry in entries:
+            stop.clear()
+            with contextlib.redirect_stdout(io.StringIO()): # The pipeline's own progress messages
+                result = turn(entry)
+            if result is None:
+                missed += 1
+            else:
+                end_to_end.append(result)
+    wall = time.perf_counter() - started
+    source.stop()
+    runner.stop()
+    capture.close()
+    groq.stop()
+
+    stats = tracer.stats()
+    e2e = summarize(end_to_end)
+    results = {
+        "turns": len(end_to_end),
+        "missed_wake_words": missed,
+        "barge_ins": barge_in.interruptions,
+        "turns_per_minute": len(end_to_end) / wall * 60,
+        "audio_seconds_per_second": source.samples_written / capture.RATE / wall,
+        "peak_rss_mb": peak_rss_mb(),
+        "end_to_end": e2e,
+        "stages": {stage: {"p50": s["p50"], "p95": s["p95"], "p99": s["p99"]} for stage, s in stats.items()},
+    }
+    tracer.report(last=len(end_to_end), top=20)
+    print(f"  end of speech -> first audio p50 {e2e['p50']:.2f}s, p95 {e2e['p95']:.2f}s, max {e2e['max']:.2f}s")
+    print(f"  {results['turns']} turns in {wall:.1f}s: {results['turns_per_minute']:.1f} turns/min, "
+          f"{results['audio_seconds_per_second']:.2f}s of audio per second, {missed} wake words missed, "
+          f"{results['barge_ins']} barge-ins")
+    if results["peak_rss_mb"]:
+        print(f"  peak RSS {results['peak_rss_mb']:.0f}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSION: {regression}")
+        if regressions or missed:
+            sys.exit(1)
+        print(f"  No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
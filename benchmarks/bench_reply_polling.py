@@ -0,0 +1,91 @@
+# benchmarks/bench_reply_polling.py
+"""
+Reply-detection latency and polls per hour for a flirt session, with the old fixed
+15 s sleep, the adaptive ReplyPoller (src/agent/reply_poller.py) and its push mode.
+A fake chat answers each of our messages after a random delay: usually within
+seconds, sometimes only after minutes. Time is compressed (see --scale) so a long
+session replays in seconds; all numbers are reported in session time.
+
+    python -m benchmarks.bench_reply_polling [--exchanges 40] [--scale 0.002]
+"""
+import time
+import random
+import argparse
+import threading
+
+from benchmarks.common import summarize
+from src.agent.reply_poller import ReplyPoller, StopEvent
+
+
+class FakeChat:
+    """Replies arrive on timers; read() returns the oldest unread one, like read_latest_reply."""
+    def __init__(self, scale, on_arrival=None):
+        self.scale = scale
+        self.on_arrival = on_arrival
+        self._arrived = []
+        self._lock = threading.Lock()
+
+    def reply_after(self, session_seconds, text):
+        def arrive():
+            with self._lock:
+                self._arrived.append((time.monotonic(), text))
+            if self.on_arrival:
+                self.on_arrival()
+        threading.Timer(session_seconds * self.scale, arrive).start()
+
+    def read(self):
+        with self._lock:
+            return self._arrived.pop(0) if self._arrived else None
+
+
+def run(label, rng, args, **poller_options):
+    scale = args.scale
+    options = {k: v * scale if k.endswith("interval") else v for k, v in poller_options.items()}
+    stop = StopEvent()
+    chat = FakeChat(scale)
+    poller = ReplyPoller(chat.read, stop, **options)
+    if poller.push:
+        chat.on_arrival = poller.notify
+
+    latencies = []
+    started = time.monotonic()
+    for i in range(args.exchanges):
+        # 70% of replies come within seconds, the rest after a long pause
+        delay = rng.uniform(2, 20) if rng.random() < 0.7 else rng.uniform(60, 600)
+        chat.reply_after(delay, f"reply {i}")
+        poller.activity()
+        arrived_at, _ = poller.wait_for_reply()
+        latencies.append((time.monotonic() - arrived_at) / scale)
+    session_hours = (time.monotonic() - started) / scale / 3600
+
+    # How long closing the GUI takes to end a quiet wait
+    waiter = threading.Thread(target=poller.wait_for_reply)
+    waiter.start()
+    time.sleep(0.05)
+    stop_started = time.perf_counter()
+    stop.set()
+    waiter.join()
+    stop_ms = (time.perf_counter() - stop_started) * 1000
+
+    stats = summarize(latencies)
+    print(f"{label:>16}: detection p50 {stats['p50']:5.1f}s, p95 {stats['p95']:5.1f}s, "
+          f"max {stats['max']:5.1f}s | {poller.polls / session_hours:6.0f} polls/hour | stop in {stop_ms:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exchanges", type=int, default=40)
+    parser.add_argument("--scale", type=float, default=0.002, help="Real seconds per session second")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.exchanges} exchanges, time compressed x{1 / args.scale:.0f}")
+    # The old loop: time.sleep(15) between polls (it also took up to 15s to notice a stop)
+    run("fixed 15s sleep", random.Random(args.seed), args, min_interval=15, max_interval=15, backoff=1)
+    run("adaptive 1-15s", random.Random(args.seed), args, min_interval=1, max_interval=15, backoff=1.5)
+    # With notifications, polling is only the FLIRT_PUSH_CHECK_SECONDS safety net
+    run("push, 120s check", random.Random(args.seed), args, min_interval=1, max_interval=120, backoff=1.5, push=True)
+
+
+if __name__ == "__main__":
+    main()
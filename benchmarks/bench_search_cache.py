@@ -0,0 +1,66 @@
+# benchmarks/bench_search_cache.py
+"""
+Backend searches and wall time for a conversation's worth of web searches, calling
+Tavily every time (the old search_web) versus through the cached_tool decorator
+(src/agent/tool_cache.py). The workload repeats queries with different casing and trailing
+punctuation, and ends with a burst of identical concurrent searches that should be
+coalesced into one request. Runs against a local Tavily stand-in.
+
+    python -m benchmarks.bench_search_cache [--latency 0.2]
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.standins import search_server
+
+QUERIES = [
+    "weather today", "Weather today?", "news headlines", "weather tomorrow", "weather today",
+    "cricket score", "Cricket score!", "news headlines", "bitcoin price", "weather tomorrow",
+    "bitcoin price", "cricket score", "train timings to madurai", "Train timings to Madurai.",
+    "news headlines", "weather today",
+]
+BURST = ["latest ai news"] * 8
+
+
+def run(search, label, server):
+    searches_before = server.searches
+    start = time.perf_counter()
+    for query in QUERIES:
+        search(query)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(BURST)) as pool:
+        list(pool.map(search, BURST))
+    burst = time.perf_counter() - start
+    print(f"{label:>9}: {server.searches - searches_before:2d} backend searches for "
+          f"{len(QUERIES) + len(BURST)} calls, sequential {sequential:.2f}s, burst of {len(BURST)} {burst:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in seconds per search")
+    args = parser.parse_args()
+
+    server = search_server(latency=args.latency).start()
+    os.environ["TAVILY_BASE_URL"] = server.base_url
+    os.environ.setdefault("TAVILY_API_KEY", "standin")
+
+    from src.agent.web_search import tavily_search
+    from src.agent.tool_cache import cached_tool, report
+
+    # The body of search_web in src/agent/tools.py, without the LangChain @tool wrapper
+    def search_web(query: str) -> str:
+        results = tavily_search(query)
+        return f"Web search results for '{query}':\n{results}"
+
+    run(search_web, "uncached", server)
+    run(cached_tool(ttl=300)(search_web), "cached", server)
+    print(report())
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_streaming_stt.py
+"""
+Compares time-to-text of batch vs streaming speech-to-text on a long command.
+
+Audio from the bundled recordings is fed into an AudioCapture in real time and
+transcribed through a local stand-in for the Groq Whisper API.
+
+    python -m benchmarks.bench_streaming_stt [--speed 1.0]
+"""
+import os
+import time
+import argparse
+
+from benchmarks.common import REPO_ROOT, load_wav_16k, start_feeder
+from benchmarks.standins import transcription_server
+
+
+def trim_trailing_silence(samples, keep_ms=300):
+    """Cuts the recording shortly after its last speech, so joined clips read as one command."""
+    import webrtcvad
+    vad = webrtcvad.Vad(3)
+    frame = 480
+    last_speech = 0
+    for start in range(0, len(samples) - frame, frame):
+        if vad.is_speech(samples[start:start + frame].tobytes(), 16000):
+            last_speech = start + frame
+    return samples[:last_speech + keep_ms * 16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--speed", type=float, default=1.0, help="Feed speed relative to real time")
+    args = parser.parse_args()
+
+    server = transcription_server().start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    import numpy as np
+    from src.audio_capture import AudioCapture
+    from src.speech_to_text import SpeechToText
+
+    # temp_recording.wav ends in ~3s of silence, which would end the command right there
+    speech = np.concatenate([
+        trim_trailing_silence(load_wav_16k(os.path.join(REPO_ROOT, "temp_recording.wav"))),
+        load_wav_16k(os.path.join(REPO_ROOT, "my_voice.wav")),
+    ])
+    # Trailing silence lets the VAD endpoint fire
+    audio = np.concatenate([speech, np.zeros(2 * 16000, dtype=np.int16)])
+    speech_end = len(speech) / 16000 / args.speed
+
+    print(f"Command length: {len(speech) / 16000:.1f}s")
+    for streaming in (False, True):
+        capture = AudioCapture()
+        stt = SpeechToText(capture=capture, streaming=streaming)
+        feeder_start = time.perf_counter()
+        start_feeder(capture, audio, speed=args.speed)
+        text = stt.listen_and_transcribe(start_position=0)
+        time_to_text = time.perf_counter() - feeder_start - speech_end
+        mode = "streaming" if streaming else "batch"
+        print(f"{mode:>9}: end-of-speech -> text {time_to_text:.2f}s "
+              f"(endpoint -> text {stt.last_endpoint_latency:.2f}s) text={text!r}")
+        capture.close()
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_streaming_tts.py
+"""
+Time to the first spoken word, and to the end of speech, for agent answers that are
+spoken only once complete (AsyncToolAgent.run, then speak_primary) versus streamed
+(AsyncToolAgent.stream -> iter_sentences -> LocalTTS.speak_stream, see
+src/sentence_stream.py). Each turn makes one tool call, then the model writes a
+multi-sentence answer. Uses the streaming chat stand-in and a fake voice: synthesis
+and playback take time in proportion to the text but produce silence. Everything is
+sped up by --speed and reported in real-world seconds.
+
+    python -m benchmarks.bench_streaming_tts [--turns 5] [--speed 5]
+"""
+import os
+import time
+import argparse
+import threading
+
+import numpy as np
+
+from benchmarks.common import summarize
+from benchmarks.standins import chat_server, tool_call
+
+MODEL = "llama3-70b-8192"
+SAMPLE_RATE = 24000
+ANSWER = ("Tomorrow looks sunny in Chennai, with a high of thirty four degrees. The evening should stay dry, "
+          "so your walk is safe. Humidity will be around seventy percent, which will feel sticky. "
+          "If you head out after six, the breeze from the coast makes it much more pleasant. "
+          "I would still carry water, since the afternoon heat index reaches forty.")
+
+
+def plan(messages):
+    """Stand-in model: one search first, then the answer."""
+    if messages[-1]["role"] == "tool":
+        return ANSWER
+    return {"content": "", "tool_calls": [tool_call("call_0", "search_web", query="weather tomorrow")]}
+
+
+class FakeStream:
+    """Output stream that takes as long as the audio written to it and notes the first write."""
+    def __init__(self, voice):
+        self.voice = voice
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, samples):
+        if self.voice.first_audio_at is None:
+            self.voice.first_audio_at = time.perf_counter()
+        time.sleep(len(samples) / SAMPLE_RATE)
+
+
+def fake_voice_class(speed, seconds_per_char, real_time_factor):
+    from src.local_tts import LocalTTS
+
+    class FakeVoice(LocalTTS):
+        """LocalTTS with synthesis and the sound card replaced by timed stand-ins."""
+        def __init__(self):
+            self.primary_voice = object()
+            self.feedback_voice = None
+            self.last_time_to_first_audio = None
+            self.on_playback = []
+            self._interrupt = threading.Event()
+            self.first_audio_at = None
+
+        def _synthesize_primary(self, sentence, language):
+            audio_seconds = len(sentence) * seconds_per_char / speed
+            time.sleep(audio_seconds * real_time_factor)
+            return np.zeros(int(audio_seconds * SAMPLE_RATE), dtype=np.float32)
+
+        def _open_output_stream(self, sample_rate=SAMPLE_RATE, dtype="float32"):
+            return FakeStream(self)
+
+    return FakeVoice
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=5.0, help="How much faster than real time to run")
+    parser.add_argument("--first-token", type=float, default=0.4, help="Seconds before the model's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--seconds-per-char", type=float, default=0.065, help="Speech length per character")
+    parser.add_argument("--real-time-factor", type=float, default=0.3, help="Synthesis time / audio length")
+    args = parser.parse_args()
+    speed = args.speed
+
+    server = chat_server(latency=args.first_token / speed, reply=plan,
+                         seconds_per_token=1 / args.tokens_per_second / speed).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    from src.async_runner import AsyncRunner
+    from src.sentence_stream import iter_sentences
+    from src.agent.async_agent import AsyncToolAgent, ToolSpec
+
+    search = ToolSpec("search_web", lambda query: "Sunny, 34C, humidity 70%.",
+                      {"type": "function", "function": {"name": "search_web", "parameters": {
+                          "type": "object", "properties": {"query": {"type": "string"}}}}}, 10)
+    agent = AsyncToolAgent("You are a test agent.", [search], MODEL)
+    runner = AsyncRunner("agent")
+    voice = fake_voice_class(speed, args.seconds_per_char, args.real_time_factor)()
+    stop = threading.Event()
+
+    def whole_answer():
+        text = runner.run(agent.run("Will it rain tomorrow?", []), stop_event=stop)
+        voice.speak_primary(text)
+
+    def streamed_answer():
+        tokens = runner.iterate(agent.stream("Will it rain tomorrow?", []), stop_event=stop)
+        voice.speak_stream(iter_sentences(tokens))
+
+    speech = len(ANSWER) * args.seconds_per_char
+    print(f"{args.turns} turns: 1 tool call, then a {len(ANSWER.split())}-word answer (~{speech:.0f}s of speech) "
+          f"at {args.tokens_per_second:.0f} tokens/s, synthesis at {args.real_time_factor}x real time")
+    for label, turn in (("full answer, then speak", whole_answer), ("streamed sentences", streamed_answer)):
+        first_word, finished = [], []
+        for _ in range(args.turns):
+            voice.first_audio_at = None
+            start = time.perf_counter()
+            turn()
+            finished.append((time.perf_counter() - start) * speed)
+            first_word.append((voice.first_audio_at - start) * speed)
+        first, done = summarize(first_word), summarize(finished)
+        print(f"  {label:>23}: first spoken word p50 {first['p50']:.2f}s (p95 {first['p95']:.2f}s), "
+              f"speech finished p50 {done['p50']:.2f}s")
+    runner.stop()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_tracing.py
+"""
+Cost of the turn tracer (src/tracing.py) and what it reports. First the overhead on
+the voice loop: a span outside any turn, a span inside one and closing a turn with
+JSONL output on. Then --turns traced turns with the chat stand-in and the async
+agent, each routing, calling two tools concurrently and "speaking", followed by the
+same slowest-stages report the "latency report" voice command prints.
+
+    python -m benchmarks.bench_tracing [--turns 20]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.standins import chat_server, tool_call
+
+MODEL = "llama3-70b-8192"
+SCHEMA = {"type": "object", "properties": {"query": {"type": "string"}}}
+
+
+def plan(messages):
+    """Stand-in model: two tools at once, then the answer."""
+    if messages[-1]["role"] == "tool":
+        return "Sunny all day."
+    return {"content": "", "tool_calls": [tool_call("call_0", "search_web", query="weather"),
+                                          tool_call("call_1", "get_time", query="now")]}
+
+
+def per_call(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n
+
+
+def overhead(Tracer, path, n=20000):
+    tracer = Tracer(path=path)
+
+    def span():
+        with tracer.span("stage"):
+            pass
+
+    outside = per_call(span, n)
+    tracer.start_turn()
+    inside = per_call(span, n)
+    tracer.end_turn()
+
+    def turn():
+        tracer.start_turn()
+        for stage in ("wake word", "vad capture", "stt", "route", "agent", "speak"):
+            with tracer.span(stage):
+                pass
+        tracer.end_turn()
+
+    closing = per_call(turn, 2000)
+    tracer.flush()
+    print(f"  span outside a turn {outside * 1e6:.2f}us, inside a turn {inside * 1e6:.2f}us, "
+          f"whole 6-stage turn with JSONL {closing * 1e6:.1f}us (written by a background thread)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    # src.config reads these on import
+    server = chat_server(latency=0.08, reply=plan).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "turn_traces.jsonl")
+        from src.tracing import Tracer, tracer
+        print("Overhead:")
+        overhead(Tracer, os.path.join(directory, "overhead.jsonl"))
+
+        from src.async_runner import AsyncRunner
+        from src.agent.async_agent import AsyncToolAgent, ToolSpec
+
+        rng = random.Random(3)
+
+        def slow(low, high):
+            def run(query):
+                time.sleep(rng.uniform(low, high))
+                return "ok"
+            return run
+
+        specs = [ToolSpec(name, slow(*seconds), {"type": "function", "function": {"name": name, "parameters": SCHEMA}}, 10)
+                 for name, seconds in (("search_web", (0.1, 0.4)), ("get_time", (0.01, 0.03)))]
+        agent = AsyncToolAgent("You are a test agent.", specs, MODEL)
+        runner = AsyncRunner("agent")
+        tracer.path = path
+        for _ in range(args.turns):
+            tracer.start_turn()
+            with tracer.span("stt"):
+                time.sleep(rng.uniform(0.05, 0.15))
+            with tracer.span("route"):
+                pass
+            with tracer.span("agent"):
+                answer = runner.run(agent.run("Weather?", []))
+            with tracer.span("speak"):
+                time.sleep(0.01 * len(answer))
+            tracer.end_turn()
+        runner.stop()
+        server.stop()
+        tracer.flush()
+        with open(path, encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+        nested = all(s["parent"] == "agent" for t in tracer.turns for s in t.spans if s["stage"].startswith("tool"))
+        print(f"\n{args.turns} agent turns traced, {lines} lines in the JSONL file, "
+              f"tool spans nested under 'agent': {nested}")
+        print(tracer.turns[-1].summary())
+        tracer.report(last=args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# benchmarks/bench_tts_worker.py
+"""
+Synthesis in the assistant's process versus in a TTSWorker (src/tts_worker.py), while a
+simulated microphone fills an AudioCapture the way PyAudio's callback does: a thread
+that must get the GIL every 32ms block, and loses audio (an overrun) once it is more
+than --device-blocks behind. The engines are stand-ins that, like inference driven from
+Python, hold the GIL in stretches of --gil-hold-ms for --rtf x the length of the audio,
+and return a tone.
+
+Reports capture overruns and lateness, and synthesis throughput (sentences and seconds
+of audio per second) for both modes. For the worker it also reports the hand-off cost
+per sentence through shared memory versus pickled through the queue, and how long a
+sentence takes when the worker crashes on it and is restarted.
+
+    python -m benchmarks.bench_tts_worker [--sentences 12] [--rtf 0.3] [--gil-hold-ms 80]
+"""
+import os
+import time
+import argparse
+import tempfile
+import threading
+import functools
+
+import numpy as np
+
+from benchmarks.common import summarize
+
+XTTS_SAMPLE_RATE = 24000
+BLOCK = 512 # Samples per PyAudio callback, as AudioCapture.FRAMES_PER_BUFFER
+SENTENCE = "The evening should stay dry, so your walk along the beach is safe."
+
+
+def hold_gil(seconds, hold_ms):
+    """Busy for `seconds` in C calls of about `hold_ms` each; none of them releases the GIL."""
+    n = int(hold_ms / 1000 * ITERATIONS_PER_SECOND)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(n))
+
+
+def _calibrate():
+    started = time.perf_counter()
+    sum(range(2_000_000))
+    return 2_000_000 / (time.perf_counter() - started)
+
+
+ITERATIONS_PER_SECOND = _calibrate()
+
+
+class StandInEngines:
+    """LocalTTS's engine interface with timed, GIL-holding stand-ins for XTTS and Piper."""
+    def __init__(self, rtf=0.3, gil_hold_ms=80, seconds_per_char=0.065, crash_marker=None):
+        self.primary_voice = self.feedback_voice = True
+        self.speaker_id = self.feedback_voice_id = "stand-in"
+        self.feedback_sample_rate = 22050
+        self.rtf = rtf
+        self.gil_hold_ms = gil_hold_ms
+        self.seconds_per_char = seconds_per_char
+        self.crash_marker = crash_marker
+
+    def _tone(self, text, sample_rate):
+        seconds = len(text) * self.seconds_per_char
+        hold_gil(seconds * self.rtf, self.gil_hold_ms)
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        return 0.1 * np.sin(2 * np.pi * 220 * t)
+
+    def _infer_primary(self, sentence, language):
+        if self.crash_marker and "crash" in sentence and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, "w").close() # Crashes on the first try only
+            os._exit(1)
+        return self._tone(sentence, XTTS_SAMPLE_RATE).astype(np.float32)
+
+    def _infer_feedback(self, text):
+        return (self._tone(text, self.feedback_sample_rate) * 32767).astype(np.int16)
+
+
+class SimulatedMicrophone:
+    """Writes a block into an AudioCapture every 32ms from its own thread, noting how late it ran."""
+    def __init__(self, capture, device_blocks):
+        self.capture = capture
+        self.budget = device_blocks * BLOCK / capture.RATE
+        self.lateness = []
+        self.overruns = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="microphone", daemon=True)
+
+    def _run(self):
+        block = np.zeros(BLOCK, dtype=np.int16)
+        interval = BLOCK / self.capture.RATE
+        due = time.perf_counter()
+        while not self._stop.is_set():
+            late = time.perf_counter() - due
+            self.lateness.append(late)
+            if late > self.budget: # The device buffer filled up, the oldest blocks are gone
+                self.overruns += 1
+                due += int(late / interval) * interval
+            self.capture.write(block)
+            due += interval
+            time.sleep(max(0.0, due - time.perf_counter()))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(synthesize, sentences, device_blocks):
+    from src.audio_capture import AudioCapture
+    capture = AudioCapture()
+    audio_seconds = 0.0
+    with SimulatedMicrophone(capture, device_blocks) as microphone:
+        time.sleep(0.2)
+        started = time.perf_counter()
+        for sentence in sentences:
+            audio_seconds += len(synthesize(sentence)) / XTTS_SAMPLE_RATE
+        wall = time.perf_counter() - started
+        time.sleep(0.2)
+    lateness = [late * 1000 for late in microphone.lateness]
+    return {"sentences_per_second": len(sentences) / wall, "audio_per_second": audio_seconds / wall,
+            "overruns": microphone.overruns, "late_ms": summarize(lateness), "blocks": len(lateness)}
+
+
+def report(name, result):
+    late = result["late_ms"]
+    print(f"  {name:<12} {result['sentences_per_second']:5.2f} sentences/s, "
+          f"{result['audio_per_second']:5.2f}s of audio/s | capture: {result['overruns']} overruns "
+          f"in {result['blocks']} blocks, late p50 {late['p50']:.1f}ms p95 {late['p95']:.1f}ms max {late['max']:.1f}ms")
+
+
+def hand_off_ms(engines, slot_seconds, requests=20):
+    """Round trip per sentence with no compute, i.e. what the process boundary costs."""
+    from src.tts_worker import TTSWorker
+    worker = TTSWorker(slots=1, slot_seconds=slot_seconds, engines=engines)
+    worker.start()
+    worker.synthesize("primary", SENTENCE, "en")
+    started = time.perf_counter()
+    for _ in range(requests):
+        worker.synthesize("primary", SENTENCE, "en")
+    elapsed = (time.perf_counter() - started) / requests * 1000
+    worker.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=12)
+    parser.add_argument("--rtf", type=float, default=0.3, help="Synthesis time per second of audio")
+    parser.add_argument("--gil-hold-ms", type=float, default=80, help="Longest stretch inference holds the GIL")
+    parser.add_argument("--device-blocks", type=int, default=2, help="Blocks the audio device buffers before overrunning")
+    args = parser.parse_args()
+
+    from src.tts_worker import TTSWorker
+    sentences = [f"{SENTENCE} Sentence {i}." for i in range(args.sentences)]
+    engines = functools.partial(StandInEngines, rtf=args.rtf, gil_hold_ms=args.gil_hold_ms)
+    audio = len(SENTENCE) * StandInEngines().seconds_per_char
+    print(f"{args.sentences} sentences of ~{audio:.1f}s audio, rtf {args.rtf}, GIL held {args.gil_hold_ms:.0f}ms "
+          f"at a time, device buffer {args.device_blocks} x {BLOCK} samples, {os.cpu_count()} cores.")
+
+    in_process = engines()
+    report("in-process", run(lambda s: in_process._infer_primary(s, "en"), sentences, args.device_blocks))
+
+    worker = TTSWorker(engines=engines)
+    worker.start()
+    report("worker", run(lambda s: worker.synthesize("primary", s, "en"), sentences, args.device_blocks))
+    worker.close()
+
+    no_compute = functools.partial(StandInEngines, rtf=0.0)
+    print(f"  Hand-off per {audio:.1f}s sentence: shared memory {hand_off_ms(no_compute, 30):.2f}ms, "
+          f"pickled through the queue {hand_off_ms(no_compute, 1):.2f}ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        crashing = functools.partial(StandInEngines, rtf=args.rtf, gil_hold_ms=args.gil_hold_ms,
+                                     crash_marker=os.path.join(directory, "crashed"))
+        worker = TTSWorker(engines=crashing)
+        worker.start()
+        normal = time.perf_counter()
+        worker.synthesize("primary", SENTENCE, "en")
+        normal = time.perf_counter() - normal
+        started = time.perf_counter()
+        worker.synthesize("primary", f"{SENTENCE} This one makes the worker crash.", "en")
+        print(f"  Worker crash: sentence answered by a restarted worker after {time.perf_counter() - started:.2f}s "
+              f"(normally {normal:.2f}s), {worker.restarts} restart")
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_vad_buffer.py
+"""
+Copies and allocations per utterance in the VAD recorder, before and after the
+switch to a preallocated PCMBuffer + encode_wav upload.
+
+"Before" replays the old pipeline: bytes per stream.read -> deque -> b"".join ->
+int16->float32 -> float32->int16 -> scipy write_wav into a BytesIO.
+"After" reads frames from the capture ring straight into a PCMBuffer and builds
+the WAV upload from it in one copy, which the Groq SDK and httpx send as is. Both
+finish by reading the upload in 64 KiB chunks, as the HTTP client does.
+
+    python -m benchmarks.bench_vad_buffer [--seconds 5] [--runs 200]
+"""
+import io
+import time
+import argparse
+import tracemalloc
+from collections import deque
+
+import numpy as np
+from scipy.io.wavfile import write as write_wav
+
+from benchmarks.common import SAMPLE_RATE
+from src.audio_capture import AudioCapture, PCMBuffer
+from src.stt_backends import encode_wav
+
+CHUNK = 480  # 30ms frames, as in SpeechToText
+UPLOAD_CHUNK = 64 * 1024
+
+
+def drain(fileobj):
+    while fileobj.read(UPLOAD_CHUNK):
+        pass
+
+
+def before(stream, n_frames, stats):
+    frames = deque()
+    for _ in range(n_frames):
+        data = stream.read(CHUNK * 2)  # PyAudio hands back a new bytes object per read
+        frames.append(data)
+    audio_data = b"".join(list(frames))
+    as_float = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
+    audio_np = as_float / 32768.0
+    scaled = audio_np * 32767
+    as_int16 = scaled.astype(np.int16)
+    wav_bytes = io.BytesIO()
+    write_wav(wav_bytes, SAMPLE_RATE, as_int16)
+    wav_bytes.seek(0)
+    drain(wav_bytes)
+
+    stats["per_frame_objects"] = n_frames
+    stats["buffers"] = [len(audio_data), as_float.nbytes, audio_np.nbytes, scaled.nbytes,
+                        as_int16.nbytes, wav_bytes.getbuffer().nbytes]
+
+
+def after(capture, n_frames, stats):
+    cursor = capture.cursor(0)
+    audio = PCMBuffer(SAMPLE_RATE * 15)
+    for _ in range(n_frames):
+        frame = audio.reserve(CHUNK)
+        cursor.readinto(frame)
+        audio.commit(CHUNK)
+    upload = encode_wav(audio.view())
+    drain(io.BytesIO(upload))
+
+    stats["per_frame_objects"] = 0
+    # Ring -> buffer (plus one per growth), then buffer -> upload
+    stats["buffers"] = [audio.length * 2] * audio.allocations + [len(upload)]
+
+
+def measure(fn, make_source, n_frames, runs):
+    stats = {}
+    fn(make_source(), n_frames, stats)  # Warm-up
+
+    elapsed = 0.0
+    for _ in range(runs):
+        source = make_source()
+        start = time.perf_counter()
+        fn(source, n_frames, stats)
+        elapsed += time.perf_counter() - start
+
+    source = make_source()
+    tracemalloc.start()
+    fn(source, n_frames, stats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / runs, peak, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Utterance length")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    n_frames = int(args.seconds * SAMPLE_RATE / CHUNK)
+    pcm = (np.random.default_rng(0).standard_normal(n_frames * CHUNK) * 3000).astype(np.int16)
+    utterance_bytes = pcm.nbytes
+
+    capture = AudioCapture(buffer_seconds=args.seconds + 1)
+    capture.write(pcm)
+
+    print(f"Utterance: {args.seconds:.1f}s, {n_frames} frames, {utterance_bytes / 1024:.0f} KiB of PCM")
+    print(f"{'':>7} {'time/utt':>10} {'peak mem':>10} {'full-size buffers':>18} {'bytes copied':>14} {'per-frame objs':>15}")
+    for name, fn, make_source in (
+        ("before", before, lambda: io.BytesIO(pcm.tobytes())),
+        ("after", after, lambda: capture),
+    ):
+        per_run, peak, stats = measure(fn, make_source, n_frames, args.runs)
+        copied = sum(stats["buffers"]) / utterance_bytes
+        print(f"{name:>7} {per_run * 1000:>8.2f}ms {peak / 1024:>8.0f}KiB "
+              f"{len(stats['buffers']):>18} {copied:>13.1f}x {stats['per_frame_objects']:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/bench_voice_server.py
+"""
+Load generator for the headless server (src/voice_server.py). At each concurrency level
+--sessions clients connect at once and, like room microphones, stream background noise
+in real time with a recorded command every few seconds, wait for the spoken answer and
+repeat --turns times. Reports end of speech -> first audio of the answer (p50/p95),
+turns per minute, how many CPU cores the server kept busy and the sessions one core
+sustains at that load.
+
+The server runs in its own process, so its CPU time is its own: VAD, routing, the agent
+loop and audio streaming for every session. Whisper and Groq are stand-ins in this
+process; XTTS and the tools are timed stand-ins in the server (one shared voice model,
+as with XTTS). Model inference is therefore not part of the CPU figures.
+
+    python -m benchmarks.bench_voice_server [--sessions 1,8,32] [--turns 3]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+
+from benchmarks.common import REPO_ROOT, SAMPLE_RATE, summarize
+from benchmarks.standins import chat_server, transcription_server
+
+CLIENT_FRAME = SAMPLE_RATE * 20 // 1000 # Clients send 20ms of audio per message
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def command_entries(corpus):
+    """The corpus' agent commands with tools, each recording used once, with its length."""
+    from benchmarks.replay import load_corpus
+    entries, recordings = [], set()
+    for entry in load_corpus(corpus, REPO_ROOT):
+        if entry.get("tools") and entry["audio"] not in recordings:
+            recordings.add(entry["audio"])
+            entry["seconds"] = len(entry["samples"]) / SAMPLE_RATE
+            entries.append(entry)
+    return entries
+
+
+def serve(args):
+    """--serve: the voice server with stand-in models, until the load generator stops it."""
+    from benchmarks.replay import replay_voice_class, replay_planner
+    from src.startup import StartupProfiler, LazyComponents
+    from src.stt_backends import create_stt_backend
+    from src.voice_server import VoiceServer
+
+    tool_names = sorted({name for entry in command_entries(args.corpus) for name in entry["tools"]})
+    components = LazyComponents(StartupProfiler())
+    components.add("stt", lambda: create_stt_backend("groq"))
+    components.add("tts", replay_voice_class(real_time_factor=args.tts_rtf))
+    components.add("agent_planner", lambda: replay_planner(tool_names, args.tool_latency))
+    VoiceServer(components, "127.0.0.1", args.port, max_sessions=args.max_sessions).run()
+
+
+async def microphone(websocket, clips, said, noise):
+    """Streams noise in real time, with each clip from `clips` mixed in as it comes."""
+    loop = asyncio.get_running_loop()
+    next_time = loop.time()
+    clip, position, offset = None, 0, 0
+    while True:
+        if clip is None and not clips.empty():
+            clip, position = clips.get_nowait(), 0
+        frame = noise[offset:offset + CLIENT_FRAME].copy()
+        offset = (offset + CLIENT_FRAME) % (len(noise) - CLIENT_FRAME)
+        if clip is not None:
+            chunk = clip[position:position + CLIENT_FRAME]
+            frame[:len(chunk)] += chunk
+            position += CLIENT_FRAME
+            if position >= len(clip):
+                clip = None
+                said["ended"] = time.perf_counter()
+        await websocket.send(np.clip(frame, -32768, 32767).astype(np.int16).tobytes())
+        next_time += CLIENT_FRAME / SAMPLE_RATE
+        await asyncio.sleep(max(0.0, next_time - loop.time()))
+
+
+async def client(url, name, entry, turns, pause, rng, latencies):
+    """One session: says the command `turns` times, timing end of speech -> first audio back."""
+    from websockets.asyncio.client import connect
+    async with connect(url) as websocket:
+        await websocket.send(json.dumps({"type": "hello", "session": name}))
+        json.loads(await websocket.recv()) # ready
+        clips, said = asyncio.Queue(), {}
+        noise = rng.normal(0, 30, SAMPLE_RATE * 2).astype(np.float32)
+        mic = asyncio.create_task(microphone(websocket, clips, said, noise))
+        try:
+            for _ in range(turns):
+                await asyncio.sleep(rng.uniform(pause / 4, pause))
+                said.clear()
+                clips.put_nowait(entry["samples"].astype(np.float32))
+                first_audio = None
+                while True:
+                    message = await websocket.recv()
+                    if isinstance(message, bytes):
+                        first_audio = first_audio or time.perf_counter()
+                    elif json.loads(message)["type"] == "turn":
+                        break
+                latencies.append(first_audio - said["ended"] if first_audio and "ended" in said else None)
+        finally:
+            mic.cancel()
+
+
+async def server_stats(url):
+    from websockets.asyncio.client import connect
+    async with connect(url) as websocket:
+        await websocket.send(json.dumps({"type": "stats"}))
+        return json.loads(await websocket.recv())
+
+
+async def run_level(url, sessions, entries, args):
+    latencies = []
+    before = await server_stats(url)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(url, f"room-{i}", entries[i % len(entries)], args.turns, args.pause,
+               np.random.default_rng(i), latencies)
+        for i in range(sessions)))
+    wall = time.perf_counter() - started
+    after = await server_stats(url)
+    answered = [latency for latency in latencies if latency is not None]
+    cores = (after["cpu_seconds"] - before["cpu_seconds"]) / wall
+    return {"sessions": sessions, "turns": len(latencies), "answered": len(answered),
+            "latency": summarize(answered) if answered else None,
+            "turns_per_minute": len(answered) / wall * 60, "cores": cores,
+            "sessions_per_core": sessions / cores if cores else None}
+
+
+def start_server(args, groq, directory):
+    port = free_port()
+    env = dict(os.environ,
+               GROQ_BASE_URL=groq.base_url, GROQ_API_KEY="standin", STT_BACKEND="groq",
+               LOCAL_INTENTS="false", # Local tools would really search the web
+               CONVERSATION_DB_PATH=os.path.join(directory, "conversation.db"), CONVERSATION_POLICY="drop",
+               TRACE_PATH="", STARTUP_PROFILE_PATH="", TTS_CACHE_DIR=os.path.join(directory, "tts_cache"))
+    command = [sys.executable, "-m", "benchmarks.bench_voice_server", "--serve", "--port", str(port),
+               "--corpus", args.corpus, "--tts-rtf", str(args.tts_rtf), "--tool-latency", str(args.tool_latency),
+               "--max-sessions", str(max(args.sessions))]
+    server = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True)
+    for line in server.stdout:
+        if "Voice server listening" in line:
+            break
+    else:
+        sys.exit("The voice server did not start.")
+    # Keep reading so the server never blocks on a full pipe
+    threading.Thread(target=server.stdout.read, daemon=True).start()
+    return server, f"ws://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,8,32", help="Concurrency levels, comma separated")
+    parser.add_argument("--turns", type=int, default=3, help="Commands per session and level")
+    parser.add_argument("--pause", type=float, default=3.0, help="Longest pause before each command")
+    parser.add_argument("--corpus", default=os.path.join(REPO_ROOT, "benchmarks", "replay_corpus.json"))
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="Whisper stand-in base latency")
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="Chat stand-in time to first token")
+    parser.add_argument("--tts-rtf", type=float, default=0.05, help="Synthesis time per second of speech")
+    parser.add_argument("--tool-latency", type=float, default=0.4, help="Upper bound of a stand-in tool call")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--max-sessions", type=int, default=32, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args)
+    args.sessions = [int(n) for n in args.sessions.split(",")]
+
+    from benchmarks.replay import make_chat_reply
+    entries = command_entries(args.corpus)
+    # Each recording has a different length, which tells the Whisper stand-in what was said
+    def transcript(audio_seconds):
+        entry = min(entries, key=lambda e: abs(e["seconds"] - audio_seconds))
+        return entry["transcript"], -0.1
+
+    groq = chat_server(latency=args.llm_latency, reply=make_chat_reply(entries))
+    groq.routes.update(transcription_server(base_latency=args.stt_latency, transcript=transcript).routes)
+    groq.start()
+    with tempfile.TemporaryDirectory() as directory:
+        server, url = start_server(args, groq, directory)
+        print(f"Voice server at {url}, {os.cpu_count()} cores on this machine; commands: "
+              + ", ".join(f"'{e['transcript']}' ({e['seconds']:.1f}s)" for e in entries))
+        try:
+            for sessions in args.sessions:
+                result = asyncio.run(run_level(url, sessions, entries, args))
+                latency = result["latency"]
+                line = (f"  {sessions:3d} sessions: {result['answered']}/{result['turns']} answered, "
+                        f"{result['turns_per_minute']:5.1f} turns/min, ")
+                if latency:
+                    line += f"end of speech -> first audio p50 {latency['p50']:.2f}s p95 {latency['p95']:.2f}s, "
+                line += f"server {result['cores']:.2f} cores busy"
+                if result["sessions_per_core"]:
+                    line += f" -> {result['sessions_per_core']:.0f} sessions per core"
+                print(line)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            groq.stop()
+
+
+if __name__ == "__main__":
+    main()
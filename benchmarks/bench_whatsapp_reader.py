@@ -0,0 +1,154 @@
+# benchmarks/bench_whatsapp_reader.py
+"""
+Cost of one reply check in a long WhatsApp chat, and replies missed, with the old
+read_latest_reply (find every incoming message element, read the last one's text,
+compare it with the last text seen) versus the IncrementalReader
+(src/agent/chat_reader.py). Runs against a fake driver that charges a WebDriver
+round-trip per call and a serialization cost per element sent back to Python.
+
+    python -m benchmarks.bench_whatsapp_reader [--sizes 100 1000 5000] [--round-trip 0.002]
+"""
+import time
+import random
+import argparse
+
+from benchmarks.common import summarize
+from src.agent.chat_reader import IncrementalReader, NEW_MESSAGES_SCRIPT
+
+
+class FakeElement:
+    def __init__(self, driver, text):
+        self._driver = driver
+        self._text = text
+
+    @property
+    def text(self):
+        self._driver.charge(1) # .text is another round-trip
+        return self._text
+
+
+class FakeChatDriver:
+    """A chat page with `rows` of [data-id, incoming, text]; only the calls the readers use."""
+    def __init__(self, round_trip, per_element):
+        self.round_trip = round_trip
+        self.per_element = per_element
+        self.rows = []
+        self.calls = 0
+        self._next_id = 0
+
+    def charge(self, elements):
+        self.calls += 1
+        time.sleep(self.round_trip + elements * self.per_element)
+
+    def add(self, incoming, text):
+        sender = "false" if incoming else "true"
+        self._next_id += 1
+        self.rows.append([f"{sender}_chat@c.us_{self._next_id:08X}", incoming, text])
+
+    def find_elements(self, by, selector):
+        incoming = [row for row in self.rows if row[1]]
+        self.charge(len(incoming))
+        return [FakeElement(self, row[2]) for row in incoming]
+
+    def execute_script(self, script, cursor):
+        # What NEW_MESSAGES_SCRIPT does in the page, only the new rows are serialized
+        assert script == NEW_MESSAGES_SCRIPT
+        start, found = 0, cursor is None
+        for i in range(len(self.rows) - 1, -1, -1):
+            if cursor is not None and self.rows[i][0] == cursor:
+                start, found = i + 1, True
+                break
+        messages = [list(row) for row in self.rows[start:]]
+        self.charge(len(messages))
+        return {"found": found, "messages": messages}
+
+
+class OldReader:
+    """The previous read_latest_reply, with its module-level last_seen_message."""
+    def __init__(self, driver):
+        self.driver = driver
+        self.last_seen = ""
+
+    def read(self):
+        elements = self.driver.find_elements("css selector", ".message-in .copyable-text")
+        if not elements:
+            return []
+        text = elements[-1].text
+        if text != self.last_seen:
+            self.last_seen = text
+            return [text]
+        return []
+
+
+class NewReader:
+    def __init__(self, driver):
+        self.reader = IncrementalReader(driver)
+        self.reader.prime()
+
+    def read(self):
+        return [m.text for m in self.reader.read_new()]
+
+
+def fill(driver, size, rng):
+    for i in range(size):
+        driver.add(rng.random() < 0.5, f"history {i}")
+
+
+def poll_cost(reader_class, size, args):
+    driver = FakeChatDriver(args.round_trip, args.per_element)
+    fill(driver, size, random.Random(size))
+    reader = reader_class(driver)
+    times = []
+    for i in range(args.polls):
+        if i % 2:
+            driver.add(True, f"new {i}") # Every other poll finds a reply
+        start = time.perf_counter()
+        reader.read()
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def missed(reader_class, args):
+    """Replies arrive in bursts of 1-4 between polls, a fifth of them repeat the previous text."""
+    rng = random.Random(args.seed)
+    driver = FakeChatDriver(0, 0)
+    fill(driver, 50, rng)
+    reader = reader_class(driver)
+    sent, received, previous = 0, 0, "hi"
+    for _ in range(args.bursts):
+        for _ in range(rng.randint(1, 4)):
+            previous = previous if rng.random() < 0.2 else f"reply {sent}"
+            driver.add(True, previous)
+            sent += 1
+        received += len(reader.read())
+        driver.add(False, "our answer")
+        reader.read()
+    return sent, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--round-trip", type=float, default=0.002, help="Seconds per WebDriver call")
+    parser.add_argument("--per-element", type=float, default=0.00002, help="Seconds per element returned")
+    parser.add_argument("--bursts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"One reply check, {args.round_trip * 1000:.1f}ms per WebDriver call + "
+          f"{args.per_element * 1e6:.0f}us per element returned")
+    for size in args.sizes:
+        old = poll_cost(OldReader, size, args)
+        new = poll_cost(NewReader, size, args)
+        print(f"  {size:>6} messages: rescan p50 {old['p50'] * 1000:7.1f}ms | "
+              f"incremental p50 {new['p50'] * 1000:5.1f}ms")
+
+    print(f"{args.bursts} bursts of replies between polls")
+    for label, reader_class in (("rescan", OldReader), ("incremental", NewReader)):
+        sent, received = missed(reader_class, args)
+        print(f"  {label:>11}: {received}/{sent} replies read, {sent - received} missed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/common.py (Shared helpers for the benchmark scripts)
+import os
+import sys
+import math
+import time
+import wave
+import threading
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+SAMPLE_RATE = 16000
+
+
+def load_wav_16k(path):
+    """Loads a 16-bit WAV file as mono 16kHz int16 samples (simple downmix + decimation)."""
+    import numpy as np
+    with wave.open(path, "rb") as wav:
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != SAMPLE_RATE:
+        if rate % SAMPLE_RATE:
+            raise ValueError(f"Cannot decimate {rate}Hz audio to {SAMPLE_RATE}Hz.")
+        step = rate // SAMPLE_RATE
+        samples = samples[: len(samples) // step * step].reshape(-1, step).mean(axis=1).astype(np.int16)
+    return samples
+
+
+def feed_realtime(capture, samples, chunk=480, speed=1.0):
+    """Writes samples into an AudioCapture in 30ms chunks, paced like a live microphone."""
+    interval = chunk / SAMPLE_RATE / speed
+    next_time = time.perf_counter()
+    for start in range(0, len(samples), chunk):
+        capture.write(samples[start:start + chunk])
+        next_time += interval
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def start_feeder(capture, samples, **kwargs):
+    thread = threading.Thread(target=feed_realtime, args=(capture, samples), kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "p50": statistics.median(values) if values else 0.0,
+        "p95": percentile(values, 95),
+        "max": max(values) if values else 0.0,
+    }
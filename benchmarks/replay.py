@@ -0,0 +1,250 @@
+# benchmarks/replay.py (File-backed audio in, null audio out: the assistant loop without hardware)
+"""
+Pieces for running the real pipeline classes offline, used by bench_replay:
+
+- FileAudioSource plays recordings into an AudioCapture like a microphone in a quiet
+  room, each prefixed by a wake tone.
+- WakeTone stands in for the Porcupine engine inside WakeWordDetector and "hears" the
+  wake word when that tone ends, as Porcupine fires at the end of the keyword.
+- NullAudioSink is an output stream that takes as long as the audio written to it.
+- ReplayVoice is LocalTTS with XTTS/Piper replaced by timed silence, playing into
+  NullAudioSinks.
+- make_chat_reply and replay_planner play the model and the agent's tools for a corpus.
+"""
+import re
+import json
+import time
+import queue
+import random
+import threading
+
+import numpy as np
+
+from benchmarks.common import SAMPLE_RATE, load_wav_16k
+from benchmarks.standins import tool_call
+
+FRAME = 480 # 30ms at 16kHz
+TONE_HZ = 1000
+TONE_SECONDS = 0.4
+MODEL = "llama3-70b-8192"
+SCHEMA = {"type": "object", "properties": {"query": {"type": "string"}}}
+
+
+def trim_silence(samples, keep_ms=300):
+    """The recording from just before its first speech to just after its last."""
+    import webrtcvad
+    vad = webrtcvad.Vad(3)
+    speech = [start for start in range(0, len(samples) - FRAME, FRAME)
+              if vad.is_speech(samples[start:start + FRAME].tobytes(), SAMPLE_RATE)]
+    if not speech:
+        return samples
+    keep = keep_ms * SAMPLE_RATE // 1000
+    return samples[max(0, speech[0] - keep):speech[-1] + FRAME + keep]
+
+
+def load_corpus(path, audio_dir):
+    """The corpus entries, each with its trimmed 16kHz recording under "samples"."""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    recordings = {}
+    for entry in entries:
+        name = entry["audio"]
+        if name not in recordings:
+            recordings[name] = trim_silence(load_wav_16k(f"{audio_dir}/{name}"))
+        entry["samples"] = recordings[name]
+    return entries
+
+
+def make_chat_reply(entries):
+    """The stand-in model: corrections repeat the transcript, the agent follows the corpus."""
+    by_transcript = {entry["transcript"]: entry for entry in entries}
+
+    def reply(messages):
+        correction = re.search(r'.*Messy: "(.*)"\s*Corrected:\s*$', messages[-1]["content"] or "", re.S)
+        if correction:
+            return correction.group(1)
+        user_text = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+        entry = by_transcript.get(user_text, {})
+        answer = entry.get("answer", "I'm not sure.")
+        if messages[-1]["role"] == "tool" or not entry.get("tools"):
+            return answer
+        return {"content": "", "tool_calls": [tool_call(f"call_{i}", name, query=user_text)
+                                              for i, name in enumerate(entry["tools"])]}
+    return reply
+
+
+def replay_planner(tool_names, tool_latency=0.4, seed=7):
+    """AgentPlanner without LangChain: only its async agent, with stand-in tools taking up to `tool_latency`."""
+    from src.agent.agent_planner import AgentPlanner, AGENT_SYSTEM_PROMPT
+    from src.agent.async_agent import AsyncToolAgent, ToolSpec
+
+    rng = random.Random(seed)
+
+    def stand_in_tool(name):
+        def run(query):
+            time.sleep(rng.uniform(tool_latency / 4, tool_latency))
+            return f"Stand-in {name} result for {query}."
+        return ToolSpec(name, run, {"type": "function", "function": {"name": name, "parameters": SCHEMA}}, 10)
+
+    class ReplayPlanner(AgentPlanner):
+        def __init__(self, specs):
+            self.async_agent = AsyncToolAgent(AGENT_SYSTEM_PROMPT, specs, MODEL)
+
+    return ReplayPlanner([stand_in_tool(name) for name in tool_names])
+
+
+def wake_tone(seconds=TONE_SECONDS, amplitude=6000):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * TONE_HZ * t)).astype(np.int16)
+
+
+class FileAudioSource:
+    """
+    Writes into an AudioCapture in real time (divided by `speed`), 30ms at a time: low
+    noise, or the next clip queued with say(). `speech_ended` is the perf_counter() when
+    the last clip's final sample went in.
+    """
+    def __init__(self, capture, speed=1.0, noise=30, seed=0):
+        self.capture = capture
+        self.speed = speed
+        self.noise = noise
+        self.speech_ended = None
+        self.samples_written = 0
+        self._clips = queue.Queue()
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._rng = np.random.default_rng(seed)
+
+    def say(self, samples, wake=True, lead_in=0.3, pause=0.2):
+        """Queues a wake tone (optional), `pause` seconds of quiet and the recording, and returns at once."""
+        parts = [np.zeros(int(SAMPLE_RATE * lead_in), dtype=np.int16)]
+        if wake:
+            parts += [wake_tone(), np.zeros(int(SAMPLE_RATE * pause), dtype=np.int16)]
+        self._done.clear()
+        self._clips.put(np.concatenate(parts + [samples]))
+
+    def wait_until_said(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _run(self):
+        clip, position = None, 0
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            if clip is None and not self._clips.empty():
+                clip, position = self._clips.get(), 0
+            frame = self._rng.normal(0, self.noise, FRAME)
+            if clip is not None:
+                chunk = clip[position:position + FRAME]
+                frame[:len(chunk)] += chunk
+                position += FRAME
+                if position >= len(clip):
+                    clip = None
+                    self.speech_ended = time.perf_counter()
+                    self._done.set()
+            self.capture.write(np.clip(frame, -32768, 32767).astype(np.int16))
+            self.samples_written += FRAME
+            next_time += FRAME / SAMPLE_RATE / self.speed
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def start(self):
+        threading.Thread(target=self._run, name="file-audio", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+class WakeTone:
+    """Porcupine's interface (frame_length, sample_rate, process, delete), detecting the wake tone."""
+    frame_length = 512
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self, min_seconds=0.25):
+        self.min_frames = int(min_seconds * SAMPLE_RATE / self.frame_length)
+        t = np.arange(self.frame_length) / SAMPLE_RATE
+        self._probe = np.exp(-2j * np.pi * TONE_HZ * t)
+        self._tone_frames = 0
+
+    def process(self, pcm):
+        frame = np.asarray(pcm, dtype=np.float32)
+        energy = float(np.dot(frame, frame)) + 1e-9
+        # Share of the frame's energy at the tone frequency
+        tone = abs(np.dot(frame, self._probe)) ** 2 * 2 / len(frame) / energy
+        if tone > 0.6:
+            self._tone_frames += 1
+            return -1
+        heard = self._tone_frames >= self.min_frames
+        self._tone_frames = 0
+        return 0 if heard else -1
+
+    def delete(self):
+        pass
+
+
+class NullAudioSink:
+    """sounddevice.OutputStream stand-in: takes as long as the audio written, at `speed`."""
+    def __init__(self, sample_rate, speed=1.0, on_write=None):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.on_write = on_write
+        self.samples = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, block):
+        if self.on_write:
+            self.on_write()
+        self.samples += len(block)
+        time.sleep(len(block) / self.sample_rate / self.speed)
+
+    def abort(self):
+        pass
+
+
+def replay_voice_class(speed=1.0, seconds_per_char=0.065, real_time_factor=0.3):
+    """
+    LocalTTS whose voices are timed silence: synthesis takes `real_time_factor` x the audio
+    length, one sentence at a time per model as with the real ones.
+    """
+    from src.local_tts import LocalTTS, XTTS_SAMPLE_RATE
+
+    class ReplayVoice(LocalTTS):
+        def __init__(self):
+            self.primary_voice = object()
+            self.feedback_voice = object()
+            self.feedback_sample_rate = 22050
+            self.last_time_to_first_audio = None
+            self.last_interrupt_to_silence = None
+            self.on_playback = []
+            self._interrupt = threading.Event()
+            self._interrupted_at = None
+            self._primary_lock = threading.Lock()
+            self._feedback_lock = threading.Lock()
+            self.first_audio_at = None # perf_counter() of the first block played since reset
+            self.audio_seconds = 0.0
+
+        def _heard(self):
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+
+        def _silence(self, text, sample_rate, dtype, lock):
+            seconds = len(text) * seconds_per_char
+            with lock:
+                time.sleep(seconds * real_time_factor) # Compute, so not sped up like the audio
+            self.audio_seconds += seconds
+            return np.zeros(int(seconds * sample_rate), dtype=dtype)
+
+        def _synthesize_primary(self, sentence, language):
+            return self._silence(sentence, XTTS_SAMPLE_RATE, np.float32, self._primary_lock)
+
+        def _synthesize_feedback(self, text):
+            return self._silence(text, self.feedback_sample_rate, np.int16, self._feedback_lock)
+
+        def _open_output_stream(self, sample_rate=XTTS_SAMPLE_RATE, dtype="float32"):
+            return NullAudioSink(sample_rate, speed, on_write=self._heard)
+
+    return ReplayVoice
@@ -0,0 +1,289 @@
+# benchmarks/standins.py (Local stand-ins for the cloud APIs used by the assistant)
+import re
+import json
+import time
+import threading
+import socketserver
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    A tiny HTTP server that answers like one of our cloud APIs. Routes map a path to
+    a handler `fn(request_handler, body) -> (status, payload)`. The server counts the
+    TCP connections it accepts so benchmarks can check connection reuse.
+    """
+    daemon_threads = True
+
+    def __init__(self, routes, host="127.0.0.1", port=0):
+        self.routes = routes
+        self.connections_opened = 0
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        super().__init__((host, port), _StandinHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections_opened += 1
+        return request
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # Otherwise small keep-alive responses stall on delayed ACKs
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        handler = self.server.routes.get(self.path)
+        if handler is None:
+            self._send_json(404, {"error": {"message": f"No stand-in route for {self.path}"}})
+            return
+        with self.server._lock:
+            self.server.requests_served += 1
+        status, payload = handler(self, body)
+        if payload is not None:
+            self._send_json(status, payload)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def transcription_server(base_latency=0.3, seconds_per_audio_second=0.15, sample_rate=16000, transcript=None):
+    """
+    Stand-in for Groq's Whisper endpoint. Latency grows with the length of the uploaded
+    audio, like the real API, and the returned text says how much audio it received.
+    `transcript(audio_seconds) -> (text, avg_logprob)` supplies the result instead,
+    e.g. the known transcript of a replayed recording.
+    """
+    def transcribe(request, body):
+        audio_seconds = max(0, len(body) - 44) / (2 * sample_rate)  # Multipart overhead is negligible
+        time.sleep(base_latency + seconds_per_audio_second * audio_seconds)
+        text, avg_logprob = transcript(audio_seconds) if transcript else (f"[{audio_seconds:.1f}s of speech]", -0.2)
+        return 200, {
+            "text": text,
+            "segments": [{"start": 0.0, "end": audio_seconds, "avg_logprob": avg_logprob, "no_speech_prob": 0.01}],
+        }
+
+    return StandinServer({"/openai/v1/audio/transcriptions": transcribe})
+
+
+def _chat_completion_payload(model, content):
+    # `content` is the reply text, or a full assistant message dict (e.g. with "tool_calls")
+    message = {"role": "assistant", **content} if isinstance(content, dict) else {"role": "assistant", "content": content}
+    return {
+        "id": "chatcmpl-standin",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk_payload(model, delta, finish_reason=None):
+    return {
+        "id": "chatcmpl-standin",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def _stream_completion(request, model, content, seconds_per_token):
+    """Sends the reply as server-sent events, one word-sized token every `seconds_per_token`."""
+    request.send_response(200)
+    request.send_header("Content-Type", "text/event-stream")
+    request.send_header("Transfer-Encoding", "chunked")
+    request.end_headers()
+
+    def send(data):
+        request.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        request.wfile.flush()
+
+    def event(payload):
+        send(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    message = content if isinstance(content, dict) else {"content": content}
+    event(_chunk_payload(model, {"role": "assistant", "content": ""}))
+    for token in re.findall(r"\s*\S+", message.get("content") or ""):
+        time.sleep(seconds_per_token)
+        event(_chunk_payload(model, {"content": token}))
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        event(_chunk_payload(model, {"tool_calls": [{"index": i, **call} for i, call in enumerate(tool_calls)]}))
+    event(_chunk_payload(model, {}, "tool_calls" if tool_calls else "stop"))
+    send(b"data: [DONE]\n\n")
+    send(b"")
+
+
+def chat_server(latency=0.05, reply=None, fail_first=0, seconds_per_prompt_char=0.0, seconds_per_token=0.0):
+    """
+    Stand-in for Groq's chat completions endpoint. `reply(messages)` picks the answer,
+    as text or as an assistant message dict (default: echo the last message). The next `server.failures_left` requests
+    get a 503, to exercise retries. `seconds_per_prompt_char` makes long prompts slower,
+    like prompt processing on the real model, and `seconds_per_token` is the generation
+    speed. Requests with "stream": true get the answer token by token.
+    """
+    server = StandinServer({})
+    server.failures_left = fail_first
+
+    def complete(request, body):
+        with server._lock:
+            failing = server.failures_left > 0
+            if failing:
+                server.failures_left -= 1
+        if failing:
+            return 503, {"error": {"message": "stand-in overloaded", "type": "server_error"}}
+        payload = json.loads(body or b"{}")
+        messages = payload.get("messages", [])
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        time.sleep(latency + seconds_per_prompt_char * prompt_chars)
+        content = reply(messages) if reply else (messages[-1].get("content") if messages else "")
+        model = payload.get("model", "standin")
+        if payload.get("stream"):
+            _stream_completion(request, model, content, seconds_per_token)
+            return 200, None
+        text = content.get("content") if isinstance(content, dict) else content
+        time.sleep(seconds_per_token * len(re.findall(r"\S+", text or "")))
+        return 200, _chat_completion_payload(model, content)
+
+    server.routes["/openai/v1/chat/completions"] = complete
+    return server
+
+
+def search_server(latency=0.4):
+    """Stand-in for Tavily's /search endpoint. Counts searches in `server.searches`."""
+    server = StandinServer({})
+    server.searches = 0
+
+    def search(request, body):
+        query = json.loads(body or b"{}").get("query", "")
+        with server._lock:
+            server.searches += 1
+        time.sleep(latency)
+        results = [{"title": f"Result {i} for {query}", "url": f"https://example.com/{i}",
+                    "content": f"Stand-in result {i} about {query}.", "score": 1.0 - i / 10} for i in range(3)]
+        return 200, {"query": query, "results": results, "response_time": latency}
+
+    server.routes["/search"] = search
+    return server
+
+
+def tool_call(call_id, name, **arguments):
+    """One entry of an assistant message's "tool_calls", for stand-in replies."""
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+class SMTPStandin(socketserver.ThreadingTCPServer):
+    """
+    A minimal plain-text SMTP server (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, QUIT).
+    `connect_delay` stands in for the TLS handshake and `login_delay` for AUTH on a real
+    server. With `drop_after` set, it hangs up after that many messages per connection.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay=0.15, login_delay=0.1, drop_after=None, host="127.0.0.1", port=0):
+        self.connect_delay = connect_delay
+        self.login_delay = login_delay
+        self.drop_after = drop_after
+        self.connections_opened = 0
+        self.logins = 0
+        self.messages = []
+        self._lock = threading.Lock()
+        super().__init__((host, port), _SMTPHandler)
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, *lines):
+        self.wfile.write("".join(line + "\r\n" for line in lines).encode("ascii"))
+
+    def _read_line(self):
+        return self.rfile.readline().decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        server = self.server
+        with server._lock:
+            server.connections_opened += 1
+        time.sleep(server.connect_delay)
+        self._reply("220 standin ESMTP")
+        delivered = 0
+        while True:
+            line = self._read_line()
+            if not line:
+                return
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-standin", "250-AUTH PLAIN LOGIN", "250 SIZE 10485760")
+            elif verb == "AUTH":
+                parts = line.split()
+                if parts[1].upper() == "LOGIN":
+                    self._reply("334 VXNlcm5hbWU6")
+                    self._read_line()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self._read_line()
+                elif len(parts) == 2: # PLAIN without an initial response
+                    self._reply("334 ")
+                    self._read_line()
+                time.sleep(server.login_delay)
+                with server._lock:
+                    server.logins += 1
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data_line := self._read_line()) != ".":
+                    lines.append(data_line)
+                with server._lock:
+                    server.messages.append("\n".join(lines))
+                self._reply("250 2.0.0 Queued")
+                delivered += 1
+                if server.drop_after and delivered >= server.drop_after:
+                    return # Hang up without QUIT, like a server timing the connection out
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            else:
+                self._reply("502 Command not implemented")
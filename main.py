@@ -1,159 +1,213 @@
-# main.py
-import threading
-import time
-from src.gui import StatusGUI
-from src.wake_word import WakeWordDetector
-from src.speech_to_text import SpeechToText
-from src.local_tts import LocalTTS
-from src.command_router import route_command
-from src.agent.agent_planner import AgentPlanner, correct_transcription_with_llm
-from src.state_manager import StateManager
-
-
-# --- Global flag to signal all background threads to stop ---
-stop_assistant = threading.Event()
-
-from src.agent.whatsapp_desktop_tool import start_whatsapp_desktop_session, send_whatsapp_message, read_latest_reply
-from src.agent.agent_planner import generate_flirty_reply
-
-def run_flirting_session(contact_name: str, gui):
-    """
-    The main loop for the autonomous WhatsApp flirting agent, now using the DESKTOP APP.
-    """
-    gui.update_status(f"Entering Flirt Mode with {contact_name} via Desktop App...", "purple")
-    
-    # Use the new desktop session starter
-    main_window = start_whatsapp_desktop_session(contact_name)
-    if not main_window:
-        gui.update_status(f"Failed to start WhatsApp Desktop session with {contact_name}.", "red")
-        return
-
-    flirt_history = []
-
-    gui.update_status(f"Thinking of an opening line for {contact_name}...", "cyan")
-    first_message = generate_flirty_reply([])
-    
-    # Use the new desktop message sender
-    if send_whatsapp_message(main_window, first_message):
-        flirt_history.append({"role": "agent", "text": first_message})
-    else:
-        gui.update_status(f"Failed to send initial message to {contact_name}.", "red")
-        return
-    
-    gui.update_status(f"Message sent. Now waiting for a reply from {contact_name}...", "cyan")
-
-    # The main listening loop for replies
-    while not stop_assistant.is_set():
-        # Use the new desktop message reader
-        reply = read_latest_reply(main_window)
-        
-        if reply:
-            gui.update_status(f"New reply from {contact_name}: '{reply}'", "green")
-            flirt_history.append({"role": "girlfriend", "text": reply})
-            
-            gui.update_status("Thinking of a clever reply...", "cyan")
-            new_message = generate_flirty_reply(flirt_history)
-            
-            if send_whatsapp_message(main_window, new_message):
-                flirt_history.append({"role": "agent", "text": new_message})
-                gui.update_status(f"Reply sent. Waiting for the next response...", "cyan")
-            else:
-                gui.update_status(f"Failed to send reply to {contact_name}.", "red")
-
-        time.sleep(15)
-
-    print("Exiting Flirt Mode.")
-    
-def assistant_thread_logic(gui):
-    """
-    This function contains the main logic of the assistant.
-    It listens for commands and decides which action to take.
-    """
-    print("Initializing Assistant components in background thread...")
-    try:
-        wake_word_path = "src\Wakanda_en_windows_v3_0_0.ppn" # <-- CHANGE THIS IF YOURS IS DIFFERENT
-        wake_word_detector = WakeWordDetector(keyword_path=wake_word_path)
-        stt = SpeechToText(model_size="small")
-        tts = LocalTTS()
-        agent_planner = AgentPlanner()
-        state_manager = StateManager()
-    except Exception as e:
-        print(f"FATAL: Could not initialize assistant components. Error: {e}")
-        gui.update_status(f"Initialization Failed: {e}", "red")
-        return
-
-    # --- This is the main command loop, running in the background ---
-    while not stop_assistant.is_set():
-        try:
-            gui.update_status("Idle. Listening for wake word...", "blue")
-            wake_word_detector.wait_for_wake_word()
-
-            if stop_assistant.is_set(): break
-
-            gui.update_status("Wake word detected! Listening...", "orange")
-            tts.speak_feedback("Yes?")
-            
-            raw_user_text = stt.listen_and_transcribe()
-            user_text = correct_transcription_with_llm(raw_user_text)
-
-            if not user_text:
-                continue
-
-            # Route the command to the appropriate handler
-            action_result = route_command(user_text)
-
-            # --- DECISION LOGIC ---
-            # 1. Check if we need to enter the special "Flirt Mode"
-            if isinstance(action_result, tuple) and action_result[0] == "FLIRT_MODE":
-                contact_name = action_result[1]
-                # This call will block until the session is ended by the user closing the GUI
-                run_flirting_session(contact_name, gui)
-                # After the session ends, we go back to the top of the loop
-                continue
-
-            # 2. Check if we need to call the general-purpose AI agent
-            elif action_result == "AGENT":
-                state_manager.add_message("user", user_text)
-                gui.update_status(f"Thinking about: '{user_text}'", "purple")
-                final_response = agent_planner.run_agent(user_text, state_manager.get_history())
-                state_manager.add_message("assistant", final_response)
-                gui.update_status(f"Responding...", "green")
-                tts.speak_primary(final_response)
-
-            # 3. Handle simple, fast-path commands
-            else:
-                gui.update_status(f"Executing: '{user_text}'", "green")
-                final_response = action_result
-                tts.speak_primary(final_response)
-
-        except Exception as e:
-            print(f"An error occurred in the assistant loop: {e}")
-            gui.update_status(f"Error: {e}", "red")
-            if 'tts' in locals():
-                tts.speak_feedback("I have run into an unexpected error.")
-            time.sleep(2)
-
-    print("Assistant thread has stopped.")
-
-
-if __name__ == "__main__":
-    print("Initializing TAM-VA...")
-    
-    # Initialize the GUI in the main thread
-    gui = StatusGUI()
-
-    # Create and start the assistant logic in a background thread
-    assistant_thread = threading.Thread(target=assistant_thread_logic, args=(gui,))
-    assistant_thread.start()
-
-    # Run the GUI's mainloop in the main thread.
-    gui.run()
-
-    # After the GUI window is closed, signal the assistant thread to stop
-    print("GUI closed. Signaling assistant thread to stop...")
-    stop_assistant.set()
-
-    # Wait for the background thread to finish its current task and exit cleanly
-    assistant_thread.join()
-
+# main.py
+import threading
+import time
+from src.startup import StartupProfiler, LazyComponents
+from src.async_runner import AsyncRunner
+from src.agent.reply_poller import StopEvent
+from src.tracing import tracer
+
+# Everything below is timed, heavy modules (torch, TTS, LangChain, pywinauto) are only
+# imported by the component that needs them, on a background thread.
+profiler = StartupProfiler()
+with profiler.step("import gui"):
+    from src.gui import StatusGUI
+with profiler.step("import audio capture + wake word"):
+    from src.audio_capture import AudioCapture
+    from src.wake_word import WakeWordDetector
+    from src.barge_in import BargeInMonitor
+with profiler.step("import command router"):
+    from src.command_router import FAST_PATH_REPLIES
+with profiler.step("import groq helpers"):
+    from src.agent.agent_planner import generate_flirty_reply
+with profiler.step("import intent classifier"):
+    from src.config import LOCAL_INTENTS, STT_PREROLL_MS, FLIRT_BACKEND
+    from src.agent.intent_classifier import IntentClassifier
+with profiler.step("import voice turn"):
+    from src.voice_turn import VoiceTurn
+with profiler.step("import local_tts phrases"):
+    from src.local_tts import WAKE_ACKNOWLEDGEMENT, UNEXPECTED_ERROR_MESSAGE
+
+
+# --- Global flag to signal all background threads to stop ---
+stop_assistant = StopEvent()
+
+# Event loop for async agent turns
+agent_runner = AsyncRunner("agent")
+
+# Flirt sessions run as tasks on their own loop, so the assistant keeps listening meanwhile
+flirt_runner = AsyncRunner("flirt")
+
+def start_components(capture, gui):
+    """
+    Starts building every component that the wake word does not depend on, concurrently.
+    The command loop waits for each one only when it first needs it.
+    """
+    components = LazyComponents(profiler)
+
+    def build_stt():
+        with profiler.step("import speech_to_text"):
+            from src.speech_to_text import SpeechToText
+        return SpeechToText(model_size="small", capture=capture)
+
+    def build_tts():
+        from src.local_tts import LocalTTS # torch/TTS/piper are imported inside, timed as part of init
+        tts = LocalTTS()
+        # Fill the speech cache in the background so fixed phrases play instantly
+        threading.Thread(target=tts.prewarm, args=(FAST_PATH_REPLIES.values(),), daemon=True).start()
+        return tts
+
+    def build_agent():
+        from src.agent.agent_planner import AgentPlanner
+        return AgentPlanner()
+
+    def build_state_manager():
+        from src.state_manager import StateManager
+        return StateManager()
+
+    def build_flirt_sessions():
+        from src.agent.flirt_sessions import FlirtSessionManager
+        if FLIRT_BACKEND == "web":
+            from src.agent.whatsapp_tool import WhatsAppWebBackend
+            backend = WhatsAppWebBackend()
+        else:
+            from src.agent.whatsapp_desktop_tool import WhatsAppDesktopBackend
+            backend = WhatsAppDesktopBackend()
+        # Each web chat has its own browser, so their calls may overlap; the desktop app's may not
+        return FlirtSessionManager(backend, generate_flirty_reply, flirt_runner, stop_assistant,
+                                   on_status=gui.update_status, backend_workers=backend.max_sessions)
+
+    components.add("stt", build_stt)
+    components.add("tts", build_tts)
+    if LOCAL_INTENTS:
+        components.add("intent_classifier", IntentClassifier)
+    components.add("agent_planner", build_agent)
+    components.add("state_manager", build_state_manager)
+    components.add("flirt_sessions", build_flirt_sessions)
+
+    def on_failure(name, error):
+        gui.update_status(f"Initialization Failed: {name}: {error}", "red")
+        # No command can be heard or answered without these, the others only cost a feature
+        if name in ("stt", "state_manager"):
+            print(f"FATAL: Could not initialize {name}, stopping the assistant.")
+            stop_assistant.set()
+    components.report_when_ready(on_failure)
+    return components
+
+def watch_email_outbox(gui, components):
+    """Shows the delivery result of each queued email and notes it in the conversation."""
+    from src.agent.email_outbox import get_outbox
+
+    def on_status(item):
+        if item.status == "sent":
+            gui.update_status(f"Email sent to {item.recipient}.", "green")
+            note = f"(The email to {item.recipient} was delivered.)"
+        else:
+            gui.update_status(f"Email to {item.recipient} failed: {item.error}", "red")
+            note = f"(The email to {item.recipient} could not be sent: {item.error})"
+        # So the agent can answer "did my mail go out?"
+        if components.ready("state_manager"):
+            components.get("state_manager").add_message("assistant", note)
+
+    get_outbox().listeners.append(on_status)
+
+def assistant_thread_logic(gui):
+    """
+    This function contains the main logic of the assistant.
+    It listens for commands and decides which action to take.
+    """
+    print("Initializing Assistant components in background thread...")
+    try:
+        wake_word_path = "src\Wakanda_en_windows_v3_0_0.ppn" # <-- CHANGE THIS IF YOURS IS DIFFERENT
+        # One always-open microphone stream shared by the wake word detector and STT
+        with profiler.step("init audio capture"):
+            capture = AudioCapture()
+            capture.start()
+        components = start_components(capture, gui)
+        watch_email_outbox(gui, components)
+        with profiler.step("init wake word"):
+            wake_word_detector = WakeWordDetector(keyword_path=wake_word_path, capture=capture)
+        # Keeps listening while the assistant speaks, so the user can cut an answer short
+        barge_in = BargeInMonitor(capture, wake_word_detector)
+
+        def on_event(kind, **fields):
+            if kind == "status":
+                gui.update_status(fields["message"], fields["color"])
+        voice_turn = VoiceTurn(components, agent_runner, stop_assistant, barge_in, on_event)
+    except Exception as e:
+        print(f"FATAL: Could not initialize assistant components. Error: {e}")
+        gui.update_status(f"Initialization Failed: {e}", "red")
+        return
+
+    # Capture position where the user talked over the last answer, None to wait for the wake word
+    barge_position = None
+
+    # --- This is the main command loop, running in the background ---
+    while not stop_assistant.is_set():
+        try:
+            if barge_position is None:
+                gui.update_status("Idle. Listening for wake word...", "blue")
+                if not wake_word_detector.wait_for_wake_word(stop_event=stop_assistant):
+                    break
+
+                gui.update_status("Wake word detected! Listening...", "orange")
+                tracer.start_turn()
+                # How far behind the live audio the wake word was caught
+                tracer.record("wake word", (capture.position - wake_word_detector.detected_at) / capture.RATE)
+                # Don't hold up listening for the acknowledgement if the voices are still loading
+                if components.ready("tts"):
+                    with tracer.span("acknowledgement"):
+                        components.get("tts").speak_feedback(WAKE_ACKNOWLEDGEMENT)
+                    # Start after "Yes?", so our own voice coming back through the mic isn't transcribed
+                    listen_from, preroll_ms = capture.position, 0
+                else:
+                    # Start from just before the wake word so nothing said right after it is lost
+                    listen_from, preroll_ms = wake_word_detector.detected_at, STT_PREROLL_MS
+            else:
+                # The user interrupted the last answer, what they said is the next command
+                gui.update_status("Interrupted! Listening...", "orange")
+                tracer.start_turn()
+                listen_from, barge_position, preroll_ms = barge_position, None, STT_PREROLL_MS
+            barge_position = voice_turn.run(listen_from, preroll_ms)
+
+        except Exception as e:
+            if stop_assistant.is_set():
+                break # E.g. a fatal initialization failure, which is already on the GUI
+            print(f"An error occurred in the assistant loop: {e}")
+            gui.update_status(f"Error: {e}", "red")
+            if components.ready("tts"):
+                components.get("tts").speak_feedback(UNEXPECTED_ERROR_MESSAGE)
+            time.sleep(2)
+        finally:
+            turn = tracer.end_turn()
+            if turn is not None:
+                print(turn.summary())
+
+    capture.close()
+    if components.ready("flirt_sessions"):
+        components.get("flirt_sessions").close()
+    flirt_runner.stop()
+    agent_runner.stop()
+    print("Assistant thread has stopped.")
+
+
+if __name__ == "__main__":
+    print("Initializing TAM-VA...")
+    
+    # Initialize the GUI in the main thread
+    gui = StatusGUI()
+
+    # Create and start the assistant logic in a background thread
+    assistant_thread = threading.Thread(target=assistant_thread_logic, args=(gui,))
+    assistant_thread.start()
+
+    # Run the GUI's mainloop in the main thread.
+    gui.run()
+
+    # After the GUI window is closed, signal the assistant thread to stop
+    print("GUI closed. Signaling assistant thread to stop...")
+    stop_assistant.set()
+
+    # Wait for the background thread to finish its current task and exit cleanly
+    assistant_thread.join()
+
     print("Application has been shut down successfully.")
\ No newline at end of file
@@ -0,0 +1,173 @@
+# src/agent/async_agent.py (Async tool-calling loop: concurrent tool calls with per-tool deadlines)
+import json
+import time
+import asyncio
+import threading
+from typing import Callable, NamedTuple
+from src import llm_client
+from src.config import AGENT_MAX_STEPS
+from src.tracing import tracer
+
+
+class _Function(NamedTuple):
+    name: str
+    arguments: str
+
+
+class _ToolCall(NamedTuple):
+    """A tool call put together from streamed deltas, shaped like the SDK's."""
+    id: str
+    function: _Function
+
+
+class ToolSpec(NamedTuple):
+    name: str
+    func: Callable # Plain synchronous function, run on a worker thread
+    schema: dict # OpenAI-style {"type": "function", "function": {...}} definition
+    timeout: float # Seconds before the call is abandoned
+
+
+def tool_spec(langchain_tool, timeout):
+    """A ToolSpec for one of the LangChain @tool objects in src/agent/tools.py."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return ToolSpec(langchain_tool.name, langchain_tool.func, convert_to_openai_tool(langchain_tool), timeout)
+
+
+def _resolve(future, result, error):
+    if not future.done(): # Already cancelled or timed out
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+def _run_in_thread(func, arguments):
+    """
+    Runs a blocking tool on its own daemon thread. Unlike the loop's default executor,
+    a hung tool then never holds up shutting the loop down or exiting the process.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def target():
+        try:
+            outcome = (func(**arguments), None)
+        except Exception as e:
+            outcome = (None, e)
+        try:
+            loop.call_soon_threadsafe(_resolve, future, *outcome)
+        except RuntimeError:
+            pass # The loop is gone, nobody is waiting any more
+
+    threading.Thread(target=target, name=f"tool-{getattr(func, '__name__', 'call')}", daemon=True).start()
+    return future
+
+
+async def call_tool(spec, arguments):
+    """
+    Runs one tool call with its deadline. A tool that times out keeps running on its
+    thread (threads can't be killed), but nothing waits for it any more.
+    Errors come back as text, so the model can react to them like the sync agent does.
+    """
+    with tracer.span(f"tool {spec.name}"):
+        try:
+            result = await asyncio.wait_for(_run_in_thread(spec.func, arguments), spec.timeout)
+            return str(result)
+        except asyncio.TimeoutError:
+            print(f"Tool '{spec.name}' timed out after {spec.timeout:.0f}s.")
+            return f"Error: {spec.name} did not finish within {spec.timeout:.0f} seconds."
+        except Exception as e:
+            return f"Error: {spec.name} failed: {e}"
+
+
+async def dispatch_tool_calls(tool_calls, specs):
+    """Runs all tool calls of one model step concurrently. Results keep the order of the calls."""
+    async def run(call):
+        spec = specs.get(call.function.name)
+        if spec is None:
+            return f"Error: there is no tool named '{call.function.name}'."
+        try:
+            arguments = json.loads(call.function.arguments or "{}")
+        except json.JSONDecodeError as e:
+            return f"Error: invalid arguments for {spec.name}: {e}"
+        return await call_tool(spec, arguments)
+    return await asyncio.gather(*(run(call) for call in tool_calls))
+
+
+class AsyncToolAgent:
+    """
+    The agent's reasoning loop on asyncio: ask the model, run the tool calls it asks for
+    (all of them at once), feed the results back, repeat until it answers in text.
+    Cancelling the task cancels the model request and every pending tool wait.
+    """
+    def __init__(self, system_prompt, specs, model, max_steps=AGENT_MAX_STEPS, temperature=0):
+        self.system_prompt = system_prompt
+        self.specs = {spec.name: spec for spec in specs}
+        self.tools = [spec.schema for spec in specs]
+        self.model = model
+        self.max_steps = max_steps
+        self.temperature = temperature
+
+    def _messages(self, user_input, chat_history):
+        return [{"role": "system", "content": self.system_prompt}, *chat_history,
+                {"role": "user", "content": user_input}]
+
+    async def _run_tools(self, messages, content, tool_calls):
+        """Records the model's tool calls, runs them and appends their results to `messages`."""
+        messages.append({
+            "role": "assistant",
+            "content": content or "",
+            "tool_calls": [{"id": call.id, "type": "function",
+                            "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                           for call in tool_calls],
+        })
+        print(f"Running tools concurrently: {[call.function.name for call in tool_calls]}")
+        results = await dispatch_tool_calls(tool_calls, self.specs)
+        for call, result in zip(tool_calls, results):
+            messages.append({"role": "tool", "tool_call_id": call.id, "content": result})
+
+    async def run(self, user_input, chat_history):
+        messages = self._messages(user_input, chat_history)
+        for _ in range(self.max_steps):
+            with tracer.span("llm"):
+                response = await llm_client.achat_completion(
+                    messages, self.model, tools=self.tools, temperature=self.temperature)
+            message = response.choices[0].message
+            if not message.tool_calls:
+                return message.content or ""
+            await self._run_tools(messages, message.content, message.tool_calls)
+        return "I couldn't finish that in a reasonable number of steps."
+
+    async def stream(self, user_input, chat_history):
+        """
+        run, streamed: yields the answer's text as the model writes it. Steps that call
+        tools are read to the end before the tools run; text the model writes before a
+        tool call ("Let me check.") is yielded too.
+        """
+        messages = self._messages(user_input, chat_history)
+        for _ in range(self.max_steps):
+            content, calls = [], {}
+            step_started = time.perf_counter()
+            async for chunk in llm_client.astream_chat_completion(
+                    messages, self.model, tools=self.tools, temperature=self.temperature):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                for call in delta.tool_calls or ():
+                    # Deltas of one call share its index, the id and name come first
+                    parts = calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                    parts["id"] = call.id or parts["id"]
+                    if call.function is not None:
+                        parts["name"] += call.function.name or ""
+                        parts["arguments"] += call.function.arguments or ""
+                if delta.content:
+                    content.append(delta.content)
+                    yield delta.content
+            # Not a span: the context can't be held open across the yields
+            tracer.record("llm", time.perf_counter() - step_started, start=step_started)
+            if not calls:
+                return
+            tool_calls = [_ToolCall(parts["id"], _Function(parts["name"], parts["arguments"]))
+                          for _, parts in sorted(calls.items())]
+            await self._run_tools(messages, "".join(content), tool_calls)
+        yield "I couldn't finish that in a reasonable number of steps."
@@ -0,0 +1,104 @@
+# src/agent/chat_reader.py (Incremental reading of a WhatsApp Web chat)
+from collections import deque
+from typing import NamedTuple
+
+# Returns the messages after the cursor (a message row's data-id) in one round-trip.
+# The cursor is searched from the end, so the work done depends on how many messages
+# are new, not on how long the chat is.
+NEW_MESSAGES_SCRIPT = """
+var cursor = arguments[0];
+var rows = document.querySelectorAll("#main div[data-id]");
+var start = 0, found = !cursor;
+if (cursor) {
+    for (var i = rows.length - 1; i >= 0; i--) {
+        if (rows[i].getAttribute("data-id") === cursor) { start = i + 1; found = true; break; }
+    }
+}
+var messages = [];
+for (var j = start; j < rows.length; j++) {
+    var id = rows[j].getAttribute("data-id");
+    var text = rows[j].querySelector(".copyable-text .selectable-text");
+    messages.push([id, id.indexOf("false_") === 0, text ? text.innerText : ""]);
+}
+return {found: found, messages: messages};
+"""
+
+# Resolves with true once an incoming message is in the chat after the cursor, or with
+# false after arguments[1] ms. A MutationObserver on #main wakes it, so nothing runs while
+# the chat is quiet. Rows added later are compared with the newest row at the start,
+# which stays in the DOM even when the cursor row has scrolled out.
+WAIT_FOR_INCOMING_SCRIPT = """
+var cursor = arguments[0], done = arguments[arguments.length - 1];
+var main = document.querySelector("#main");
+if (!main) { done(false); return; }
+function incomingAfter(mark) { // null when `mark` is not in the DOM
+    var rows = main.querySelectorAll("div[data-id]"), incoming = false;
+    for (var i = rows.length - 1; i >= 0; i--) {
+        var id = rows[i].getAttribute("data-id");
+        if (id === mark) return incoming;
+        if (id.indexOf("false_") === 0) incoming = true;
+    }
+    return null;
+}
+if (incomingAfter(cursor) === true) { done(true); return; }
+var rows = main.querySelectorAll("div[data-id]");
+var newest = rows.length ? rows[rows.length - 1].getAttribute("data-id") : null;
+var timer, observer = new MutationObserver(function () {
+    if (incomingAfter(newest) === true) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(main, {childList: true, subtree: true});
+timer = setTimeout(function () { observer.disconnect(); done(false); }, arguments[1]);
+"""
+
+
+class ChatMessage(NamedTuple):
+    id: str # WhatsApp's data-id, unique per message
+    incoming: bool
+    text: str
+
+
+class IncrementalReader:
+    """
+    Reads a chat incrementally: remembers the data-id of the last message it handled
+    and asks the page only for messages after it. Every new incoming message is
+    returned once, so bursts and repeated texts ("haha", "haha") are not lost.
+    """
+    def __init__(self, driver, remember=500):
+        self.driver = driver
+        self.cursor = None
+        self._seen = deque(maxlen=remember) # Recent ids, in case the cursor row scrolls out of the DOM
+        self._seen_ids = set()
+        self.round_trips = 0
+
+    def _fetch(self):
+        self.round_trips += 1
+        result = self.driver.execute_script(NEW_MESSAGES_SCRIPT, self.cursor)
+        messages = [ChatMessage(*row) for row in result["messages"]]
+        if not result["found"]:
+            messages = [m for m in messages if m.id not in self._seen_ids]
+        for message in messages:
+            if len(self._seen) == self._seen.maxlen:
+                self._seen_ids.discard(self._seen[0])
+            self._seen.append(message.id)
+            self._seen_ids.add(message.id)
+        if messages:
+            self.cursor = messages[-1].id
+        return messages
+
+    def prime(self):
+        """Moves the cursor to the newest message without returning anything."""
+        self.cursor = None
+        self._fetch()
+
+    def read_new(self):
+        """New incoming messages since the last call, oldest first."""
+        return [m for m in self._fetch() if m.incoming and m.text]
+
+    def wait_for_incoming(self, timeout):
+        """
+        Blocks until an incoming message is in the chat after the cursor (True) or for
+        `timeout` seconds (False). Nothing is read, call read_new() next. The driver runs
+        no other command meanwhile.
+        """
+        self.driver.set_script_timeout(timeout + 5)
+        return bool(self.driver.execute_async_script(WAIT_FOR_INCOMING_SCRIPT, self.cursor, int(timeout * 1000)))
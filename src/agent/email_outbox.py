@@ -0,0 +1,178 @@
+# src/agent/email_outbox.py (Background email sending over one kept-alive SMTP connection)
+import time
+import queue
+import smtplib
+import itertools
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from src.config import (SENDER_EMAIL, SENDER_APP_PASSWORD, SMTP_HOST, SMTP_PORT, SMTP_SSL,
+                        OUTBOX_BATCH_SIZE, OUTBOX_IDLE_SECONDS, OUTBOX_MAX_ATTEMPTS)
+
+# SMTP errors after which a fresh connection is worth a try
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+
+
+class OutboxItem:
+    """One queued email and what happened to it."""
+    _ids = itertools.count(1)
+
+    def __init__(self, recipient, subject, body):
+        self.id = next(self._ids)
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.status = "queued" # -> "sent" or "failed"
+        self.error = None
+        self.attempts = 0
+        self.queued_at = time.perf_counter()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    @property
+    def latency(self):
+        """Seconds from enqueue to delivery (or failure), None while still queued."""
+        return self.finished_at - self.queued_at if self.finished_at else None
+
+
+class EmailOutbox:
+    """
+    send_email only puts the message in this outbox and returns. A background thread
+    keeps one logged-in SMTP connection open, sends whatever is queued in batches over
+    it, reconnects when the server drops it and closes it after a quiet spell.
+    Every delivery or failure is passed to the functions in `listeners`.
+    """
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, use_ssl=SMTP_SSL, username=SENDER_EMAIL,
+                 password=SENDER_APP_PASSWORD, batch_size=OUTBOX_BATCH_SIZE,
+                 idle_seconds=OUTBOX_IDLE_SECONDS, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.max_attempts = max_attempts
+        self.listeners = []
+        self.connections_opened = 0
+        self._queue = queue.Queue()
+        self._connection = None
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, recipient, subject, body):
+        """Queues an email and returns its OutboxItem straight away."""
+        item = OutboxItem(recipient, subject, body)
+        self._queue.put(item)
+        return item
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        connection = smtp_class(self.host, self.port, timeout=30)
+        try:
+            connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self.connections_opened += 1
+        return connection
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                self._connection.close()
+            self._connection = None
+
+    def _message(self, item):
+        message = MIMEMultipart()
+        message["From"] = self.username
+        message["To"] = item.recipient
+        message["Subject"] = item.subject
+        message.attach(MIMEText(item.body, "plain"))
+        return message
+
+    def _send(self, item):
+        while True:
+            item.attempts += 1
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                self._connection.send_message(self._message(item))
+                self._finish(item, "sent")
+                return
+            except smtplib.SMTPAuthenticationError as e:
+                self._disconnect()
+                self._finish(item, "failed", e) # Retrying with the same password won't help
+                return
+            except _CONNECTION_ERRORS as e:
+                error = e
+            except smtplib.SMTPException as e:
+                self._finish(item, "failed", e) # Rejected recipient etc., the connection is still fine
+                return
+            except OSError as e: # Socket errors (SMTPException is an OSError too, hence the order)
+                error = e
+
+            self._connection = None
+            if item.attempts >= self.max_attempts:
+                self._finish(item, "failed", error)
+                return
+            print(f"Email connection lost ({error}), reconnecting...")
+            if item.attempts > 1: # A dropped idle connection is normal, only back off when reconnecting fails too
+                time.sleep(min(5.0, 0.5 * 2 ** (item.attempts - 2)))
+
+    def _finish(self, item, status, error=None):
+        item.status = status
+        item.error = error
+        item.finished_at = time.perf_counter()
+        item.done.set()
+        if error is not None:
+            print(f"Failed to send email to {item.recipient}: {error}")
+        for listener in self.listeners:
+            try:
+                listener(item)
+            except Exception as e:
+                print(f"Email status listener failed: {e}")
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                first = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                self._disconnect() # Quiet for a while, don't hold the server's connection
+                continue
+            if first is None:
+                break
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stopping = True
+                    break
+                batch.append(item)
+            for item in batch:
+                self._send(item)
+        self._disconnect()
+
+    def close(self, timeout=None):
+        """Sends what is already queued, then stops the sender."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """The process-wide outbox, started on first use."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = EmailOutbox()
+        return _outbox
@@ -0,0 +1,189 @@
+# src/agent/flirt_sessions.py (Many WhatsApp flirt sessions on one event loop)
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.conversation_store import estimate_tokens
+from src.agent.reply_poller import ReplyPoller
+from src.config import FLIRT_HISTORY_TOKENS, FLIRT_MAX_CONCURRENT_REPLIES, FLIRT_PUSH_CHECK_SECONDS
+
+
+class FlirtHistory:
+    """A chat's recent messages, the oldest dropped once they exceed `token_budget`."""
+    def __init__(self, token_budget=FLIRT_HISTORY_TOKENS):
+        self.token_budget = token_budget
+        self.tokens = 0
+        self.dropped = 0
+        self._turns = deque()
+
+    def add(self, role, text):
+        tokens = estimate_tokens(text)
+        self._turns.append((role, text, tokens))
+        self.tokens += tokens
+        while len(self._turns) > 1 and self.tokens > self.token_budget:
+            _, _, old_tokens = self._turns.popleft()
+            self.tokens -= old_tokens
+            self.dropped += 1
+
+    def turns(self):
+        """The window in the format generate_flirty_reply expects."""
+        return [{"role": role, "text": text} for role, text, _ in self._turns]
+
+    def __len__(self):
+        return len(self._turns)
+
+
+class FlirtSession:
+    """One contact's state: its history, reply poller and future."""
+    def __init__(self, contact, history, poller):
+        self.contact = contact
+        self.history = history
+        self.poller = poller
+        self.sent = 0
+        self.received = 0
+        self.answer_latencies = deque(maxlen=200) # Reply seen -> our answer sent
+        self.future = None
+        self.task = None
+
+    @property
+    def running(self):
+        return self.future is not None and not self.future.done()
+
+
+class FlirtSessionManager:
+    """
+    Runs a flirt session per contact as a task on one event loop (an AsyncRunner), so
+    starting one returns at once and the voice loop keeps listening. Each session
+    polls its chat through its own ReplyPoller and keeps its own FlirtHistory.
+
+    The backend does the messaging: open_chat(contact) -> bool, send(contact, text)
+    -> bool and read_new(contact) -> list of new incoming texts. A backend that can
+    tell when a message arrives also has watch(contact, callback); its sessions then
+    poll in push mode, checking the chat when called back and otherwise only every
+    `push_check_interval` seconds. A backend with a
+    `max_sessions` attribute limits how many sessions run at once, and one with
+    close_chat(contact) is told when a session ends. Backend calls run on
+    `backend_workers` threads (keep 1 for UI automation, which drives one chat at a
+    time) and replies are generated on `reply_workers` threads, so quiet sessions
+    only cost a timer each.
+    """
+    def __init__(self, backend, generate_reply, runner, stop_event, on_status=None, backend_workers=1,
+                 reply_workers=FLIRT_MAX_CONCURRENT_REPLIES, history_tokens=FLIRT_HISTORY_TOKENS,
+                 push_check_interval=FLIRT_PUSH_CHECK_SECONDS, **poller_options):
+        self.backend = backend
+        self.generate_reply = generate_reply
+        self.runner = runner
+        self.stop_event = stop_event
+        self.on_status = on_status
+        self.history_tokens = history_tokens
+        self.push_check_interval = push_check_interval
+        self.poller_options = poller_options
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self._backend_pool = ThreadPoolExecutor(backend_workers, thread_name_prefix="flirt-backend")
+        self._reply_pool = ThreadPoolExecutor(reply_workers, thread_name_prefix="flirt-reply")
+
+    def _status(self, message, color):
+        print(message)
+        if self.on_status:
+            self.on_status(message, color)
+
+    async def _call(self, pool, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+    async def _answer(self, session):
+        message = await self._call(self._reply_pool, self.generate_reply, session.history.turns())
+        if not await self._call(self._backend_pool, self.backend.send, session.contact, message):
+            self._status(f"Failed to send a message to {session.contact}.", "red")
+            return False
+        session.history.add("agent", message)
+        session.sent += 1
+        session.poller.activity()
+        return True
+
+    async def _run(self, session):
+        contact = session.contact
+        session.task = asyncio.current_task()
+        try:
+            if not await self._call(self._backend_pool, self.backend.open_chat, contact):
+                self._status(f"Failed to open the WhatsApp chat with {contact}.", "red")
+                return
+            if not await self._answer(session):
+                return
+            self._status(f"Message sent. Now waiting for a reply from {contact}...", "cyan")
+            while True:
+                replies = await session.poller.wait_for_reply_async()
+                if replies is None:
+                    break
+                seen_at = time.perf_counter()
+                for text in replies:
+                    session.history.add("girlfriend", text)
+                session.received += len(replies)
+                self._status(f"New reply from {contact}: '{replies[-1]}'", "green")
+                if await self._answer(session):
+                    session.answer_latencies.append(time.perf_counter() - seen_at)
+        except Exception as e:
+            self._status(f"Flirt session with {contact} failed: {e}", "red")
+        finally:
+            close_chat = getattr(self.backend, "close_chat", None)
+            if close_chat:
+                try:
+                    await self._call(self._backend_pool, close_chat, contact)
+                except Exception as e:
+                    print(f"Could not close the chat with {contact}: {e}")
+            print(f"Flirt session with {contact} ended. {session.poller.report()}")
+
+    def start(self, contact):
+        """
+        Starts a session with `contact` in the background. False if one is already running,
+        or if the backend's max_sessions are (see active() to tell which).
+        """
+        with self._lock:
+            session = self.sessions.get(contact)
+            if session is not None and session.running:
+                return False
+            limit = getattr(self.backend, "max_sessions", None)
+            if limit is not None and sum(s.running for s in self.sessions.values()) >= limit:
+                return False
+            read_new = lambda: self._call(self._backend_pool, self.backend.read_new, contact)
+            watch = getattr(self.backend, "watch", None)
+            options = self.poller_options
+            if watch:
+                options = dict(options, push=True, max_interval=self.push_check_interval)
+            poller = ReplyPoller(read_new, self.stop_event, **options)
+            if watch:
+                watch(contact, poller.notify)
+            session = self.sessions[contact] = FlirtSession(contact, FlirtHistory(self.history_tokens), poller)
+            session.future = self.runner.submit(self._run(session))
+            return True
+
+    def stop(self, contact):
+        """Ends the session with `contact`, False if there was none."""
+        with self._lock:
+            session = self.sessions.get(contact)
+        if session is None or not session.running:
+            return False
+        session.future.cancel()
+        return True
+
+    async def _cancel_all(self):
+        with self._lock:
+            tasks = [session.task for session in self.sessions.values() if session.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop_all(self):
+        """Ends every session and waits until they have wound down."""
+        self.runner.run(self._cancel_all())
+
+    def active(self):
+        """Contacts whose session is still running."""
+        with self._lock:
+            return [contact for contact, session in self.sessions.items() if session.running]
+
+    def close(self):
+        self.stop_all()
+        self._backend_pool.shutdown(wait=False, cancel_futures=True)
+        self._reply_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,180 @@
+# src/agent/intent_classifier.py (On-device tool picker in front of the LLM agent)
+import re
+import math
+import time
+import threading
+from collections import Counter, deque
+from typing import NamedTuple
+import numpy as np
+from src.config import INTENT_CONFIDENCE_THRESHOLD, INTENT_MARGIN
+
+# Example utterances for the tools in src/agent/tools.py. "AGENT" collects requests that
+# need the LLM (conversation, multi-step work), so they have somewhere to land other than a tool.
+TOOL_EXAMPLES = {
+    "open_application": [
+        "open notepad", "open chrome", "open the calculator", "launch chrome", "start notepad",
+        "please open notepad", "can you open chrome", "open chrome for parthiban", "launch the browser",
+        "open my browser", "fire up chrome", "start the calculator app", "open notepad for me",
+        "bring up notepad", "run calculator", "open google chrome",
+    ],
+    "search_web": [
+        "search for weather today", "search the web for python tutorials", "look up the news",
+        "google the latest cricket score", "what is the weather in chennai", "find information about black holes",
+        "search for the best pizza near me", "who won the match yesterday", "look up the price of bitcoin",
+        "what's the latest news on ai", "search online for flight tickets", "find out who is the president of india",
+        "what is the population of japan", "search for restaurants nearby",
+    ],
+    "send_email": [
+        "send a mail to aswin", "send an email to my boss", "email aswin that i am sick",
+        "write an email to parthiban", "compose a mail to the team", "send a mail saying i will be late",
+        "mail my professor about the assignment", "draft an email to hr",
+    ],
+    "AGENT": [
+        "how are you", "tell me a joke", "what can you do", "who are you", "thank you",
+        "yes send it", "no don't send it", "confirm", "let's talk", "what did i just say",
+        "help me plan my day", "explain quantum computing to me", "good morning", "what's your name",
+        "write a poem about the sea", "summarize our conversation",
+    ],
+}
+
+# Tools that must always go through the agent. A local tool's result is spoken as is, so
+# only tools that answer in a sentence qualify: email needs a draft-and-confirm round and
+# search results need the LLM to turn them into an answer.
+AGENT_ONLY_TOOLS = {"AGENT", "send_email", "search_web"}
+
+_OPEN_PREFIX = re.compile(r"^(?:please |can you |could you )?(?:open|launch|start|run|fire up|bring up)\s+(?:up\s+)?")
+_APP_FILLER = {"the", "my", "app", "application", "up", "for", "me", "please", "google"}
+_APP_ALIASES = {"browser": "chrome", "calc": "calculator", "googlechrome": "chrome"}
+# What open_application can start (KNOWN_APPLICATIONS in tools.py, not imported here to keep LangChain off startup)
+_KNOWN_APPS = {"chrome", "notepad", "calculator"}
+
+
+def _open_application_args(text):
+    rest = _OPEN_PREFIX.sub("", text)
+    if rest == text:
+        return None
+    app_part, _, profile = rest.partition(" for ")
+    words = [w for w in app_part.split() if w not in _APP_FILLER]
+    if not words or len(words) > 2:
+        return None # Nothing or several things to open, let the agent sort it out
+    app_name = "".join(words) # "note pad" -> "notepad"
+    app_name = _APP_ALIASES.get(app_name, app_name)
+    if app_name not in _KNOWN_APPS:
+        return None # "start the meeting notes" is not an app, let the agent work out what was meant
+    args = {"app_name": app_name}
+    profile = profile.strip()
+    if profile and profile != "me":
+        args["profile_name"] = profile
+    return args
+
+# Turn the utterance into tool arguments, or None if the arguments aren't clear
+ARGUMENT_EXTRACTORS = {
+    "open_application": _open_application_args,
+}
+
+
+def _normalize(text):
+    return " ".join(re.findall(r"[a-z0-9&']+", text.lower()))
+
+
+def _char_ngrams(text, sizes=(2, 3, 4)):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1))
+
+
+class ToolPrediction(NamedTuple):
+    tool: str
+    args: dict
+    confidence: float
+
+
+class IntentClassifier:
+    """
+    Nearest-neighbour search over character n-gram TF-IDF vectors of the example
+    utterances. Character n-grams cope with transcription slips ("note pad", "notpad")
+    and the whole lookup is one small matrix-vector product, well under a millisecond.
+
+    predict() returns a ToolPrediction only when the best tool is clearly ahead and its
+    arguments can be read off the utterance; otherwise the agent handles the request.
+    """
+    def __init__(self, examples=TOOL_EXAMPLES, threshold=INTENT_CONFIDENCE_THRESHOLD, margin=INTENT_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+        texts, labels = [], []
+        for tool, utterances in examples.items():
+            for utterance in utterances:
+                texts.append(_normalize(utterance))
+                labels.append(tool)
+        self.tools = sorted(set(labels))
+        self.labels = np.array([self.tools.index(label) for label in labels])
+
+        counts = [_char_ngrams(text) for text in texts]
+        document_frequency = Counter(gram for c in counts for gram in c)
+        self.vocabulary = {gram: i for i, gram in enumerate(sorted(document_frequency))}
+        self.idf = np.array([math.log((1 + len(texts)) / (1 + document_frequency[g])) + 1 for g in sorted(document_frequency)])
+        self.matrix = np.vstack([self._vectorize_counts(c) for c in counts])
+
+        self._lock = threading.Lock()
+        self.local = 0
+        self.delegated = 0
+        self.latencies = deque(maxlen=1000)
+
+    def _vectorize_counts(self, counts):
+        vector = np.zeros(len(self.vocabulary))
+        for gram, count in counts.items():
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                vector[index] = (1 + math.log(count)) * self.idf[index]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def scores(self, text):
+        """Best cosine similarity per tool, as {tool: score}."""
+        similarities = self.matrix @ self._vectorize_counts(_char_ngrams(_normalize(text)))
+        best = np.full(len(self.tools), -1.0)
+        np.maximum.at(best, self.labels, similarities)
+        return dict(zip(self.tools, best.tolist()))
+
+    def classify(self, text):
+        """The best tool and its confidence margin, without the argument or threshold checks."""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        (tool, score), (_, runner_up) = ranked[0], ranked[1]
+        return tool, score, score - runner_up
+
+    def predict(self, text):
+        """Returns a ToolPrediction to run locally, or None if the agent should handle it."""
+        started = time.perf_counter()
+        tool, score, lead = self.classify(text)
+        prediction = None
+        if tool not in AGENT_ONLY_TOOLS and score >= self.threshold and lead >= self.margin:
+            args = ARGUMENT_EXTRACTORS[tool](_normalize(text))
+            if args is not None:
+                prediction = ToolPrediction(tool, args, score)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.latencies.append(elapsed)
+            if prediction:
+                self.local += 1
+            else:
+                self.delegated += 1
+        return prediction
+
+    def report(self):
+        with self._lock:
+            total = self.local + self.delegated
+            latencies = sorted(self.latencies)
+        if not total:
+            return "No requests classified yet."
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        return (f"Handled locally {self.local / total:.0%} ({self.local}/{total}), "
+                f"classifier p50 {p50:.2f}ms, p95 {p95:.2f}ms.")
+
+
+def run_tool(prediction):
+    """Invokes the predicted tool from src/agent/tools.py and returns its text result."""
+    from src.agent.tools import all_tools
+    tool = next(t for t in all_tools if t.name == prediction.tool)
+    print(f"Running '{prediction.tool}' locally with {prediction.args} (confidence {prediction.confidence:.2f})")
+    return tool.invoke(prediction.args)
@@ -0,0 +1,185 @@
+# src/agent/reply_poller.py (Adaptive, wakeable polling for chat replies)
+import time
+import asyncio
+import threading
+from collections import deque
+from src.config import FLIRT_POLL_MIN_SECONDS, FLIRT_POLL_MAX_SECONDS, FLIRT_POLL_BACKOFF
+
+
+class StopEvent(threading.Event):
+    """A threading.Event that also wakes every poller waiting on it the moment it is set."""
+    def __init__(self):
+        super().__init__()
+        self._listeners = set()
+        self._listeners_lock = threading.Lock()
+
+    def subscribe(self, wake_event):
+        with self._listeners_lock:
+            self._listeners.add(wake_event)
+
+    def unsubscribe(self, wake_event):
+        with self._listeners_lock:
+            self._listeners.discard(wake_event)
+
+    def set(self):
+        super().set()
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for wake_event in listeners:
+            wake_event.set()
+
+
+class _LoopWake:
+    """An asyncio.Event that any thread can set, so StopEvent and notify() can wake a task."""
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def set(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError: # The loop has closed, nobody is waiting any more
+            pass
+
+
+class ReplyPoller:
+    """
+    Decides when to look for a new reply. Right after a message is sent or received the
+    chat is checked every `min_interval` seconds; while it stays quiet the interval grows
+    by `backoff` up to `max_interval`. In push mode the backend calls notify() when
+    something arrives and polling only runs every `max_interval` as a safety net.
+    Setting the stop event (or calling notify) ends the current wait at once.
+    wait_for_reply_async does the same from an asyncio task, with an async read_reply.
+    """
+    def __init__(self, read_reply, stop_event, min_interval=FLIRT_POLL_MIN_SECONDS,
+                 max_interval=FLIRT_POLL_MAX_SECONDS, backoff=FLIRT_POLL_BACKOFF, push=False):
+        self.read_reply = read_reply
+        self.stop_event = stop_event
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.push = push
+        self.interval = min_interval
+        self._wake = threading.Event()
+        self._loop_wake = None # Set while wait_for_reply_async runs
+        self._notified_at = None
+        self.polls = 0
+        self.started = time.monotonic()
+        self.detection_latencies = deque(maxlen=500)
+
+    def activity(self):
+        """Call after sending a message: a reply is likely soon, so check often again."""
+        self.interval = self.min_interval
+
+    def notify(self):
+        """Push mode entry point: the backend saw a new message."""
+        if self._notified_at is None:
+            self._notified_at = time.monotonic()
+        self._wake.set()
+        loop_wake = self._loop_wake
+        if loop_wake is not None:
+            loop_wake.set()
+
+    def _wait(self, timeout):
+        if hasattr(self.stop_event, "subscribe"):
+            self._wake.wait(timeout)
+        else:
+            # A plain Event can't wake us, so check it a few times a second
+            deadline = time.monotonic() + timeout
+            while not self._wake.is_set() and not self.stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wake.wait(min(0.25, remaining))
+        self._wake.clear()
+
+    def wait_for_reply(self):
+        """Blocks until read_reply() returns something (which is returned), or None once stopped."""
+        subscribe = getattr(self.stop_event, "subscribe", None)
+        if subscribe:
+            subscribe(self._wake)
+        try:
+            previous_poll = time.monotonic()
+            while not self.stop_event.is_set():
+                self._wait(self.max_interval if self.push else self.interval)
+                if self.stop_event.is_set():
+                    break
+                now = time.monotonic()
+                reply = self.read_reply()
+                if self._polled(reply, now, previous_poll):
+                    return reply
+                previous_poll = now
+            return None
+        finally:
+            if subscribe:
+                self.stop_event.unsubscribe(self._wake)
+
+    async def _wait_async(self, wake, timeout):
+        if hasattr(self.stop_event, "subscribe"):
+            try:
+                await asyncio.wait_for(wake.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            # As in _wait, a plain Event is checked a few times a second
+            deadline = time.monotonic() + timeout
+            while not wake.event.is_set() and not self.stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(wake.event.wait(), min(0.25, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        wake.event.clear()
+
+    async def wait_for_reply_async(self):
+        """wait_for_reply for a task on an event loop: awaits read_reply(); stop it with the stop event or by cancelling."""
+        wake = self._loop_wake = _LoopWake(asyncio.get_running_loop())
+        if self._wake.is_set(): # Notified while no one was waiting
+            self._wake.clear()
+            wake.event.set()
+        subscribe = getattr(self.stop_event, "subscribe", None)
+        if subscribe:
+            subscribe(wake)
+        try:
+            previous_poll = time.monotonic()
+            while not self.stop_event.is_set():
+                await self._wait_async(wake, self.max_interval if self.push else self.interval)
+                if self.stop_event.is_set():
+                    break
+                now = time.monotonic()
+                reply = await self.read_reply()
+                if self._polled(reply, now, previous_poll):
+                    return reply
+                previous_poll = now
+            return None
+        finally:
+            self._loop_wake = None
+            if subscribe:
+                self.stop_event.unsubscribe(wake)
+
+    def _polled(self, reply, now, previous_poll):
+        """Records one poll and adjusts the interval, True if it found a reply."""
+        self.polls += 1
+        if reply:
+            # With a notification the arrival time is known, otherwise it is somewhere
+            # after the previous poll, so the latency recorded is an upper bound
+            arrived = self._notified_at if self._notified_at is not None else previous_poll
+            self.detection_latencies.append(now - arrived)
+            self._notified_at = None
+            self.interval = self.min_interval
+            return True
+        self._notified_at = None
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+        return False
+
+    def polls_per_hour(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return self.polls * 3600 / elapsed
+
+    def report(self):
+        latencies = sorted(self.detection_latencies)
+        detection = (f"reply detection p50 {latencies[len(latencies) // 2]:.1f}s, "
+                     f"max {latencies[-1]:.1f}s" if latencies else "no replies yet")
+        return f"{self.polls} polls ({self.polls_per_hour():.0f}/hour), {detection}."
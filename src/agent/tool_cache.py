@@ -0,0 +1,116 @@
+# src/agent/tool_cache.py (TTL result cache with in-flight deduplication for agent tools)
+import re
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Every cache created by cached_tool, by tool name, so their counters can be reported together
+CACHES = {}
+
+
+def normalize_argument(value):
+    """Case, spacing and trailing punctuation don't change a search: "Weather today?" == "weather  today"."""
+    if isinstance(value, str):
+        return re.sub(r"[\s.,;:!?]+$", "", " ".join(value.lower().split()))
+    return value
+
+
+class ToolResultCache:
+    """
+    Results keyed by normalized arguments, reused for `ttl` seconds and evicted least
+    recently used beyond `max_items`. While a call is running, identical calls wait for
+    its result instead of starting their own. Failures are never cached.
+    """
+    def __init__(self, ttl, max_items):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._entries = OrderedDict() # key -> (expires_at, result)
+        self._in_flight = {} # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_call(self, key, call):
+        owner = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                future = self._in_flight[key] = Future()
+                owner = True
+        if not owner:
+            return future.result() # Another thread is already making this call
+
+        try:
+            result = call()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "size": len(self._entries)}
+
+
+def cached_tool(ttl, max_items=128):
+    """
+    Decorator for the function behind an agent tool. Put it under @tool so LangChain
+    still sees the original signature and docstring:
+
+        @tool
+        @cached_tool(ttl=300)
+        def search_web(query: str) -> str: ...
+    """
+    def decorator(func):
+        cache = ToolResultCache(ttl, max_items)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((name, normalize_argument(value)) for name, value in bound.arguments.items())
+            return cache.get_or_call(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        CACHES[func.__name__] = cache
+        return wrapper
+    return decorator
+
+
+def report():
+    """One line of counters per cached tool."""
+    lines = []
+    for name, cache in CACHES.items():
+        s = cache.stats()
+        lookups = s["hits"] + s["misses"] + s["coalesced"]
+        rate = (s["hits"] + s["coalesced"]) / lookups if lookups else 0.0
+        lines.append(f"{name}: {s['hits']} hits, {s['coalesced']} coalesced, {s['misses']} misses "
+                     f"({rate:.0%} served without a call), {s['size']} cached")
+    return "\n".join(lines)
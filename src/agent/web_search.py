@@ -0,0 +1,22 @@
+# src/agent/web_search.py (Tavily web search through one shared client)
+import threading
+from src.config import TAVILY_API_KEY, TAVILY_BASE_URL
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_client():
+    """The process-wide TavilyClient, created on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            from tavily import TavilyClient
+            _client = TavilyClient(api_key=TAVILY_API_KEY, api_base_url=TAVILY_BASE_URL)
+        return _client
+
+
+def tavily_search(query, max_results=3):
+    """Top results as [{"url": ..., "content": ...}], the same shape TavilySearchResults returned."""
+    response = get_client().search(query, max_results=max_results)
+    return [{"url": r.get("url"), "content": r.get("content")} for r in response.get("results", [])]
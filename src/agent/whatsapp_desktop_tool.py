@@ -1,88 +1,180 @@
-# src/agent/whatsapp_desktop_tool.py (Revised with Correct Path Handling)
-from pywinauto.application import Application
-from pywinauto.findwindows import ElementNotFoundError
-import time
-import re # Import the regular expression library
-
-# Global variable to store the last seen message
-last_seen_message = ""
-
-def start_whatsapp_desktop_session(contact_name: str):
-    """
-    Starts or connects to the WhatsApp desktop app and navigates to a specific chat.
-    """
-    print(f"Starting WhatsApp Desktop session for contact: '{contact_name}'")
-    try:
-        app = Application(backend="uia").connect(title_re="WhatsApp.*", timeout=10)
-        main_window = app.window(title_re="WhatsApp.*")
-        print("Connected to existing WhatsApp window.")
-    except ElementNotFoundError:
-        print("WhatsApp not found running. Starting the application...")
-        
-        # ========================== THIS IS THE FIX ==========================
-        # You MUST replace the placeholder path below with the real path you found.
-        # Right-click your WhatsApp shortcut -> Properties -> Target
-        try:
-            whatsapp_path = r"C:\Users\sunda\AppData\Local\WhatsApp\WhatsApp.exe" # <-- EDIT THIS LINE
-            app = Application(backend="uia").start(whatsapp_path)
-            main_window = app.window(title_re="WhatsApp.*")
-            main_window.wait("ready", timeout=30)
-            print("WhatsApp started successfully.")
-        except Exception as e:
-            print(f"FATAL ERROR: Could not start WhatsApp from the specified path. Please check the path in whatsapp_desktop_tool.py. Error: {e}")
-            return None
-        # =====================================================================
-
-    try:
-        # --- Find and click the chat ---
-        search_box = main_window.child_window(title="Search or start new chat", control_type="Edit")
-        search_box.wait('visible', timeout=20)
-        search_box.set_text(contact_name)
-        time.sleep(2)
-
-        # FIX: Use a regular expression search to handle special characters like '&' safely
-        contact_item = main_window.child_window(title_re=f".*{re.escape(contact_name)}.*", control_type="ListItem")
-        contact_item.wait('visible', timeout=10)
-        contact_item.click_input()
-        print(f"Successfully opened chat with {contact_name}.")
-        return main_window
-
-    except Exception as e:
-        print(f"Error navigating to contact: {e}")
-        return None
-
-def send_whatsapp_message(main_window, message: str):
-    """Sends a message to the currently active chat using pywinauto."""
-    try:
-        message_box = main_window.child_window(title="Type a message", control_type="Edit")
-        message_box.wait('ready', timeout=10)
-        message_box.type_keys(message, with_spaces=True, with_newlines=False)
-        
-        send_button = main_window.child_window(title="Send", control_type="Button")
-        send_button.click()
-        print(f"Sent message: '{message}'")
-        return True
-    except Exception as e:
-        print(f"Error sending message: {e}")
-        return False
-
-def read_latest_reply(main_window) -> str | None:
-    """Reads the latest message. NOTE: This is brittle and may require inspection tools."""
-    global last_seen_message
-    try:
-        # This is a guess. You may need Inspect.exe to find the right control.
-        chat_pane = main_window.child_window(control_type="List", found_index=0)
-        messages = chat_pane.children(control_type="ListItem")
-        
-        if not messages: return None
-
-        latest_message_text = messages[-1].window_text()
-
-        if latest_message_text and latest_message_text != last_seen_message:
-            last_seen_message = latest_message_text
-            print(f"Read new reply: '{latest_message_text}'")
-            return latest_message_text
-        else:
-            return None
-    except Exception:
-        return None
\ No newline at end of file
+# src/agent/whatsapp_desktop_tool.py (Revised with Correct Path Handling)
+from pywinauto.application import Application
+from pywinauto.findwindows import ElementNotFoundError
+import time
+import re # Import the regular expression library
+import weakref
+
+def start_whatsapp_desktop_session(contact_name: str):
+    """
+    Starts or connects to the WhatsApp desktop app and navigates to a specific chat.
+    """
+    print(f"Starting WhatsApp Desktop session for contact: '{contact_name}'")
+    try:
+        app = Application(backend="uia").connect(title_re="WhatsApp.*", timeout=10)
+        main_window = app.window(title_re="WhatsApp.*")
+        print("Connected to existing WhatsApp window.")
+    except ElementNotFoundError:
+        print("WhatsApp not found running. Starting the application...")
+        
+        # ========================== THIS IS THE FIX ==========================
+        # You MUST replace the placeholder path below with the real path you found.
+        # Right-click your WhatsApp shortcut -> Properties -> Target
+        try:
+            whatsapp_path = r"C:\Users\sunda\AppData\Local\WhatsApp\WhatsApp.exe" # <-- EDIT THIS LINE
+            app = Application(backend="uia").start(whatsapp_path)
+            main_window = app.window(title_re="WhatsApp.*")
+            main_window.wait("ready", timeout=30)
+            print("WhatsApp started successfully.")
+        except Exception as e:
+            print(f"FATAL ERROR: Could not start WhatsApp from the specified path. Please check the path in whatsapp_desktop_tool.py. Error: {e}")
+            return None
+        # =====================================================================
+
+    try:
+        # --- Find and click the chat ---
+        search_box = main_window.child_window(title="Search or start new chat", control_type="Edit")
+        search_box.wait('visible', timeout=20)
+        search_box.set_text(contact_name)
+        time.sleep(2)
+
+        # FIX: Use a regular expression search to handle special characters like '&' safely
+        contact_item = main_window.child_window(title_re=f".*{re.escape(contact_name)}.*", control_type="ListItem")
+        contact_item.wait('visible', timeout=10)
+        contact_item.click_input()
+        print(f"Successfully opened chat with {contact_name}.")
+        return main_window
+
+    except Exception as e:
+        print(f"Error navigating to contact: {e}")
+        return None
+
+def send_whatsapp_message(main_window, message: str):
+    """Sends a message to the currently active chat using pywinauto."""
+    try:
+        message_box = main_window.child_window(title="Type a message", control_type="Edit")
+        message_box.wait('ready', timeout=10)
+        message_box.type_keys(message, with_spaces=True, with_newlines=False)
+        
+        send_button = main_window.child_window(title="Send", control_type="Button")
+        send_button.click()
+        print(f"Sent message: '{message}'")
+        return True
+    except Exception as e:
+        print(f"Error sending message: {e}")
+        return False
+
+def _chat_texts(main_window):
+    # This is a guess. You may need Inspect.exe to find the right control.
+    chat_pane = main_window.child_window(control_type="List", found_index=0)
+    return [item.window_text() for item in chat_pane.children(control_type="ListItem")]
+
+
+class DesktopChatReader:
+    """
+    Read cursor for one chat: how many messages it showed and the newest one's text.
+    Messages we sent are skipped, so they are not mistaken for replies.
+    """
+    def __init__(self):
+        self.count = None
+        self.last_text = None
+        self._own_messages = []
+
+    def prime(self, main_window):
+        """Moves the cursor past everything already in the chat."""
+        texts = _chat_texts(main_window)
+        self.count = len(texts)
+        self.last_text = texts[-1] if texts else None
+
+    def mark_sent(self, text):
+        self._own_messages.append(text)
+
+    def read_new(self, main_window):
+        """Texts that appeared since the previous call, oldest first."""
+        texts = _chat_texts(main_window)
+        if self.count is None:
+            start = len(texts)
+        elif 0 < self.count <= len(texts) and texts[self.count - 1] == self.last_text:
+            start = self.count
+        elif self.last_text in texts:
+            # The list scrolled, find the cursor message again from the end
+            start = len(texts) - texts[::-1].index(self.last_text)
+        else:
+            start = max(len(texts) - 1, 0)
+        self.count = len(texts)
+        self.last_text = texts[-1] if texts else None
+
+        new_messages = []
+        for text in texts[start:]:
+            if text in self._own_messages:
+                self._own_messages.remove(text)
+            elif text:
+                new_messages.append(text)
+        return new_messages
+
+
+class WhatsAppDesktopBackend:
+    """
+    FlirtSessionManager backend for the desktop app; run it on a single backend worker
+    so calls never overlap. The app shows one chat at a time and opening another one
+    means typing into the search box and clicking with the real mouse, so only one
+    session runs at a time (max_sessions). Polling several chats would take over the
+    user's desktop every second.
+    """
+    max_sessions = 1
+
+    def __init__(self):
+        self.main_window = None
+        self.active_contact = None
+        self.readers = {}
+
+    def _select(self, contact):
+        if self.main_window is None or contact != self.active_contact:
+            main_window = start_whatsapp_desktop_session(contact)
+            if main_window is None:
+                raise RuntimeError(f"Could not open the chat with {contact}.")
+            self.main_window, self.active_contact = main_window, contact
+
+    def open_chat(self, contact):
+        try:
+            self._select(contact)
+        except RuntimeError as e:
+            print(e)
+            return False
+        self.readers[contact] = DesktopChatReader()
+        self.readers[contact].prime(self.main_window)
+        return True
+
+    def send(self, contact, text):
+        self._select(contact)
+        if not send_whatsapp_message(self.main_window, text):
+            return False
+        self.readers[contact].mark_sent(text)
+        return True
+
+    def read_new(self, contact):
+        try:
+            self._select(contact)
+            return self.readers[contact].read_new(self.main_window)
+        except Exception as e:
+            print(f"Error reading messages from {contact}: {e}")
+            return []
+
+
+_readers = weakref.WeakKeyDictionary()
+
+
+def read_latest_reply(main_window) -> str | None:
+    """Reads the messages that arrived since the last call. NOTE: This is brittle and may require inspection tools."""
+    try:
+        reader = _readers.get(main_window)
+        if reader is None:
+            reader = _readers[main_window] = DesktopChatReader()
+            reader.prime(main_window)
+        new_messages = reader.read_new(main_window)
+    except Exception:
+        return None
+    if not new_messages:
+        return None
+    print(f"Read new reply: '{new_messages[-1]}'")
+    return "\n".join(new_messages)
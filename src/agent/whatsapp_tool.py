@@ -1,131 +1,250 @@
-# src/agent/whatsapp_tool.py (Revised for Stability and Permissions)
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import time
-from thefuzz import fuzz
-
-last_seen_message = ""
-
-CHROME_PROFILES = {
-    "parthiban s": "Default",
-    "parthiban gaming": "Profile 1",
-}
-DEFAULT_WHATSAPP_PROFILE = "parthiban s"
-
-def start_whatsapp_session(contact_name: str):
-    """
-    Opens WhatsApp Web in a specific Chrome Profile sandbox to avoid permission errors.
-    """
-    cleaned_contact_name = contact_name.strip().strip('"\'')
-    print(f"Starting WhatsApp session. Searching for a contact similar to: '{cleaned_contact_name}'")
-    
-    options = webdriver.ChromeOptions()
-    
-    internal_profile_dir = CHROME_PROFILES.get(DEFAULT_WHATSAPP_PROFILE)
-    if not internal_profile_dir:
-        print(f"ERROR: Default WhatsApp profile '{DEFAULT_WHATSAPP_PROFILE}' not found in CHROME_PROFILES dictionary.")
-        return None
-        
-    print(f"Using Chrome profile '{DEFAULT_WHATSAPP_PROFILE}' (Directory: {internal_profile_dir}) for this session.")
-    
-    # ========================== THIS IS THE FIX ==========================
-    # We revert to using a local directory for the session data.
-    # This creates a "sandbox" inside your project folder, avoiding all permission issues.
-    # The profile directory will be created INSIDE this sandbox.
-    options.add_argument("user-data-dir=./chrome_sessions") 
-    options.add_argument(f"--profile-directory={internal_profile_dir}")
-    # =====================================================================
-    
-    # Robust startup options
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--start-maximized")
-    options.add_argument("--remote-debugging-port=9222")
-
-    # Manual Chrome Path
-    try:
-        chrome_executable_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        options.binary_location = chrome_executable_path
-    except Exception:
-        print("Manual Chrome path not found.")
-    
-    try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    except WebDriverException as e:
-        print(f"CRITICAL ERROR: WebDriver failed to initialize. Error: {e}")
-        return None
-
-    driver.get("https://web.whatsapp.com/")
-    print("Waiting for WhatsApp Web to load...")
-    
-    try:
-        # Fuzzy Matching Logic (no changes needed here)
-        search_box_xpath = '//div[@contenteditable="true"][@data-tab="3"]'
-        chat_search_box = WebDriverWait(driver, 60).until(EC.presence_of_element_located((By.XPATH, search_box_xpath)))
-        chat_search_box.click()
-        chat_search_box.send_keys(cleaned_contact_name)
-        time.sleep(3)
-        
-        # ... (The rest of the fuzzy matching logic is correct and remains unchanged) ...
-        best_match_element = None; highest_score = 0
-        contacts_pane_xpath = "//div[@id='pane-side']//div[@role='listitem']"
-        search_results = driver.find_elements(By.XPATH, contacts_pane_xpath)
-        if not search_results: raise TimeoutException("No search results found.")
-        for result in search_results:
-            try:
-                title_element = result.find_element(By.XPATH, ".//span[@title]")
-                full_contact_name = title_element.get_attribute("title")
-                score = fuzz.ratio(cleaned_contact_name.lower(), full_contact_name.lower())
-                if score > highest_score:
-                    highest_score = score
-                    best_match_element = title_element
-            except NoSuchElementException: continue
-        MINIMUM_CONFIDENCE_SCORE = 70
-        if highest_score > MINIMUM_CONFIDENCE_SCORE:
-            best_match_name = best_match_element.get_attribute("title")
-            print(f"Best match found: '{best_match_name}'... Clicking it.")
-            best_match_element.click()
-            return driver
-        else:
-            print(f"Could not find a confident match. Highest score was {highest_score}.")
-            driver.quit()
-            return None
-
-    except Exception as e:
-        print(f"An unexpected error occurred during session start: {e}")
-        driver.quit()
-        return None
-
-# The send_whatsapp_message and read_latest_reply functions remain exactly the same.
-def send_whatsapp_message(driver: webdriver.Chrome, message: str):
-    # ... code is unchanged ...
-    try:
-        message_box_xpath = '//div[@contenteditable="true"][@data-tab="10"]'
-        message_box = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, message_box_xpath)))
-        message_box.click(); message_box.clear(); message_box.send_keys(message)
-        send_button_xpath = '//span[@data-icon="send"]'
-        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, send_button_xpath)))
-        driver.find_element(By.XPATH, send_button_xpath).click()
-        return True
-    except Exception as e:
-        return False
-        
-def read_latest_reply(driver: webdriver.Chrome) -> str | None:
-    # ... code is unchanged ...
-    global last_seen_message
-    try:
-        all_messages = driver.find_elements(By.CSS_SELECTOR, ".message-in .copyable-text")
-        if not all_messages: return None
-        latest_message_element = all_messages[-1]
-        latest_message_text = latest_message_element.text
-        if latest_message_text != last_seen_message:
-            last_seen_message = latest_message_text
-            return latest_message_text
-        return None
-    except Exception:
-        return None
\ No newline at end of file
+# src/agent/whatsapp_tool.py (Revised for Stability and Permissions)
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+import time
+import weakref
+import threading
+from thefuzz import fuzz
+from src.agent.chat_reader import IncrementalReader
+from src.config import FLIRT_WEB_MAX_SESSIONS
+
+CHROME_PROFILES = {
+    "parthiban s": "Default",
+    "parthiban gaming": "Profile 1",
+}
+DEFAULT_WHATSAPP_PROFILE = "parthiban s"
+
+def start_whatsapp_session(contact_name: str, user_data_dir="./chrome_sessions", debugging_port=9222):
+    """
+    Opens WhatsApp Web in a specific Chrome Profile sandbox to avoid permission errors.
+    Browsers running at the same time need their own `user_data_dir` and `debugging_port`.
+    """
+    cleaned_contact_name = contact_name.strip().strip('"\'')
+    print(f"Starting WhatsApp session. Searching for a contact similar to: '{cleaned_contact_name}'")
+    
+    options = webdriver.ChromeOptions()
+    
+    internal_profile_dir = CHROME_PROFILES.get(DEFAULT_WHATSAPP_PROFILE)
+    if not internal_profile_dir:
+        print(f"ERROR: Default WhatsApp profile '{DEFAULT_WHATSAPP_PROFILE}' not found in CHROME_PROFILES dictionary.")
+        return None
+        
+    print(f"Using Chrome profile '{DEFAULT_WHATSAPP_PROFILE}' (Directory: {internal_profile_dir}) for this session.")
+    
+    # ========================== THIS IS THE FIX ==========================
+    # We revert to using a local directory for the session data.
+    # This creates a "sandbox" inside your project folder, avoiding all permission issues.
+    # The profile directory will be created INSIDE this sandbox.
+    options.add_argument(f"user-data-dir={user_data_dir}")
+    options.add_argument(f"--profile-directory={internal_profile_dir}")
+    # =====================================================================
+    
+    # Robust startup options
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--start-maximized")
+    options.add_argument(f"--remote-debugging-port={debugging_port}")
+
+    # Manual Chrome Path
+    try:
+        chrome_executable_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+        options.binary_location = chrome_executable_path
+    except Exception:
+        print("Manual Chrome path not found.")
+    
+    try:
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    except WebDriverException as e:
+        print(f"CRITICAL ERROR: WebDriver failed to initialize. Error: {e}")
+        return None
+
+    driver.get("https://web.whatsapp.com/")
+    print("Waiting for WhatsApp Web to load...")
+    
+    try:
+        # Fuzzy Matching Logic (no changes needed here)
+        search_box_xpath = '//div[@contenteditable="true"][@data-tab="3"]'
+        chat_search_box = WebDriverWait(driver, 60).until(EC.presence_of_element_located((By.XPATH, search_box_xpath)))
+        chat_search_box.click()
+        chat_search_box.send_keys(cleaned_contact_name)
+        time.sleep(3)
+        
+        # ... (The rest of the fuzzy matching logic is correct and remains unchanged) ...
+        best_match_element = None; highest_score = 0
+        contacts_pane_xpath = "//div[@id='pane-side']//div[@role='listitem']"
+        search_results = driver.find_elements(By.XPATH, contacts_pane_xpath)
+        if not search_results: raise TimeoutException("No search results found.")
+        for result in search_results:
+            try:
+                title_element = result.find_element(By.XPATH, ".//span[@title]")
+                full_contact_name = title_element.get_attribute("title")
+                score = fuzz.ratio(cleaned_contact_name.lower(), full_contact_name.lower())
+                if score > highest_score:
+                    highest_score = score
+                    best_match_element = title_element
+            except NoSuchElementException: continue
+        MINIMUM_CONFIDENCE_SCORE = 70
+        if highest_score > MINIMUM_CONFIDENCE_SCORE:
+            best_match_name = best_match_element.get_attribute("title")
+            print(f"Best match found: '{best_match_name}'... Clicking it.")
+            best_match_element.click()
+            # Messages already in the chat are history, only what arrives from now on is a reply
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, "main")))
+            reader_for(driver).prime()
+            return driver
+        else:
+            print(f"Could not find a confident match. Highest score was {highest_score}.")
+            driver.quit()
+            return None
+
+    except Exception as e:
+        print(f"An unexpected error occurred during session start: {e}")
+        driver.quit()
+        return None
+
+# The send_whatsapp_message function remains exactly the same.
+def send_whatsapp_message(driver: webdriver.Chrome, message: str):
+    # ... code is unchanged ...
+    try:
+        message_box_xpath = '//div[@contenteditable="true"][@data-tab="10"]'
+        message_box = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, message_box_xpath)))
+        message_box.click(); message_box.clear(); message_box.send_keys(message)
+        send_button_xpath = '//span[@data-icon="send"]'
+        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, send_button_xpath)))
+        driver.find_element(By.XPATH, send_button_xpath).click()
+        return True
+    except Exception as e:
+        return False
+        
+_readers = weakref.WeakKeyDictionary()
+
+
+def reader_for(driver):
+    """The IncrementalReader for a driver's open chat."""
+    reader = _readers.get(driver)
+    if reader is None:
+        reader = _readers[driver] = IncrementalReader(driver)
+        reader.prime()
+    return reader
+
+
+def read_latest_reply(driver: webdriver.Chrome) -> str | None:
+    """All incoming messages since the previous call, one per line, or None."""
+    try:
+        messages = reader_for(driver).read_new()
+    except Exception:
+        return None
+    if not messages:
+        return None
+    return "\n".join(m.text for m in messages)
+
+
+class WhatsAppWebBackend:
+    """
+    FlirtSessionManager backend for WhatsApp Web. Every contact gets its own Chrome, so
+    up to `max_sessions` sessions run at once (give the manager as many backend workers)
+    and each chat is read through its driver's IncrementalReader without switching to it.
+    WhatsApp Web runs in one tab per browser profile, so every slot has its own profile
+    (chrome_sessions/flirt-1, ...), linked once by scanning its QR code; WhatsApp allows
+    four linked devices.
+
+    watch() makes the sessions push driven: the page tells us when a message arrives
+    (IncrementalReader.wait_for_incoming), and the chat is polled only as a safety net.
+    """
+    WATCH_SECONDS = 10 # Longest one wait in the page, the browser runs nothing else meanwhile
+
+    def __init__(self, max_sessions=FLIRT_WEB_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.drivers = {}
+        self._slots = {}
+        self._free_slots = list(range(1, max_sessions + 1))
+        self._callbacks = {}
+        self._armed = {} # contact -> Event, set while the session waits for a reply
+        self._lock = threading.Lock()
+
+    def _release(self, slot):
+        with self._lock:
+            self._free_slots.append(slot)
+            self._free_slots.sort() # Reuse the profiles that are already linked first
+
+    def open_chat(self, contact):
+        with self._lock:
+            if not self._free_slots:
+                return False
+            slot = self._free_slots.pop(0)
+        driver = start_whatsapp_session(contact, user_data_dir=f"./chrome_sessions/flirt-{slot}",
+                                        debugging_port=9222 + slot)
+        if driver is None:
+            self._release(slot)
+            return False
+        self.drivers[contact], self._slots[contact] = driver, slot
+        callback = self._callbacks.get(contact)
+        if callback:
+            armed = self._armed[contact] = threading.Event()
+            threading.Thread(target=self._watch, args=(contact, driver, armed, callback),
+                             name=f"whatsapp-watch-{slot}", daemon=True).start()
+        return True
+
+    def watch(self, contact, callback):
+        """Calls `callback` whenever an incoming message arrives in the contact's chat."""
+        self._callbacks[contact] = callback
+
+    def _watch(self, contact, driver, armed, callback):
+        """
+        Waits in the page for the next incoming message. It is armed only while the session
+        waits for a reply (after a send or a read that found nothing), since the session's
+        own calls to the browser would have to wait for it.
+        """
+        while self.drivers.get(contact) is driver:
+            if not armed.wait(1):
+                continue
+            try:
+                arrived = reader_for(driver).wait_for_incoming(self.WATCH_SECONDS)
+            except Exception as e:
+                if self.drivers.get(contact) is not driver:
+                    break # The session ended and its browser was closed
+                print(f"Error watching the chat with {contact}: {e}")
+                time.sleep(1)
+                continue
+            if arrived:
+                armed.clear()
+                callback()
+
+    def _arm(self, contact):
+        armed = self._armed.get(contact)
+        if armed is not None:
+            armed.set()
+
+    def send(self, contact, text):
+        if not send_whatsapp_message(self.drivers[contact], text):
+            return False
+        self._arm(contact)
+        return True
+
+    def read_new(self, contact):
+        try:
+            texts = [m.text for m in reader_for(self.drivers[contact]).read_new()]
+        except Exception as e:
+            print(f"Error reading messages from {contact}: {e}")
+            return []
+        if not texts:
+            self._arm(contact)
+        return texts
+
+    def close_chat(self, contact):
+        """Quits the contact's browser and frees its profile for the next session."""
+        self._callbacks.pop(contact, None)
+        self._armed.pop(contact, None)
+        driver = self.drivers.pop(contact, None)
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            print(f"Error closing the WhatsApp Web session with {contact}: {e}")
+        self._release(self._slots.pop(contact))
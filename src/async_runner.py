@@ -0,0 +1,74 @@
+# src/async_runner.py (An asyncio event loop for the threaded voice loop)
+import queue
+import asyncio
+import threading
+import concurrent.futures
+
+
+class AsyncRunner:
+    """
+    Runs an asyncio event loop on a daemon thread. The voice loop hands coroutines to it
+    and waits on the returned future, so async work (agent turns, concurrent tool calls)
+    shares one loop and can be cancelled from the outside.
+    """
+    def __init__(self, name="async"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Schedules the coroutine and returns a concurrent.futures.Future for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, stop_event=None, poll_interval=0.1):
+        """
+        Waits for the coroutine's result. If `stop_event` is set first, the coroutine is
+        cancelled and None is returned.
+        """
+        future = self.submit(coro)
+        while True:
+            try:
+                return future.result(timeout=poll_interval)
+            except concurrent.futures.TimeoutError:
+                if stop_event is not None and stop_event.is_set():
+                    future.cancel()
+                    return None
+
+    def iterate(self, async_iterable, stop_event=None, poll_interval=0.1):
+        """
+        Yields the items of an async iterator (e.g. a streamed answer) on the calling
+        thread as they arrive. It is cancelled when `stop_event` is set or when the
+        caller stops iterating.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in async_iterable:
+                    items.put((False, item))
+                items.put((True, None))
+            except asyncio.CancelledError:
+                items.put((True, None))
+                raise
+            except Exception as e:
+                items.put((True, e))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return
+                try:
+                    finished, value = items.get(timeout=poll_interval)
+                except queue.Empty:
+                    continue
+                if finished:
+                    if value is not None:
+                        raise value
+                    return
+                yield value
+        finally:
+            future.cancel()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,175 @@
+# src/audio_capture.py (Single shared microphone stream + ring buffer)
+import threading
+import numpy as np
+from src.config import CAPTURE_BUFFER_SECONDS
+
+
+class AudioCapture:
+    """
+    Owns the one and only microphone stream of the assistant.
+
+    Incoming audio is written into a fixed-size int16 ring buffer. Positions are
+    absolute sample counts since the stream started, so any consumer (wake word,
+    VAD recorder, ...) can hold a cursor into the buffer and read at its own pace
+    without ever opening or closing the audio device.
+    """
+    RATE = 16000  # Both Porcupine and Whisper expect 16kHz mono int16
+    CHANNELS = 1
+    FRAMES_PER_BUFFER = 512
+
+    def __init__(self, buffer_seconds=CAPTURE_BUFFER_SECONDS):
+        self.capacity = int(self.RATE * buffer_seconds)
+        self._ring = np.zeros(self.capacity, dtype=np.int16)
+        self._written = 0  # Total number of samples ever written
+        self._cond = threading.Condition()
+        self._closed = False
+        self.overruns = 0  # Device overflows reported by PortAudio
+        self.pa = None
+        self.stream = None
+
+    def start(self):
+        """Opens the microphone once. Calling it again is a no-op."""
+        if self.stream is not None:
+            return
+        # Imported here so a capture fed through write() does not need an audio device
+        import pyaudio
+        self._pyaudio = pyaudio
+        print("Opening shared microphone stream...")
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(
+            format=pyaudio.paInt16,
+            channels=self.CHANNELS,
+            rate=self.RATE,
+            input=True,
+            frames_per_buffer=self.FRAMES_PER_BUFFER,
+            stream_callback=self._on_audio,
+        )
+        self.stream.start_stream()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        if status & self._pyaudio.paInputOverflow:
+            self.overruns += 1
+        self.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, self._pyaudio.paContinue)
+
+    @property
+    def position(self):
+        """Absolute position of the newest sample in the buffer."""
+        with self._cond:
+            return self._written
+
+    def write(self, samples):
+        """Appends int16 samples to the ring buffer and wakes up waiting readers."""
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        with self._cond:
+            start = self._written % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first] = samples[:first]
+            self._ring[:n - first] = samples[first:]
+            self._written += n
+            self._cond.notify_all()
+
+    def cursor(self, position=None, preroll_ms=0):
+        """
+        Returns a cursor starting `preroll_ms` before `position` (default: now).
+        The start is clamped to the oldest sample still held in the buffer.
+        """
+        if position is None:
+            position = self.position
+        position -= int(self.RATE * preroll_ms / 1000)
+        return CaptureCursor(self, position)
+
+    def _read_into(self, position, out):
+        """
+        Blocks until `len(out)` samples after `position` are available and copies them
+        into `out`. Returns (new_position, samples_read); samples_read is 0 once closed.
+        """
+        n = len(out)
+        with self._cond:
+            while self._written < position + n and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return position, 0
+
+            # The reader fell behind by more than the buffer size, skip the lost audio.
+            oldest = max(0, self._written - self.capacity)
+            if position < oldest:
+                position = oldest
+
+            start = position % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self._ring[start:start + first]
+            out[first:] = self._ring[:n - first]
+        return position + n, n
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.pa is not None:
+            self.pa.terminate()
+            self.pa = None
+
+    def __del__(self):
+        if hasattr(self, 'stream'):
+            self.close()
+
+
+class CaptureCursor:
+    """An independent read position into an AudioCapture ring buffer."""
+    def __init__(self, capture, position):
+        self.capture = capture
+        self.position = max(0, position)
+
+    def readinto(self, out):
+        """Fills `out` (an int16 array) with the next samples. Returns the number read."""
+        self.position, n = self.capture._read_into(self.position, out)
+        return n
+
+    def read(self, n):
+        out = np.empty(n, dtype=np.int16)
+        return out[:self.readinto(out)]
+
+
+class PCMBuffer:
+    """
+    A growable int16 buffer that is filled in place. Callers reserve a slot, read
+    audio straight into it and commit it. Capacity doubles when full, so recording
+    an utterance costs a few allocations instead of one per frame.
+    """
+    def __init__(self, initial_samples):
+        self._data = np.empty(initial_samples, dtype=np.int16)
+        self.length = 0
+        self.allocations = 1 # Number of backing arrays created so far
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def reserve(self, n):
+        """Returns a writable view of the next `n` samples, growing the buffer if needed."""
+        needed = self.length + n
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=np.int16)
+            grown[:self.length] = self._data[:self.length]
+            self._data = grown
+            self.allocations += 1
+        return self._data[self.length:needed]
+
+    def commit(self, n):
+        self.length += n
+
+    def keep_last(self, n):
+        """Drops everything but the newest `n` samples."""
+        n = min(n, self.length)
+        self._data[:n] = self._data[self.length - n:self.length]
+        self.length = n
+
+    def view(self, start=0):
+        """A zero-copy view of the samples from `start` to the end of the data."""
+        return self._data[start:self.length]
@@ -0,0 +1,179 @@
+# src/barge_in.py (Listening for interruptions while the assistant speaks)
+import time
+import threading
+import contextlib
+from collections import deque
+import numpy as np
+from src.config import BARGE_IN, BARGE_IN_MIN_SPEECH_MS, BARGE_IN_CALIBRATION_MS, BARGE_IN_ECHO_MARGIN
+
+
+class PlaybackLevel:
+    """Levels of the audio played over the last `window` seconds, to tell how loud our echo can be."""
+    def __init__(self, window=0.3):
+        self.window = window
+        self._levels = deque()
+        self._lock = threading.Lock()
+
+    def played(self, level):
+        now = time.monotonic()
+        with self._lock:
+            self._levels.append((now, level))
+            while self._levels[0][0] < now - self.window:
+                self._levels.popleft()
+
+    def recent(self):
+        """The loudest level played within the window, 0 once playback has been quiet that long."""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            return max((level for played_at, level in self._levels if played_at >= cutoff), default=0.0)
+
+
+class BargeInMonitor:
+    """
+    Keeps reading the shared microphone while the assistant speaks and interrupts the
+    TTS when the user talks over it.
+
+    In "vad" mode any speech counts, once it lasts `min_speech_ms`. The microphone
+    also hears our own voice, so the first `calibration_ms` of each answer measure how
+    loud that echo is relative to what we play (only while something audible is
+    playing, so quiet stretches don't skew it). That echo gain is kept across answers
+    and each calibration only moves it part of the way, so one odd measurement can't
+    throw it off; calibration frames the VAD hears as speech above the previous
+    estimate are the user, not echo, and count towards an interruption instead. A
+    speech frame only counts if it is `echo_margin` times louder than the echo expected
+    at that moment.
+    In "wake" mode only the wake word interrupts, which our voice can't trigger.
+
+        with monitor.listening(tts):
+            tts.speak_primary(answer)
+        if monitor.detected_at is not None: ... # Capture position where the user started
+    """
+    FRAME_MS = 30 # webrtcvad accepts 10, 20 or 30ms frames
+    MAX_GAP_FRAMES = 2 # Quiet frames allowed inside one stretch of speech
+    AUDIBLE_LEVEL = 0.005 # Playback quieter than this (about -46 dBFS) says nothing about the echo
+    ECHO_GAIN_SMOOTHING = 0.25 # Share of each answer's calibration that goes into the echo gain
+
+    def __init__(self, capture, wake_word_detector=None, mode=BARGE_IN, min_speech_ms=BARGE_IN_MIN_SPEECH_MS,
+                 calibration_ms=BARGE_IN_CALIBRATION_MS, echo_margin=BARGE_IN_ECHO_MARGIN):
+        if mode == "wake" and wake_word_detector is None:
+            raise ValueError("Barge-in mode 'wake' needs the wake word detector.")
+        self.capture = capture
+        self.wake_word_detector = wake_word_detector
+        self.mode = mode
+        self.frame_length = int(capture.RATE * self.FRAME_MS / 1000)
+        self.min_speech_frames = max(1, min_speech_ms // self.FRAME_MS)
+        self.calibration_samples = int(capture.RATE * calibration_ms / 1000)
+        self.echo_margin = echo_margin
+        self.level = PlaybackLevel()
+        self.detected_at = None
+        self.detected_time = None # perf_counter() of the detection
+        self.interruptions = 0
+        self.echo_frames = 0 # Speech frames put down to our own voice
+        self.echo_gain = None # How much of what we play comes back, None until calibrated
+        self._tts = None
+        self._attached = set()
+        self._session = 0
+        self._active = threading.Event()
+        if mode == "vad":
+            import webrtcvad
+            self.vad = webrtcvad.Vad(3)
+        if mode != "off":
+            threading.Thread(target=self._run, name="barge-in", daemon=True).start()
+
+    @contextlib.contextmanager
+    def listening(self, tts):
+        """Interrupts `tts` if the user starts talking while the block runs."""
+        self.detected_at = None
+        if self.mode == "off":
+            yield
+            return
+        if id(tts) not in self._attached:
+            tts.on_playback.append(self.level.played)
+            self._attached.add(id(tts))
+        self._tts = tts
+        self._session += 1
+        self._active.set()
+        try:
+            yield
+        finally:
+            self._active.clear()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            session = self._session
+            if not self._watch(session):
+                return # The capture was closed
+            while self._active.is_set() and self._session == session:
+                time.sleep(self.FRAME_MS / 1000) # Already interrupted, wait for this answer to wind down
+
+    def _watch(self, session):
+        frame_length = self.wake_word_detector.porcupine.frame_length if self.mode == "wake" else self.frame_length
+        frame = np.empty(frame_length, dtype=np.int16)
+        cursor = self.capture.cursor()
+        calibration_frames = self.calibration_samples // frame_length
+        ratios = []
+        speech_frames = gap_frames = 0
+        speech_start = None
+        while self._active.is_set() and self._session == session:
+            if cursor.readinto(frame) < frame_length:
+                return False
+            frame_start = cursor.position - frame_length
+            if self.mode == "wake":
+                if self.wake_word_detector.process(frame):
+                    self._trigger(frame_start)
+                    return True
+                continue
+
+            mic = float(np.sqrt(np.mean(np.square(frame, dtype=np.float32)))) / 32768.0
+            echo = self.level.recent()
+            is_speech = self.vad.is_speech(memoryview(frame).cast("B"), self.capture.RATE)
+            # Speech above the previous estimate is the user talking over the start of the
+            # answer: it is left out of the calibration and can already interrupt
+            if len(ratios) < calibration_frames and not (
+                    is_speech and self.echo_gain is not None and mic > self.echo_margin * self.echo_gain * echo):
+                if echo > self.AUDIBLE_LEVEL:
+                    ratios.append(mic / echo)
+                    if len(ratios) == calibration_frames:
+                        self._calibrated(ratios)
+                continue
+
+            # Without a measurement yet assume no more comes back than we play
+            echo_gain = self.echo_gain if self.echo_gain is not None else 1.0
+            if not is_speech:
+                user_speech = False
+            elif mic <= self.echo_margin * echo_gain * echo:
+                self.echo_frames += 1
+                user_speech = False
+            else:
+                user_speech = True
+            if user_speech:
+                if speech_frames == 0:
+                    speech_start = frame_start
+                speech_frames += 1
+                gap_frames = 0
+                if speech_frames >= self.min_speech_frames:
+                    self._trigger(speech_start)
+                    return True
+            elif speech_frames:
+                # Speech dips between syllables; only a longer pause ends the run
+                gap_frames += 1
+                if gap_frames > self.MAX_GAP_FRAMES:
+                    speech_frames = 0
+        if 0 < len(ratios) < calibration_frames:
+            self._calibrated(ratios) # A short answer still says something about the echo
+        return True
+
+    def _calibrated(self, ratios):
+        measured = float(np.median(ratios))
+        if self.echo_gain is None:
+            self.echo_gain = measured
+        else:
+            self.echo_gain += self.ECHO_GAIN_SMOOTHING * (measured - self.echo_gain)
+
+    def _trigger(self, position):
+        self.detected_at = position
+        self.detected_time = time.perf_counter()
+        self.interruptions += 1
+        print("Barge-in: the user is talking, stopping speech.")
+        self._tts.interrupt()
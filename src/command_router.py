@@ -1,55 +1,126 @@
-# src/command_router.py (Revised and Smarter)
-import subprocess
-
-def _control_volume(level):
-    print(f"Setting volume to {level}")
-    return f"Volume set to {level}."
-
-FAST_PATH_COMMANDS = {
-    "increase volume": lambda: _control_volume("up"),
-    "decrease volume": lambda: _control_volume("down"),
-    "mute": lambda: _control_volume("mute"),
-    "open calculator": lambda: subprocess.Popen(['calc']) and "Opening calculator."
-}
-
-def route_command(text: str):
-    """
-    Intelligently routes the user's command. It checks for the complex WhatsApp
-    "Flirt Mode" first, then simple commands, before falling back to the main AI agent.
-    """
-    text_lower = text.lower()
-
-    # --- NEW, MORE ROBUST LOGIC FOR WHATSAPP FLIRT MODE ---
-    # This is the most specific and complex command, so we check for it first.
-    chat_keywords = ["flirt", "chat", "message", "talk to"]
-    
-    # Check if the intent involves BOTH WhatsApp AND a chat-related action.
-    if 'whatsapp' in text_lower and any(keyword in text_lower for keyword in chat_keywords):
-        # The intent is confirmed. Now, extract the contact name.
-        # The name usually follows prepositions like "with" or "to".
-        try:
-            name_preposition = ""
-            if "with " in text_lower:
-                name_preposition = "with "
-            elif "to " in text_lower:
-                name_preposition = "to "
-            
-            if name_preposition:
-                contact_name = text_lower.split(name_preposition, 1)[1].title()
-                contact_name = contact_name.strip().strip('"\'')
-                print(f"Flirt Mode triggered for contact: {contact_name}")
-                return ("FLIRT_MODE", contact_name)
-        except IndexError:
-            # This happens if the command is "flirt on whatsapp" without a name.
-            # We can let the main agent handle this ambiguity.
-            pass
-
-    # --- Existing logic for simple, fast commands ---
-    for command, func in FAST_PATH_COMMANDS.items():
-        if command in text_lower:
-            return func()
-    
-    # --- Fallback to the main AI agent for all other commands ---
-    # If the command wasn't a special mode or a simple command, it's a job for the General Agent.
-    print("Command not routed to a special mode. Passing to main agent.")
-    return "AGENT"
\ No newline at end of file
+# src/command_router.py (Revised and Smarter)
+import subprocess
+from typing import NamedTuple
+from src.intent_registry import CommandRegistry, tokenize
+from src.tracing import tracer, spoken_summary
+
+def _volume_reply(level):
+    return f"Volume set to {level}."
+
+def _control_volume(level):
+    print(f"Setting volume to {level}")
+    return _volume_reply(level)
+
+FAST_PATH_COMMANDS = {
+    "increase volume": lambda: _control_volume("up"),
+    "decrease volume": lambda: _control_volume("down"),
+    "mute": lambda: _control_volume("mute"),
+    "open calculator": lambda: subprocess.Popen(['calc']) and "Opening calculator."
+}
+
+# What each fast-path command says back, so the replies can be synthesized ahead of time
+FAST_PATH_REPLIES = {
+    "increase volume": _volume_reply("up"),
+    "decrease volume": _volume_reply("down"),
+    "mute": _volume_reply("mute"),
+    "open calculator": "Opening calculator."
+}
+
+# Different ways of asking for a WhatsApp conversation, optionally naming the app at the end
+_FLIRT_PHRASES = ["flirt with", "chat with", "talk to", "message to", "send a message to"]
+_FLIRT_APP_SUFFIXES = ["", " on whatsapp", " in whatsapp", " via whatsapp", " over whatsapp"]
+_STOP_FLIRT_PHRASES = ["stop flirting with", "stop chatting with", "stop talking to", "stop messaging"]
+
+# Words that may surround a command without making the match doubtful
+_POLITE_WORDS = {"please", "hey", "can", "could", "you", "now", "the"}
+
+registry = CommandRegistry(filler_words=_POLITE_WORDS)
+
+# This is the most specific command, so it outranks the fast-path ones
+registry.register(
+    "flirt",
+    [f"{phrase} {{contact}}{suffix}" for phrase in _FLIRT_PHRASES for suffix in _FLIRT_APP_SUFFIXES],
+    handler=lambda slots: ("FLIRT_MODE", slots["contact"].title()),
+    requires=("whatsapp",),
+    priority=1,
+)
+# Sessions run in the background, so they are ended by name. "stop talking to me" fits the
+# pattern too, so match_command only takes it for a running session (see flirt_contacts).
+registry.register(
+    "stop flirt",
+    [f"{phrase} {{contact}}{suffix}" for phrase in _STOP_FLIRT_PHRASES for suffix in _FLIRT_APP_SUFFIXES],
+    handler=lambda slots: ("STOP_FLIRT", slots["contact"].title()),
+    priority=2,
+)
+for _phrase, _action in FAST_PATH_COMMANDS.items():
+    registry.register(_phrase, [_phrase], handler=lambda slots, action=_action: action(), reply=FAST_PATH_REPLIES[_phrase])
+registry.register(
+    "set volume",
+    ["set volume to {level:percent}", "set the volume to {level:percent}", "volume to {level:percent}"],
+    handler=lambda slots: _control_volume(slots["level"]),
+)
+
+def _latency_report(last):
+    """Prints the slowest pipeline stages and says the worst one."""
+    stats = tracer.report(last)
+    return spoken_summary(stats, min(last, len(tracer.turns)))
+
+registry.register(
+    "latency report",
+    ["latency report", "show latency", "show the latency", "latency report for the last {turns:int} turns"],
+    handler=lambda slots: _latency_report(slots.get("turns", 20)),
+)
+
+class CommandMatch(NamedTuple):
+    kind: str # "FLIRT_MODE", "STOP_FLIRT", "FAST_PATH" or "AGENT"
+    value: str | None = None # Contact name or fast-path command
+    confident: bool = False # Safe to act on without waiting for the LLM-corrected transcript
+    slots: dict | None = None # Values captured by the command's pattern
+
+def match_command(text: str, flirt_contacts=()) -> CommandMatch:
+    """
+    Works out how a command would be routed, without running anything. This is cheap
+    and side-effect free, so it can run speculatively on the raw transcript.
+    `flirt_contacts` are the contacts with a running flirt session.
+    """
+    intent = registry.match(text)
+    if intent is None:
+        return CommandMatch("AGENT")
+
+    if intent.command.name == "flirt":
+        # Trust the raw transcript only if the request is all there is, so a question that
+        # happens to contain the words ("did I get a whatsapp message from...") is corrected first
+        return CommandMatch("FLIRT_MODE", intent.slots["contact"].title(), confident=intent.exact, slots=intent.slots)
+    if intent.command.name == "stop flirt":
+        contact = intent.slots["contact"].title()
+        if contact in flirt_contacts:
+            return CommandMatch("STOP_FLIRT", contact, confident=True, slots=intent.slots)
+        # No such session: only a request that is nothing else and names WhatsApp is meant for us
+        if intent.exact and "whatsapp" in tokenize(text):
+            return CommandMatch("STOP_FLIRT", contact, slots=intent.slots)
+        return CommandMatch("AGENT")
+
+    # Only trust it blindly if the utterance is the command and nothing else
+    return CommandMatch("FAST_PATH", intent.command.name, confident=intent.exact, slots=intent.slots)
+
+def execute_match(match: CommandMatch):
+    """Carries out a CommandMatch and returns what route_command returns."""
+    if match.kind == "FLIRT_MODE":
+        print(f"Flirt Mode triggered for contact: {match.value}")
+        return ("FLIRT_MODE", match.value)
+    if match.kind == "STOP_FLIRT":
+        return ("STOP_FLIRT", match.value)
+    if match.kind == "FAST_PATH":
+        return registry.commands[match.value].handler(match.slots or {})
+
+    # --- Fallback to the main AI agent for all other commands ---
+    # If the command wasn't a special mode or a simple command, it's a job for the General Agent.
+    print("Command not routed to a special mode. Passing to main agent.")
+    return "AGENT"
+
+def route_command(text: str, flirt_contacts=()):
+    """
+    Intelligently routes the user's command. It checks for the complex WhatsApp
+    "Flirt Mode" first, then simple commands, before falling back to the main AI agent.
+    """
+    return execute_match(match_command(text, flirt_contacts))
@@ -1,11 +1,171 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-PICOVOICE_ACCESS_KEY = os.getenv("PICOVOICE_ACCESS_KEY")
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-SENDER_EMAIL = os.getenv("SENDER_EMAIL")
-SENDER_APP_PASSWORD = os.getenv("SENDER_APP_PASSWORD")
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+PICOVOICE_ACCESS_KEY = os.getenv("PICOVOICE_ACCESS_KEY")
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+SENDER_APP_PASSWORD = os.getenv("SENDER_APP_PASSWORD")
+# Optional override of the Groq API endpoint, e.g. a local stand-in server for benchmarks
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+# Optional override of the Tavily search endpoint, same idea
+TAVILY_BASE_URL = os.getenv("TAVILY_BASE_URL") or None
+
+# --- LLM client ---
+# Default per-request timeout in seconds
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+# Retries (with jittered exponential backoff) for connection errors, timeouts, 429s and 5xx
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Keep-alive connections held open to the Groq API
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "8"))
+
+# --- Audio capture ---
+# Seconds of microphone audio kept in the shared ring buffer
+CAPTURE_BUFFER_SECONDS = float(os.getenv("CAPTURE_BUFFER_SECONDS", "30"))
+# Audio taken from just before the wake word detection when the command recording starts
+STT_PREROLL_MS = int(os.getenv("STT_PREROLL_MS", "300"))
+
+# --- Speech-to-text ---
+# Transcription engine: "groq" (cloud), "local" (CPU Whisper) or "auto" (Groq, falling back to local)
+STT_BACKEND = os.getenv("STT_BACKEND", "groq").lower()
+# With STT_BACKEND=auto, Groq requests slower than this count as failed and go to the local fallback
+STT_NETWORK_TIMEOUT = float(os.getenv("STT_NETWORK_TIMEOUT", "4"))
+# After a failure the cloud backend is skipped for this many seconds
+STT_FALLBACK_COOLDOWN = float(os.getenv("STT_FALLBACK_COOLDOWN", "60"))
+# Transcribe rolling segments while the user is still talking
+STT_STREAMING = os.getenv("STT_STREAMING", "false").lower() == "true"
+# A pause this long closes a streaming segment...
+STT_SEGMENT_PAUSE_MS = int(os.getenv("STT_SEGMENT_PAUSE_MS", "300"))
+# ...as long as the segment is at least this long
+STT_MIN_SEGMENT_MS = int(os.getenv("STT_MIN_SEGMENT_MS", "1500"))
+
+# --- Transcription correction ---
+# Transcripts with a Whisper average log-prob at or above this skip the LLM correction
+CORRECTION_LOGPROB_THRESHOLD = float(os.getenv("CORRECTION_LOGPROB_THRESHOLD", "-0.3"))
+# Raw -> corrected transcripts remembered
+CORRECTION_CACHE_SIZE = int(os.getenv("CORRECTION_CACHE_SIZE", "256"))
+
+# --- Text-to-speech ---
+# Synthesize the next sentence while the current one plays
+TTS_PIPELINED = os.getenv("TTS_PIPELINED", "true").lower() == "true"
+# Synthesized sentences allowed to wait for playback
+TTS_PIPELINE_DEPTH = int(os.getenv("TTS_PIPELINE_DEPTH", "2"))
+# Directory for cached speech clips and XTTS speaker latents
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+# Synthesized clips kept in memory
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "64"))
+# Disk space for cached clips; beyond it the least recently played ones are deleted
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "200"))
+# Playback is written in blocks of this many ms, the longest a barge-in waits for silence
+TTS_PLAYBACK_BLOCK_MS = int(os.getenv("TTS_PLAYBACK_BLOCK_MS", "40"))
+# Streamed sentences shorter than this are joined with the next one before synthesis
+TTS_MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "12"))
+# Without a sentence end, streamed text is cut at a comma or space after this many characters
+TTS_MAX_SENTENCE_CHARS = int(os.getenv("TTS_MAX_SENTENCE_CHARS", "200"))
+# Run XTTS and Piper in their own process, so synthesis never competes with capture for the GIL
+TTS_WORKER = os.getenv("TTS_WORKER", "false").lower() == "true"
+# Seconds a synthesis request may take before the worker is considered hung and restarted
+TTS_WORKER_TIMEOUT = float(os.getenv("TTS_WORKER_TIMEOUT", "60"))
+# Shared-memory buffers the worker returns audio in, i.e. requests in flight at once
+TTS_WORKER_SLOTS = int(os.getenv("TTS_WORKER_SLOTS", "4"))
+# Longest sentence audio that fits a buffer; longer audio is sent through the queue instead
+TTS_WORKER_SLOT_SECONDS = int(os.getenv("TTS_WORKER_SLOT_SECONDS", "30"))
+
+# --- Startup ---
+# Every start appends its import/init timings here (empty to disable)
+STARTUP_PROFILE_PATH = os.getenv("STARTUP_PROFILE_PATH", "startup_profile.jsonl")
+
+# --- Latency tracing ---
+# Every voice turn appends its per-stage timings here (empty to disable), see python -m src.tracing
+TRACE_PATH = os.getenv("TRACE_PATH", "turn_traces.jsonl")
+# Turns kept in memory for the p50/p95/p99 per stage
+TRACE_WINDOW_TURNS = int(os.getenv("TRACE_WINDOW_TURNS", "200"))
+
+# --- Local intent classifier ---
+# Map clear requests straight to a tool on-device instead of asking the LLM agent
+LOCAL_INTENTS = os.getenv("LOCAL_INTENTS", "true").lower() == "true"
+# Minimum similarity to the nearest example utterance for a local decision...
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.5"))
+# ...and how far the best tool must be ahead of the next one
+INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "0.1"))
+
+# --- Conversation history ---
+# SQLite database holding every conversation turn (empty keeps it in memory only)
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversation.db")
+# Approximate tokens of history sent to the agent with each request
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+# What happens to turns that no longer fit: "summarize" (rolled into a running summary) or "drop"
+CONVERSATION_POLICY = os.getenv("CONVERSATION_POLICY", "summarize").lower()
+# Longest running summary, in tokens
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "200"))
+
+# --- Tool result cache ---
+# Seconds a web search result is reused for the same (normalized) query
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+# Search results kept, least recently used go first
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "128"))
+
+# --- Agent ---
+# Run agent turns on asyncio, with the tool calls of each step in parallel
+AGENT_ASYNC = os.getenv("AGENT_ASYNC", "true").lower() == "true"
+# Model round-trips allowed per request
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "6"))
+# Speak the answer sentence by sentence while the model is still writing it (needs AGENT_ASYNC)
+AGENT_STREAMING = os.getenv("AGENT_STREAMING", "true").lower() == "true"
+# Deadline in seconds for a tool call without its own entry in tools.TOOL_TIMEOUTS
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "15"))
+
+# --- Email ---
+# SMTP server used by the email outbox (point it at a local stand-in for benchmarks)
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SSL = os.getenv("SMTP_SSL", "true").lower() == "true"
+# Queued emails sent over the connection in one go
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "10"))
+# The SMTP connection is closed after this many seconds without mail
+OUTBOX_IDLE_SECONDS = float(os.getenv("OUTBOX_IDLE_SECONDS", "120"))
+# Connection attempts per email before it is reported as failed
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "3"))
+
+# --- Flirt sessions ---
+# Seconds between reply checks right after a message is sent or received...
+FLIRT_POLL_MIN_SECONDS = float(os.getenv("FLIRT_POLL_MIN_SECONDS", "1"))
+# ...growing by this factor while the chat is quiet...
+FLIRT_POLL_BACKOFF = float(os.getenv("FLIRT_POLL_BACKOFF", "1.5"))
+# ...up to this many seconds, no longer than the old fixed 15s wait
+FLIRT_POLL_MAX_SECONDS = float(os.getenv("FLIRT_POLL_MAX_SECONDS", "15"))
+# With a backend that reports new messages itself (FLIRT_BACKEND=web), only this often, in case one was missed
+FLIRT_PUSH_CHECK_SECONDS = float(os.getenv("FLIRT_PUSH_CHECK_SECONDS", "120"))
+# Token budget for the chat history sent with each flirty reply; older messages are dropped
+FLIRT_HISTORY_TOKENS = int(os.getenv("FLIRT_HISTORY_TOKENS", "600"))
+# Replies generated at the same time across all sessions
+FLIRT_MAX_CONCURRENT_REPLIES = int(os.getenv("FLIRT_MAX_CONCURRENT_REPLIES", "4"))
+# Which WhatsApp the sessions drive: "desktop" (the app, one chat at a time) or "web" (a Chrome per contact)
+FLIRT_BACKEND = os.getenv("FLIRT_BACKEND", "desktop").lower()
+# Chats the web backend follows at once, each in its own linked Chrome profile (WhatsApp allows four devices)
+FLIRT_WEB_MAX_SESSIONS = int(os.getenv("FLIRT_WEB_MAX_SESSIONS", "4"))
+
+# --- Barge-in ---
+# What interrupts the assistant while it speaks: "vad" (any speech), "wake" (the wake word) or "off"
+BARGE_IN = os.getenv("BARGE_IN", "vad").lower()
+# Speech needed before it counts as an interruption
+BARGE_IN_MIN_SPEECH_MS = int(os.getenv("BARGE_IN_MIN_SPEECH_MS", "240"))
+# Audible playback at the start of each answer used to measure how loud our own voice comes back
+BARGE_IN_CALIBRATION_MS = int(os.getenv("BARGE_IN_CALIBRATION_MS", "400"))
+# Microphone level must exceed the expected echo by this factor to count as the user
+BARGE_IN_ECHO_MARGIN = float(os.getenv("BARGE_IN_ECHO_MARGIN", "2.0"))
+
+# --- Server mode ---
+# Address the headless multi-client server (python -m src.voice_server) listens on
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8765"))
+# Clients beyond this many are turned away, each session holds a ring buffer and a thread
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "32"))
+# Porcupine keyword file for the server's sessions; empty means every utterance is a command
+# (the client does its own wake word or push-to-talk)
+SERVER_WAKE_WORD_PATH = os.getenv("SERVER_WAKE_WORD_PATH", "")
+# How far ahead of real time speech is sent to a client, i.e. the client's playback buffer
+SERVER_AUDIO_LEAD_MS = int(os.getenv("SERVER_AUDIO_LEAD_MS", "300"))
@@ -0,0 +1,172 @@
+# src/conversation_store.py (Persistent, token-budgeted conversation history)
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.config import CONVERSATION_DB_PATH, CONVERSATION_TOKEN_BUDGET, CONVERSATION_POLICY
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting without a tokenizer."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ConversationStore:
+    """
+    Every turn is appended to a SQLite database (WAL mode, one INSERT per turn), so the
+    conversation survives restarts. Only a window of the most recent turns that fits
+    `token_budget` is handed to the agent, which keeps prompt size and LLM latency flat
+    however long the conversation gets.
+
+    Turns that fall out of the window are either dropped from the prompt (policy "drop")
+    or folded into a running summary by `summarizer(previous_summary, turns) -> str` on a
+    background thread (policy "summarize"). Dropped turns always stay in the database.
+    """
+    def __init__(self, path=CONVERSATION_DB_PATH, token_budget=CONVERSATION_TOKEN_BUDGET,
+                 policy=CONVERSATION_POLICY, summarizer=None, session="default"):
+        if policy not in ("drop", "summarize"):
+            raise ValueError(f"Unknown conversation policy '{policy}', use 'drop' or 'summarize'.")
+        self.path = path or ":memory:"
+        self.token_budget = token_budget
+        self.policy = policy if summarizer else "drop"
+        self.summarizer = summarizer
+        self.session = session
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL") # WAL keeps this crash-safe, minus the last few turns on power loss
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS turns_by_session ON turns (session, id);
+            CREATE TABLE IF NOT EXISTS summaries (
+                session TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                upto_id INTEGER NOT NULL
+            );
+        """)
+        self._summary_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self._pending = [] # Evicted turns waiting to be summarized
+        self._load()
+
+    def _load(self):
+        """Rebuilds the in-memory window from the database, newest turns first."""
+        row = self._db.execute(
+            "SELECT content, tokens, upto_id FROM summaries WHERE session = ?", (self.session,)).fetchone()
+        self.summary, self._summary_tokens, summary_upto = row if row else ("", 0, 0)
+
+        self._window = deque()
+        self._window_tokens = 0
+        rows = self._db.execute(
+            "SELECT id, role, content, tokens FROM turns WHERE session = ? AND id > ? ORDER BY id DESC",
+            (self.session, summary_upto))
+        unsummarized = []
+        for turn_id, role, content, tokens in rows:
+            if unsummarized or (self._window_tokens + tokens > self._window_budget() and self._window):
+                unsummarized.append((turn_id, role, content, tokens))
+                continue
+            self._window.appendleft((turn_id, role, content, tokens))
+            self._window_tokens += tokens
+        # Turns evicted last run before their summary was written are summarized now
+        if unsummarized and self.policy == "summarize":
+            self._pending.extend(reversed(unsummarized))
+            self._summary_pool.submit(self._summarize_pending)
+
+    def _window_budget(self):
+        return max(0, self.token_budget - self._summary_tokens)
+
+    def add(self, role, content):
+        """Appends a turn and trims the prompt window back under the budget."""
+        tokens = estimate_tokens(content)
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute(
+                    "INSERT INTO turns (session, role, content, tokens, created) VALUES (?, ?, ?, ?, ?)",
+                    (self.session, role, content, tokens, time.time()))
+            self._window.append((cursor.lastrowid, role, content, tokens))
+            self._window_tokens += tokens
+
+            evicted = []
+            # The newest turn always stays, even if it alone is over the budget
+            while self._window_tokens > self._window_budget() and len(self._window) > 1:
+                turn = self._window.popleft()
+                self._window_tokens -= turn[3]
+                evicted.append(turn)
+            if evicted and self.policy == "summarize":
+                self._pending.extend(evicted)
+                self._summary_pool.submit(self._summarize_pending)
+
+    def _summarize_pending(self):
+        with self._lock:
+            turns, self._pending = self._pending, []
+            previous = self.summary
+        if not turns:
+            return
+        try:
+            summary = self.summarizer(previous, [{"role": r, "content": c} for _, r, c, _ in turns])
+        except Exception as e:
+            print(f"Could not summarize older conversation turns, retrying with the next ones: {e}")
+            with self._lock:
+                self._pending[:0] = turns # Still older than anything evicted meanwhile
+            return
+        tokens = estimate_tokens(summary)
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO summaries (session, content, tokens, upto_id) VALUES (?, ?, ?, ?)",
+                    (self.session, summary, tokens, turns[-1][0]))
+            self.summary, self._summary_tokens = summary, tokens
+            # A longer summary leaves less room for verbatim turns, those go into the next summary
+            evicted = []
+            while self._window_tokens > self._window_budget() and len(self._window) > 1:
+                turn = self._window.popleft()
+                self._window_tokens -= turn[3]
+                evicted.append(turn)
+            if evicted:
+                self._pending.extend(evicted)
+                self._summary_pool.submit(self._summarize_pending)
+
+    def history(self):
+        """The prompt window: the running summary (if any) followed by the recent turns."""
+        with self._lock:
+            messages = [{"role": "system", "content": SUMMARY_PREFIX + self.summary}] if self.summary else []
+            messages.extend({"role": role, "content": content} for _, role, content, _ in self._window)
+        return messages
+
+    def history_tokens(self):
+        with self._lock:
+            return self._window_tokens + self._summary_tokens
+
+    def turn_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM turns WHERE session = ?", (self.session,)).fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM turns WHERE session = ?", (self.session,))
+                self._db.execute("DELETE FROM summaries WHERE session = ?", (self.session,))
+            self._window.clear()
+            self._window_tokens = 0
+            self._pending = []
+            self.summary, self._summary_tokens = "", 0
+
+    def wait_for_summary(self):
+        """Blocks until queued summarization has finished (used by benchmarks and shutdown)."""
+        self._summary_pool.submit(lambda: None).result()
+
+    def close(self):
+        self._summary_pool.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,267 @@
+# src/intent_registry.py (Command registry compiled into a word-level Aho-Corasick matcher)
+import re
+from collections import deque
+from typing import Callable, NamedTuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9&']+")
+_SLOT_RE = re.compile(r"^\{(\w+)(?::(\w+))?\}$")
+
+_NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70,
+    "eighty": 80, "ninety": 90,
+}
+_MULTIPLIERS = {"hundred": 100, "thousand": 1000}
+
+
+def tokenize(text):
+    """Lower-case word tokens. Matching on whole tokens gives word boundaries for free."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _parse_int(tokens):
+    """ "42", "forty two" or "two hundred and five"; a multiplier scales the words before it."""
+    if len(tokens) == 1 and tokens[0].isdigit():
+        return int(tokens[0])
+    total, current, seen = 0, 0, False
+    for token in tokens:
+        if token in _NUMBER_WORDS:
+            current += _NUMBER_WORDS[token]
+        elif token == "a" and not seen:
+            current = 1 # "a hundred"
+        elif token in _MULTIPLIERS:
+            current = (current or 1) * _MULTIPLIERS[token]
+            if token == "thousand":
+                total, current = total + current, 0
+        elif token == "and" and seen:
+            continue
+        else:
+            return None
+        seen = True
+    return total + current if seen else None
+
+
+def _parse_percent(tokens):
+    value = _parse_int(tokens)
+    return value if value is not None and 0 <= value <= 100 else None
+
+# Slot types: turn the slot's tokens into a value, or None if they don't fit
+SLOT_TYPES = {
+    "text": lambda tokens: " ".join(tokens),
+    "int": _parse_int,
+    "percent": _parse_percent, # 0-100, e.g. a volume level
+}
+
+
+class _Slot:
+    __slots__ = ("name", "type")
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+class Pattern(NamedTuple):
+    """A parsed pattern: alternating literal token runs and slots."""
+    command: "Command"
+    elements: tuple # tuple[str, ...] for literal runs, _Slot for slots
+    literal_count: int # Literal tokens, used to prefer the most specific match
+
+
+class Command(NamedTuple):
+    name: str
+    handler: Callable # handler(slots: dict) -> result
+    requires: frozenset # Words that must appear somewhere in the utterance
+    reply: str | None # Fixed spoken reply, if the command always says the same thing
+    priority: int
+
+
+class IntentMatch(NamedTuple):
+    command: Command
+    slots: dict
+    exact: bool # The pattern covered the whole utterance (ignoring filler words)
+
+
+class CommandRegistry:
+    """
+    Commands declare patterns such as "set volume to {level:int}" or "flirt with {contact}".
+    compile() turns the literal word runs of every pattern into one Aho-Corasick automaton,
+    so a single pass over the utterance finds every candidate, however many commands are
+    registered. Only patterns whose literals were all seen are then checked in detail.
+    """
+    def __init__(self, filler_words=()):
+        self.commands = {}
+        self.filler_words = frozenset(filler_words)
+        self._patterns = []
+        self._compiled = False
+
+    def register(self, name, patterns, handler, requires=(), reply=None, priority=0):
+        if name in self.commands:
+            raise ValueError(f"Command '{name}' is already registered.")
+        command = Command(name, handler, frozenset(requires), reply, priority)
+        self.commands[name] = command
+        for pattern in patterns:
+            self._patterns.append(self._parse(command, pattern))
+        self._compiled = False
+        return command
+
+    def command(self, name, *patterns, requires=(), reply=None, priority=0):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(name, patterns, handler, requires, reply, priority)
+            return handler
+        return decorator
+
+    @staticmethod
+    def _parse(command, pattern):
+        elements, run = [], []
+        for word in pattern.split():
+            slot = _SLOT_RE.match(word)
+            if slot:
+                if run:
+                    elements.append(tuple(run))
+                    run = []
+                slot_type = slot.group(2) or "text"
+                if slot_type not in SLOT_TYPES:
+                    raise ValueError(f"Unknown slot type '{slot_type}' in pattern '{pattern}'.")
+                if elements and isinstance(elements[-1], _Slot):
+                    raise ValueError(f"Adjacent slots are ambiguous in pattern '{pattern}'.")
+                elements.append(_Slot(slot.group(1), slot_type))
+            else:
+                run.extend(tokenize(word))
+        if run:
+            elements.append(tuple(run))
+        literal_count = sum(len(e) for e in elements if not isinstance(e, _Slot))
+        if not literal_count:
+            raise ValueError(f"Pattern '{pattern}' needs at least one literal word.")
+        return Pattern(command, tuple(elements), literal_count)
+
+    def vocabulary(self):
+        """Every literal word used by a registered pattern."""
+        return {token for p in self._patterns for e in p.elements if not isinstance(e, _Slot) for token in e}
+
+    def compile(self):
+        """Builds the automaton. Called automatically on the first match after a change."""
+        goto = [{}]
+        outputs = [[]]
+        for pattern_id, pattern in enumerate(self._patterns):
+            run_index = 0
+            for element in pattern.elements:
+                if isinstance(element, _Slot):
+                    continue
+                state = 0
+                for token in element:
+                    nxt = goto[state].get(token)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][token] = nxt
+                        goto.append({})
+                        outputs.append([])
+                    state = nxt
+                outputs[state].append((pattern_id, run_index, len(element)))
+                run_index += 1
+
+        # Failure links, breadth first. Root children fail to the root
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and token not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(token, 0)
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        self._goto, self._fail, self._outputs = goto, fail, outputs
+        self._run_counts = [sum(not isinstance(e, _Slot) for e in p.elements) for p in self._patterns]
+        self._compiled = True
+
+    def _scan(self, tokens):
+        """One pass over the tokens. Returns {pattern_id: {run_index: [start positions]}}."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        hits = {}
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for pattern_id, run_index, length in outputs[state]:
+                hits.setdefault(pattern_id, {}).setdefault(run_index, []).append(position - length + 1)
+        return hits
+
+    @staticmethod
+    def _slot_value(slot, tokens):
+        return SLOT_TYPES[slot.type](tokens) if tokens else None
+
+    def _trim(self, tokens, leading):
+        """Drops filler words between a slot and the edge of the utterance ("... to 30 please")."""
+        if leading:
+            while tokens and tokens[0] in self.filler_words:
+                tokens = tokens[1:]
+        else:
+            while tokens and tokens[-1] in self.filler_words:
+                tokens = tokens[:-1]
+        return tokens
+
+    def _fit(self, pattern, runs, tokens):
+        """
+        Fits the slots between the literal hits found by the scan.
+        Returns (slots, start, end) for the first placement that works, or None.
+        """
+        elements = pattern.elements
+        leading = elements[0] if isinstance(elements[0], _Slot) else None
+        body = elements[1:] if leading else elements
+        for anchor in runs[0]:
+            slots = {}
+            if leading:
+                value = self._slot_value(leading, self._trim(tokens[:anchor], leading=True))
+                if value is None:
+                    continue
+                slots[leading.name] = value
+            position, run_index, fitted = anchor, 0, True
+            for i, element in enumerate(body):
+                if not isinstance(element, _Slot):
+                    position += len(element)
+                    run_index += 1
+                    continue
+                # A slot runs up to the next hit of the following literal run, or to the end
+                if i + 1 < len(body):
+                    end = next((s for s in runs[run_index] if s > position), None)
+                    value = self._slot_value(element, tokens[position:end]) if end is not None else None
+                else:
+                    end = len(tokens)
+                    value = self._slot_value(element, self._trim(tokens[position:end], leading=False))
+                if value is None:
+                    fitted = False
+                    break
+                slots[element.name] = value
+                position = end
+            if fitted:
+                return slots, 0 if leading else anchor, position
+        return None
+
+    def match(self, text):
+        """Returns the best IntentMatch for the utterance, or None."""
+        if not self._compiled:
+            self.compile()
+        tokens = tokenize(text)
+        token_set = set(tokens)
+        best, best_key = None, None
+        for pattern_id, runs in self._scan(tokens).items():
+            pattern = self._patterns[pattern_id]
+            if len(runs) < self._run_counts[pattern_id] or not pattern.command.requires <= token_set:
+                continue
+            fitted = self._fit(pattern, runs, tokens)
+            if fitted is None:
+                continue
+            slots, start, end = fitted
+            key = (pattern.command.priority, pattern.literal_count, end - start)
+            if best_key is None or key > best_key:
+                outside = tokens[:start] + tokens[end:]
+                exact = all(t in self.filler_words or t in pattern.command.requires for t in outside)
+                best, best_key = IntentMatch(pattern.command, slots, exact), key
+        return best
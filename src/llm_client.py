@@ -0,0 +1,123 @@
+# src/llm_client.py (One pooled Groq client for the whole process)
+import time
+import random
+import asyncio
+import threading
+import httpx
+from groq import Groq, AsyncGroq, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from src.config import GROQ_API_KEY, GROQ_BASE_URL, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_POOL_SIZE
+
+# Errors worth retrying: the request may well succeed a moment later
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+BACKOFF_BASE = 0.25 # Seconds
+BACKOFF_CAP = 4.0
+
+_lock = threading.Lock()
+_http_client = None
+_client = None
+_async_clients = {} # One per event loop, async connections cannot move between loops
+
+
+def _pool_limits():
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE, keepalive_expiry=120)
+
+
+def get_client():
+    """
+    The process-wide Groq client. Its httpx pool keeps connections alive between calls,
+    so only the first request of a session pays for the TCP + TLS handshake.
+    """
+    global _client, _http_client
+    with _lock:
+        if _client is None:
+            if not GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY is not set in the .env file.")
+            _http_client = httpx.Client(limits=_pool_limits(), timeout=LLM_TIMEOUT)
+            # Retries are done here, with jitter, instead of inside the SDK
+            _client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=_http_client, max_retries=0)
+        return _client
+
+
+def get_async_client():
+    """The AsyncGroq client for the running event loop, with its own keep-alive pool."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            if not GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY is not set in the .env file.")
+            http_client = httpx.AsyncClient(limits=_pool_limits(), timeout=LLM_TIMEOUT)
+            client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
+            _async_clients[loop] = client
+        return client
+
+
+def get_chat_model(model, temperature=0, **kwargs):
+    """A LangChain ChatGroq that sends its requests through the shared connection pool."""
+    from langchain_groq import ChatGroq
+    get_client() # Makes sure the shared pool exists
+    return ChatGroq(
+        model=model,
+        temperature=temperature,
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=_http_client,
+        **kwargs,
+    )
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter, so retrying callers don't stampede together."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def chat_completion(messages, model, timeout=LLM_TIMEOUT, retries=LLM_MAX_RETRIES, **kwargs):
+    """chat.completions.create on the shared client, with a per-call timeout and retries."""
+    client = get_client()
+    for attempt in range(retries + 1):
+        try:
+            return client.chat.completions.create(messages=messages, model=model, timeout=timeout, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s...")
+            time.sleep(delay)
+
+
+async def achat_completion(messages, model, timeout=LLM_TIMEOUT, retries=LLM_MAX_RETRIES, **kwargs):
+    """Async version of chat_completion."""
+    client = get_async_client()
+    for attempt in range(retries + 1):
+        try:
+            return await client.chat.completions.create(messages=messages, model=model, timeout=timeout, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+
+
+async def astream_chat_completion(messages, model, timeout=LLM_TIMEOUT, retries=LLM_MAX_RETRIES, **kwargs):
+    """
+    Streaming achat_completion: yields the response chunks as the model produces them.
+    Only opening the stream is retried, once chunks have been yielded a failure is raised.
+    """
+    client = get_async_client()
+    for attempt in range(retries + 1):
+        try:
+            stream = await client.chat.completions.create(
+                messages=messages, model=model, timeout=timeout, stream=True, **kwargs)
+            break
+        except RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+    async with stream:
+        async for chunk in stream:
+            yield chunk
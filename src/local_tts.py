@@ -1,66 +1,354 @@
-# src/local_tts.py
-import torch
-import sounddevice as sd
-import numpy as np
-import json
-from TTS.api import TTS
-from piper.voice import PiperVoice
-
-class LocalTTS:
-    def __init__(self):
-        print("Initializing Local TTS Engines...")
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {self.device}")
-
-        print("Loading Coqui XTTS model...")
-        try:
-            model_name = "tts_models/multilingual/multi-dataset/xtts_v2"
-            self.primary_voice = TTS(model_name).to(self.device)
-            self.speaker_wav_path = "my_voice.wav"
-            print("Coqui XTTS model loaded successfully.")
-        except Exception as e:
-            print(f"Could not load Coqui TTS model. Primary voice will be disabled. Error: {e}")
-            self.primary_voice = None
-
-        print("Loading Piper feedback voice model...")
-        try:
-            model_path = "piper_models/en_US-lessac-medium.onnx"
-            config_path = "piper_models/en_US-lessac-medium.onnx.json"            
-            with open(config_path, "r", encoding="utf-8") as f:
-                config_data = json.load(f)
-            self.feedback_voice = PiperVoice(model_path, config=config_data)
-            if self.device == "cuda":
-                self.feedback_voice.to(self.device)
-            print("Piper model loaded successfully.")
-        except Exception as e:
-            print(f"Could not load Piper model. Feedback voice will be disabled. Error: {e}")
-            self.feedback_voice = None
-
-    def _play_audio(self, audio_data, sample_rate):
-        sd.play(np.frombuffer(audio_data, dtype=np.int16), samplerate=sample_rate)
-        sd.wait()
-
-    def speak_primary(self, text: str, language: str = "en"):
-        if not self.primary_voice:
-            print("Primary voice is not available.")
-            self.speak_feedback("My main voice is currently unavailable.")
-            return
-        print(f"Speaking (Coqui XTTS): {text}")
-        try:
-            wav_out = self.primary_voice.tts(text=text, speaker_wav=self.speaker_wav_path, language=language, split_sentences=True)
-            sd.play(np.array(wav_out), samplerate=24000)
-            sd.wait()
-        except Exception as e:
-            print(f"Error during Coqui TTS generation: {e}")
-            self.speak_feedback("I encountered an error with my voice synthesis.")
-
-    def speak_feedback(self, text: str):
-        if not self.feedback_voice:
-            print(f"Feedback voice not available. Cannot speak: '{text}'")
-            return
-        print(f"Speaking (Piper): {text}")
-        try:
-            audio_bytes = b"".join(self.feedback_voice.synthesize(text))
-            self._play_audio(audio_bytes, self.feedback_voice.config.sample_rate)
-        except Exception as e:
+# src/local_tts.py
+import os
+import re
+import copy
+import time
+import queue
+import threading
+import contextvars
+import numpy as np
+import json
+from src.config import TTS_PIPELINED, TTS_PIPELINE_DEPTH, TTS_CACHE_DIR, TTS_PLAYBACK_BLOCK_MS, TTS_WORKER
+from src.tts_cache import AudioCache, file_digest
+from src.tracing import tracer
+
+XTTS_SAMPLE_RATE = 24000
+
+# Phrases the assistant is known to say, synthesized at startup so they play instantly
+WAKE_ACKNOWLEDGEMENT = "Yes?"
+PRIMARY_UNAVAILABLE_MESSAGE = "My main voice is currently unavailable."
+SYNTHESIS_ERROR_MESSAGE = "I encountered an error with my voice synthesis."
+UNEXPECTED_ERROR_MESSAGE = "I have run into an unexpected error."
+FEEDBACK_PHRASES = (WAKE_ACKNOWLEDGEMENT, PRIMARY_UNAVAILABLE_MESSAGE, SYNTHESIS_ERROR_MESSAGE, UNEXPECTED_ERROR_MESSAGE)
+
+class LocalTTS:
+    def __init__(self, worker=TTS_WORKER):
+        print("Initializing Local TTS Engines...")
+        self.last_time_to_first_audio = None
+        self.last_interrupt_to_silence = None
+        self.on_playback = [] # Called with the level (RMS, 0-1) of every block played, e.g. for echo suppression
+        self._interrupt = threading.Event()
+        self._interrupted_at = None
+        self.cache = AudioCache()
+        self._primary_lock = threading.Lock() # Prewarming and speaking share the models
+        self._feedback_lock = threading.Lock()
+        self.worker = None
+        if worker:
+            self._start_worker()
+            return
+
+        # torch, Coqui TTS and Piper take seconds to import, so they load with the engines
+        import torch
+        from TTS.api import TTS
+        from piper.voice import PiperVoice
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"Using device: {self.device}")
+
+        print("Loading Coqui XTTS model...")
+        try:
+            model_name = "tts_models/multilingual/multi-dataset/xtts_v2"
+            self.primary_voice = TTS(model_name).to(self.device)
+            self.speaker_wav_path = "my_voice.wav"
+            self._load_speaker_conditioning()
+            print("Coqui XTTS model loaded successfully.")
+        except Exception as e:
+            print(f"Could not load Coqui TTS model. Primary voice will be disabled. Error: {e}")
+            self.primary_voice = None
+
+        print("Loading Piper feedback voice model...")
+        try:
+            model_path = "piper_models/en_US-lessac-medium.onnx"
+            config_path = "piper_models/en_US-lessac-medium.onnx.json"            
+            with open(config_path, "r", encoding="utf-8") as f:
+                config_data = json.load(f)
+            self.feedback_voice = PiperVoice(model_path, config=config_data)
+            self.feedback_voice_id = os.path.basename(model_path)
+            self.feedback_sample_rate = self.feedback_voice.config.sample_rate
+            if self.device == "cuda":
+                self.feedback_voice.to(self.device)
+            print("Piper model loaded successfully.")
+        except Exception as e:
+            print(f"Could not load Piper model. Feedback voice will be disabled. Error: {e}")
+            self.feedback_voice = None
+
+    def _start_worker(self):
+        """
+        Hosts the engines in a TTSWorker process instead, so inference cannot starve audio
+        capture of the CPU or the GIL. The worker stands in for both voices; sentences are
+        then split by the regex in _split_sentences.
+        """
+        from src.tts_worker import TTSWorker
+        self.worker = TTSWorker()
+        try:
+            engines = self.worker.start()
+        except RuntimeError as e:
+            print(f"Could not start the TTS worker. Both voices will be disabled. Error: {e}")
+            engines = {"primary": False, "feedback": False, "speaker_id": None,
+                       "feedback_voice_id": None, "feedback_sample_rate": None}
+        self.primary_voice = self.worker if engines["primary"] else None
+        self.feedback_voice = self.worker if engines["feedback"] else None
+        self.speaker_id = engines["speaker_id"]
+        self.feedback_voice_id = engines["feedback_voice_id"]
+        self.feedback_sample_rate = engines["feedback_sample_rate"]
+
+    def _load_speaker_conditioning(self):
+        """
+        XTTS derives the speaker's voice from the reference WAV. That only has to happen
+        once per WAV, so the latents are persisted next to the audio cache, keyed by the
+        file's content hash.
+        """
+        self.speaker_id = file_digest(self.speaker_wav_path)[:16]
+        latents_path = os.path.join(TTS_CACHE_DIR, f"xtts_speaker_{self.speaker_id}.pt")
+        if os.path.exists(latents_path):
+            latents = self.torch.load(latents_path, map_location=self.device)
+            print("Loaded cached XTTS speaker conditioning.")
+        else:
+            print("Computing XTTS speaker conditioning (one-time)...")
+            gpt_cond_latent, speaker_embedding = self.primary_voice.synthesizer.tts_model.get_conditioning_latents(
+                audio_path=[self.speaker_wav_path]
+            )
+            latents = {"gpt_cond_latent": gpt_cond_latent, "speaker_embedding": speaker_embedding}
+            os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+            self.torch.save(latents, latents_path)
+        self.gpt_cond_latent = latents["gpt_cond_latent"]
+        self.speaker_embedding = latents["speaker_embedding"]
+
+    def _synthesize_primary(self, sentence, language):
+        """One sentence of XTTS audio as float32, from the cache when possible."""
+        cached = self.cache.get("xtts", self.speaker_id, language, sentence)
+        if cached is not None:
+            return cached[0]
+        with tracer.span("synthesis"), self._primary_lock:
+            wav = self._infer_primary(sentence, language)
+        self.cache.put("xtts", self.speaker_id, language, sentence, wav, XTTS_SAMPLE_RATE)
+        return wav
+
+    def _synthesize_feedback(self, text):
+        """Piper audio as int16, from the cache when possible."""
+        cached = self.cache.get("piper", self.feedback_voice_id, None, text)
+        if cached is not None:
+            return cached[0]
+        with self._feedback_lock:
+            audio = self._infer_feedback(text)
+        self.cache.put("piper", self.feedback_voice_id, None, text, audio, self.feedback_sample_rate)
+        return audio
+
+    def _infer_primary(self, sentence, language):
+        """XTTS inference for one sentence, in the worker process if there is one."""
+        if self.worker:
+            return self.worker.synthesize("primary", sentence, language)
+        out = self.primary_voice.synthesizer.tts_model.inference(
+            sentence, language, self.gpt_cond_latent, self.speaker_embedding
+        )
+        return np.asarray(out["wav"], dtype=np.float32)
+
+    def _infer_feedback(self, text):
+        if self.worker:
+            return self.worker.synthesize("feedback", text)
+        return np.frombuffer(b"".join(self.feedback_voice.synthesize(text)), dtype=np.int16)
+
+    def prewarm(self, primary_phrases=(), feedback_phrases=FEEDBACK_PHRASES, language="en"):
+        """Synthesizes phrases we know we will need, so the first use is a cache hit."""
+        started = time.perf_counter()
+        count = 0
+        for phrase in feedback_phrases if self.feedback_voice else ():
+            self._synthesize_feedback(phrase)
+            count += 1
+        for phrase in primary_phrases if self.primary_voice else ():
+            for sentence in self._split_sentences(phrase):
+                self._synthesize_primary(sentence, language)
+                count += 1
+        print(f"TTS cache prewarmed with {count} phrases in {time.perf_counter() - started:.1f}s.")
+
+    def _first_audio(self, start):
+        self.last_time_to_first_audio = time.perf_counter() - start
+        print(f"Time to first audio: {self.last_time_to_first_audio:.2f}s")
+        tracer.record("first audio", self.last_time_to_first_audio)
+
+    def interrupt(self):
+        """Stops playback within one block and drops the sentences waiting behind it (barge-in)."""
+        self._interrupted_at = time.perf_counter()
+        self._interrupt.set()
+
+    @property
+    def interrupted(self):
+        return self._interrupt.is_set()
+
+    def _open_output_stream(self, sample_rate=XTTS_SAMPLE_RATE, dtype="float32"):
+        # Imported here so a voice streaming to network clients does not need an audio device
+        import sounddevice as sd
+        return sd.OutputStream(samplerate=sample_rate, channels=1, dtype=dtype)
+
+    def with_output(self, open_output_stream):
+        """
+        A LocalTTS sharing this one's loaded voices, cache and model locks, that plays into
+        `open_output_stream(sample_rate=XTTS_SAMPLE_RATE, dtype="float32")` instead of the
+        speakers and has its own playback state. The server gives one to each client.
+        """
+        voice = copy.copy(self)
+        voice._open_output_stream = open_output_stream
+        voice.on_playback = []
+        voice._interrupt = threading.Event()
+        voice._interrupted_at = None
+        voice.last_time_to_first_audio = None
+        voice.last_interrupt_to_silence = None
+        return voice
+
+    def _write_blocks(self, stream, audio, sample_rate):
+        """Plays audio in short blocks so it can be cut off mid-sentence. False if interrupted."""
+        block = max(1, int(sample_rate * TTS_PLAYBACK_BLOCK_MS / 1000))
+        full_scale = 32768.0 if audio.dtype == np.int16 else 1.0
+        for start in range(0, len(audio), block):
+            if self._interrupt.is_set():
+                stream.abort() # Drops what the device still has buffered
+                self.last_interrupt_to_silence = time.perf_counter() - self._interrupted_at
+                print(f"Speech interrupted, silent after {self.last_interrupt_to_silence * 1000:.0f}ms.")
+                tracer.record("interrupt to silence", self.last_interrupt_to_silence)
+                return False
+            chunk = audio[start:start + block]
+            stream.write(chunk.reshape(-1, 1))
+            if self.on_playback:
+                level = float(np.sqrt(np.mean(np.square(chunk, dtype=np.float32)))) / full_scale
+                for listener in self.on_playback:
+                    listener(level)
+        return True
+
+    def _play_audio(self, audio_data, sample_rate):
+        with self._open_output_stream(sample_rate, audio_data.dtype.name) as stream:
+            return self._write_blocks(stream, audio_data, sample_rate)
+
+    def _split_sentences(self, text):
+        try:
+            return self.primary_voice.synthesizer.split_into_sentences(text)
+        except Exception:
+            return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+    @staticmethod
+    def _put_chunk(chunks, item, stop):
+        """Waits for room in the queue unless playback has been abandoned."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _synthesize_sentences(self, sentences, language, chunks, stop):
+        """Producer: synthesizes one sentence at a time into the bounded `chunks` queue."""
+        try:
+            for sentence in sentences: # May be a stream, pulled here while the caller plays audio
+                if stop.is_set():
+                    return
+                wav = self._synthesize_primary(sentence, language)
+                if not self._put_chunk(chunks, (sentence, wav), stop):
+                    return
+        except Exception as e:
+            self._put_chunk(chunks, e, stop)
+        finally:
+            if stop.is_set() and hasattr(sentences, "close"):
+                sentences.close() # Playback was cut short, stop generating the rest
+        self._put_chunk(chunks, None, stop) # End of utterance
+
+    def _speak_pipelined(self, sentences, language, started_at=None):
+        """
+        Plays sentence N while a worker synthesizes sentence N+1. Chunks are written back to
+        back into one output stream, so playback is gapless as long as synthesis keeps up.
+        `sentences` can be any iterable, including one still being generated. Returns the
+        sentences played to the end.
+        """
+        start = time.perf_counter() if started_at is None else started_at
+        chunks = queue.Queue(maxsize=TTS_PIPELINE_DEPTH)
+        stop = threading.Event()
+        spoken = []
+        # In the caller's context, so synthesis is traced as part of its turn
+        producer = threading.Thread(target=contextvars.copy_context().run,
+                                    args=(self._synthesize_sentences, sentences, language, chunks, stop), daemon=True)
+        producer.start()
+
+        try:
+            with self._open_output_stream() as stream:
+                first = True
+                while not self._interrupt.is_set():
+                    try:
+                        chunk = chunks.get(timeout=0.05)
+                    except queue.Empty:
+                        continue
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    sentence, wav = chunk
+                    if first:
+                        self._first_audio(start)
+                        first = False
+                    if not self._write_blocks(stream, wav, XTTS_SAMPLE_RATE):
+                        break
+                    spoken.append(sentence)
+        finally:
+            # Lets the producer give up if we stopped early (barge-in or a playback error)
+            stop.set()
+        return spoken
+
+    def speak_primary(self, text: str, language: str = "en"):
+        if not self.primary_voice:
+            print("Primary voice is not available.")
+            self.speak_feedback(PRIMARY_UNAVAILABLE_MESSAGE)
+            return
+        print(f"Speaking (Coqui XTTS): {text}")
+        self._interrupt.clear()
+        try:
+            if TTS_PIPELINED:
+                self._speak_pipelined(self._split_sentences(text), language)
+                return
+            start = time.perf_counter()
+            wav_out = np.concatenate([self._synthesize_primary(s, language) for s in self._split_sentences(text)])
+            self._first_audio(start)
+            self._play_audio(wav_out, XTTS_SAMPLE_RATE)
+        except Exception as e:
+            print(f"Error during Coqui TTS generation: {e}")
+            self.speak_feedback(SYNTHESIS_ERROR_MESSAGE)
+
+    def speak_stream(self, sentences, language: str = "en", started_at=None):
+        """
+        Speaks sentences as they arrive, e.g. iter_sentences() over a streamed LLM answer,
+        so the first one plays while the model is still writing the rest. With `started_at`
+        (perf_counter() when the request began) last_time_to_first_audio is the time to the
+        first spoken word. Returns the text that was actually heard, which stops at a barge-in.
+        """
+        if not self.primary_voice:
+            print("Primary voice is not available.")
+            self.speak_feedback(PRIMARY_UNAVAILABLE_MESSAGE)
+            return " ".join(sentences)
+        spoken = []
+        self._interrupt.clear()
+        try:
+            if TTS_PIPELINED:
+                spoken = self._speak_pipelined(sentences, language, started_at)
+            else:
+                start = time.perf_counter() if started_at is None else started_at
+                for sentence in sentences:
+                    wav = self._synthesize_primary(sentence, language)
+                    if not spoken:
+                        self._first_audio(start)
+                    if not self._play_audio(wav, XTTS_SAMPLE_RATE):
+                        break
+                    spoken.append(sentence)
+        except Exception as e:
+            print(f"Error during Coqui TTS generation: {e}")
+            self.speak_feedback(SYNTHESIS_ERROR_MESSAGE)
+        text = " ".join(spoken)
+        print(f"Spoke (Coqui XTTS, streamed): {text}")
+        return text
+
+    def speak_feedback(self, text: str):
+        if not self.feedback_voice:
+            print(f"Feedback voice not available. Cannot speak: '{text}'")
+            return
+        print(f"Speaking (Piper): {text}")
+        self._interrupt.clear()
+        try:
+            self._play_audio(self._synthesize_feedback(text), self.feedback_sample_rate)
+        except Exception as e:
             print(f"Error during Piper TTS generation: {e}")
\ No newline at end of file
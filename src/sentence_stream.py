@@ -0,0 +1,59 @@
+# src/sentence_stream.py (Cuts streamed LLM text into sentences for speech synthesis)
+import re
+from src.config import TTS_MIN_SENTENCE_CHARS, TTS_MAX_SENTENCE_CHARS
+
+# End of a sentence: . ! ? (and any closing quote or bracket) followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+# Words whose trailing period doesn't end the sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx"}
+# Abbreviations only when a number follows: "No. 5", but "No. I can't."
+_NUMBER_ABBREVIATIONS = {"no"}
+
+
+def _ends_with_abbreviation(text, following):
+    if not text.endswith("."):
+        return False
+    word = text[:-1].rsplit(None, 1)[-1].lower() if text[:-1].strip() else ""
+    if word in _NUMBER_ABBREVIATIONS:
+        following = following.lstrip()
+        return not following or following[0].isdigit() # Nothing after it yet: wait for the next chunk
+    return word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()) # "J. R. R. Tolkien"
+
+
+def _cut_point(buffer, min_chars, max_chars):
+    """Index just past the first complete sentence in `buffer`, or None."""
+    for match in _SENTENCE_END.finditer(buffer):
+        sentence = buffer[:match.end()].strip()
+        if len(sentence) >= min_chars and not _ends_with_abbreviation(sentence, buffer[match.end():]):
+            return match.end()
+    if len(buffer) > max_chars:
+        # A long run-on sentence or a list: better cut at a pause than wait
+        cut = max(buffer.rfind(", ", 0, max_chars), buffer.rfind("; ", 0, max_chars))
+        if cut <= 0:
+            cut = buffer.rfind(" ", 0, max_chars)
+        return cut + 1 if cut > 0 else max_chars
+    return None
+
+
+def iter_sentences(chunks, min_chars=TTS_MIN_SENTENCE_CHARS, max_chars=TTS_MAX_SENTENCE_CHARS):
+    """
+    Joins streamed text chunks and yields each sentence as soon as it is complete,
+    so speech can start while the rest is still being generated. Whatever is left
+    when the stream ends is yielded last. Closing this generator closes `chunks`.
+    """
+    buffer = ""
+    try:
+        for chunk in chunks:
+            buffer += chunk
+            while True:
+                cut = _cut_point(buffer, min_chars, max_chars)
+                if cut is None:
+                    break
+                sentence, buffer = buffer[:cut].strip(), buffer[cut:]
+                if sentence:
+                    yield sentence
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close() # Closed early (e.g. speech was interrupted): stop the generation too
+    if buffer.strip():
+        yield buffer.strip()
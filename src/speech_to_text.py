@@ -1,109 +1,175 @@
-# src/speech_to_text.py (Using Groq Whisper API + VAD)
-import os
-import io
-import numpy as np
-import pyaudio
-import webrtcvad
-from collections import deque
-from scipy.io.wavfile import write as write_wav
-from groq import Groq
-from src.config import GROQ_API_KEY
-
-# A comprehensive list of hints to guide Whisper's transcription
-WHISPER_HINTS = "TAM-VA, Notepad, Chrome, VS Code, Aswin, Parthiban, Asin, Ai&Ds, volume, open, close, search, find, play, stop, email, Tamil, Tanglish, file, folder, weather, news, calculator, send, message, flirt with, chat with."
-
-class SpeechToText:
-    def __init__(self, model_size=None): # model_size is unused here, kept for consistency
-        print("Initializing Groq Whisper Speech-to-Text...")
-        if not GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY is not set in the .env file.")
-        
-        try:
-            self.client = Groq(api_key=GROQ_API_KEY)
-            print("Groq client initialized successfully.")
-        except Exception as e:
-            print(f"FATAL: Could not initialize Groq client. Error: {e}")
-            self.client = None
-        
-        # VAD constants for capturing clean audio
-        self.FORMAT = pyaudio.paInt16
-        self.CHANNELS = 1
-        self.RATE = 16000 # Whisper is trained on 16kHz audio
-        self.FRAME_DURATION_MS = 30
-        self.CHUNK = int(self.RATE * self.FRAME_DURATION_MS / 1000)
-        self.VAD_AGGRESSIVENESS = 3
-        self.SILENCE_FRAMES_THRESHOLD = 35 # Stop after ~1 second of silence
-
-    def _record_audio_with_vad(self):
-        """
-        Uses Voice Activity Detection (VAD) to record audio only when speech is detected.
-        Returns the recorded audio as a NumPy array.
-        """
-        print("Listening for command (VAD enabled)...")
-        vad = webrtcvad.Vad(self.VAD_AGGRESSIVENESS)
-        pa = pyaudio.PyAudio()
-        stream = pa.open(format=self.FORMAT, channels=self.CHANNELS, rate=self.RATE, input=True, frames_per_buffer=self.CHUNK)
-        
-        frames = deque()
-        is_speaking = False
-        silent_frames_count = 0
-        
-        while True:
-            data = stream.read(self.CHUNK)
-            if vad.is_speech(data, self.RATE):
-                if not is_speaking:
-                    print("Speech detected...")
-                is_speaking = True
-                silent_frames_count = 0
-                frames.append(data)
-            elif is_speaking:
-                silent_frames_count += 1
-                frames.append(data)
-            
-            if is_speaking and silent_frames_count > self.SILENCE_FRAMES_THRESHOLD:
-                print("Silence detected, stopping recording.")
-                break
-        
-        stream.stop_stream()
-        stream.close()
-        pa.terminate()
-
-        # Combine frames into a single byte string
-        audio_data = b"".join(list(frames))
-        
-        # Convert byte string to NumPy array
-        audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-        return audio_np
-
-    def listen_and_transcribe(self):
-        if not self.client:
-            return "Speech-to-text service is not available."
-            
-        audio_np = self._record_audio_with_vad()
-
-        if len(audio_np) < self.RATE / 2: # Ignore recordings less than 0.5s
-            print("Recording too short, ignoring.")
-            return ""
-
-        # Create an in-memory WAV file from the NumPy array
-        wav_bytes = io.BytesIO()
-        write_wav(wav_bytes, self.RATE, (audio_np * 32767).astype(np.int16))
-        wav_bytes.seek(0)
-        # We need to give the in-memory file a name for the API
-        wav_bytes.name = "recording.wav"
-
-        print("Sending audio to Groq Cloud for transcription...")
-        try:
-            transcription = self.client.audio.transcriptions.create(
-                file=("recording.wav", wav_bytes),
-                model="whisper-large-v3",
-                prompt=WHISPER_HINTS, # Provide contextual hints
-                language="en"
-            )
-            
-            print(f"Transcription: '{transcription.text}'")
-            return transcription.text.strip()
-            
-        except Exception as e:
-            print(f"Groq Whisper API error: {e}")
-            return ""
\ No newline at end of file
+# src/speech_to_text.py (Whisper via pluggable backends + VAD)
+import time
+import webrtcvad
+from concurrent.futures import ThreadPoolExecutor
+from src.config import STT_BACKEND, STT_PREROLL_MS, STT_STREAMING, STT_SEGMENT_PAUSE_MS, STT_MIN_SEGMENT_MS
+from src.audio_capture import AudioCapture, PCMBuffer
+from src.stt_backends import create_stt_backend
+from src.tracing import tracer
+
+class SpeechToText:
+    def __init__(self, model_size="small", capture=None, streaming=STT_STREAMING, backend=None):
+        print(f"Initializing Speech-to-Text (backend: {STT_BACKEND if backend is None else backend.name})...")
+        try:
+            # model_size is used by the local Whisper backend, which is loaded once here and kept warm
+            self.backend = backend or create_stt_backend(STT_BACKEND, model_size)
+        except Exception as e:
+            print(f"FATAL: Could not initialize the STT backend. Error: {e}")
+            self.backend = None
+
+        # Audio is read from the shared microphone stream instead of opening the device per command
+        if capture is None:
+            capture = AudioCapture()
+            capture.start()
+        self.capture = capture
+
+        # VAD constants for capturing clean audio
+        self.RATE = capture.RATE # Whisper is trained on 16kHz audio
+        self.FRAME_DURATION_MS = 30
+        self.CHUNK = int(self.RATE * self.FRAME_DURATION_MS / 1000)
+        self.VAD_AGGRESSIVENESS = 3
+        self.SILENCE_FRAMES_THRESHOLD = 35 # Stop after ~1 second of silence
+        self.INITIAL_BUFFER_SECONDS = 15 # Most commands fit without the buffer ever growing
+
+        # Streaming mode: segments are cut at short pauses and transcribed while the user keeps talking
+        self.streaming = streaming
+        self.SEGMENT_PAUSE_FRAMES = max(1, STT_SEGMENT_PAUSE_MS // self.FRAME_DURATION_MS)
+        self.MIN_SEGMENT_FRAMES = max(1, STT_MIN_SEGMENT_MS // self.FRAME_DURATION_MS)
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stt-segment") if streaming else None
+        self.last_endpoint_latency = None # Seconds from end-of-speech to final text
+        self.last_avg_logprob = None # Whisper's confidence in the last transcript, if the backend reports it
+
+    def _record_audio_with_vad(self, start_position=None, on_segment=None, preroll_ms=STT_PREROLL_MS):
+        """
+        Uses Voice Activity Detection (VAD) to record audio only when speech is detected.
+        Reading starts `preroll_ms` before `start_position` (e.g. the wake word detection),
+        and up to STT_PREROLL_MS of audio preceding the speech onset is kept, so the first
+        syllable is never cut off. Pass preroll_ms=0 when the audio before `start_position`
+        is our own voice, e.g. the end of the wake acknowledgement. Returns the recorded int16 audio as a NumPy view.
+
+        Frames are read straight into a preallocated PCMBuffer, so apart from the
+        occasional growth no audio is copied or allocated per frame.
+
+        If `on_segment` is given, every stretch of speech followed by a short pause is handed
+        to it as soon as the pause is seen, and only the audio after the last cut is returned.
+        """
+        print("Listening for command (VAD enabled)...")
+        vad = webrtcvad.Vad(self.VAD_AGGRESSIVENESS)
+        cursor = self.capture.cursor(start_position, preroll_ms=preroll_ms)
+        preroll_samples = int(self.RATE * STT_PREROLL_MS / 1000)
+        audio = PCMBuffer(self.RATE * self.INITIAL_BUFFER_SECONDS)
+
+        is_speaking = False
+        silent_frames_count = 0
+        segment_start = 0 # First sample not yet handed to on_segment
+        segment_has_speech = False
+
+        while True:
+            frame = audio.reserve(self.CHUNK)
+            if cursor.readinto(frame) < self.CHUNK:
+                break
+            if vad.is_speech(memoryview(frame).cast("B"), self.RATE):
+                if not is_speaking:
+                    print("Speech detected...")
+                    segment_start = max(0, audio.length - preroll_samples)
+                is_speaking = True
+                silent_frames_count = 0
+                segment_has_speech = True
+                audio.commit(self.CHUNK)
+            elif is_speaking:
+                silent_frames_count += 1
+                audio.commit(self.CHUNK)
+                # Cut a segment at a short pause so it can be transcribed while the user keeps talking
+                if (on_segment and segment_has_speech
+                        and silent_frames_count == self.SEGMENT_PAUSE_FRAMES
+                        and audio.length - segment_start >= self.MIN_SEGMENT_FRAMES * self.CHUNK):
+                    on_segment(audio.view(segment_start))
+                    segment_start = audio.length
+                    segment_has_speech = False
+            else:
+                audio.commit(self.CHUNK)
+                # Still waiting for speech: only the pre-roll is worth keeping
+                if audio.length + self.CHUNK > audio.capacity:
+                    audio.keep_last(preroll_samples)
+
+            if is_speaking and silent_frames_count > self.SILENCE_FRAMES_THRESHOLD:
+                print("Silence detected, stopping recording.")
+                break
+
+        if not segment_has_speech:
+            # Nothing but silence since the start (or the last cut), there is nothing to transcribe
+            return audio.view(audio.length)
+        return audio.view(segment_start)
+
+    def listen_and_transcribe(self, start_position=None, preroll_ms=STT_PREROLL_MS):
+        self.last_avg_logprob = None
+        if not self.backend:
+            return "Speech-to-text service is not available."
+        if self.streaming:
+            return self._listen_and_transcribe_streaming(start_position, preroll_ms)
+
+        with tracer.span("vad capture"):
+            audio = self._record_audio_with_vad(start_position, preroll_ms=preroll_ms)
+
+        if len(audio) < self.RATE / 2: # Ignore recordings less than 0.5s
+            print("Recording too short, ignoring.")
+            return ""
+
+        print(f"Transcribing audio ({self.backend.name})...")
+        endpoint_time = time.perf_counter()
+        try:
+            with tracer.span("stt"):
+                result = self.backend.transcribe(audio)
+            text = result.text
+            self.last_avg_logprob = result.avg_logprob
+            self.last_endpoint_latency = time.perf_counter() - endpoint_time
+            print(f"Transcription: '{text}'")
+            return text
+
+        except Exception as e:
+            print(f"Whisper transcription error: {e}")
+            return ""
+
+    def _listen_and_transcribe_streaming(self, start_position=None, preroll_ms=STT_PREROLL_MS):
+        """
+        Transcribes rolling segments while the user is still talking and stitches the
+        partial transcripts together. When end-of-speech fires only the tail is outstanding.
+        """
+        pending = []
+        total_samples = 0
+
+        def submit(segment):
+            nonlocal total_samples
+            total_samples += len(segment)
+            print(f"Sending {len(segment) / self.RATE:.1f}s segment for transcription...")
+            pending.append(self._executor.submit(self.backend.transcribe, segment))
+
+        with tracer.span("vad capture"):
+            tail = self._record_audio_with_vad(start_position, on_segment=submit, preroll_ms=preroll_ms)
+        endpoint_time = time.perf_counter()
+        if len(tail) > 0:
+            total_samples += len(tail)
+            pending.append(self._executor.submit(self.backend.transcribe, tail))
+
+        if total_samples < self.RATE / 2: # Ignore recordings less than 0.5s
+            print("Recording too short, ignoring.")
+            for future in pending:
+                future.cancel()
+            return ""
+
+        parts = []
+        for future in pending:
+            try:
+                parts.append(future.result())
+            except Exception as e:
+                print(f"Whisper transcription error on segment: {e}")
+        self.last_endpoint_latency = time.perf_counter() - endpoint_time
+        # Earlier segments were transcribed while the user talked, only the wait after the endpoint counts
+        tracer.record("stt", self.last_endpoint_latency)
+
+        text = " ".join(part.text for part in parts if part.text)
+        # The transcript is only as trustworthy as its weakest segment
+        logprobs = [part.avg_logprob for part in parts if part.avg_logprob is not None]
+        self.last_avg_logprob = min(logprobs) if logprobs and len(logprobs) == len(parts) else None
+        print(f"Transcription: '{text}'")
+        return text
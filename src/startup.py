@@ -0,0 +1,99 @@
+# src/startup.py (Concurrent component initialization + startup timing profile)
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.config import STARTUP_PROFILE_PATH
+
+
+class StartupProfiler:
+    """Records the wall time of every import and init step since the process started."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.steps.append({
+                    "step": name,
+                    "start": round(begin - self.started, 3),
+                    "seconds": round(end - begin, 3),
+                    "thread": threading.current_thread().name,
+                })
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        print(f"--- Startup profile ({total:.2f}s total) ---")
+        with self._lock:
+            steps = sorted(self.steps, key=lambda s: s["start"])
+        for s in steps:
+            print(f"  {s['start']:7.2f}s +{s['seconds']:6.2f}s  {s['step']:<40} [{s['thread']}]")
+
+        # Append to a JSONL history so regressions show up across runs
+        if STARTUP_PROFILE_PATH:
+            record = {"timestamp": time.time(), "total_seconds": round(total, 3), "steps": steps}
+            try:
+                with open(STARTUP_PROFILE_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                print(f"Could not write startup profile: {e}")
+
+
+class LazyComponents:
+    """
+    Builds independent components concurrently in a thread pool. `get(name)` waits only
+    for the component that is actually needed, so the assistant can start listening
+    while slow models are still loading.
+    """
+    def __init__(self, profiler, max_workers=4):
+        self.profiler = profiler
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="init")
+        self._futures = {}
+
+    def add(self, name, factory):
+        def build():
+            with self.profiler.step(f"init {name}"):
+                return factory()
+        self._futures[name] = self._pool.submit(build)
+
+    def __contains__(self, name):
+        return name in self._futures
+
+    def get(self, name):
+        """Returns the component, blocking until it is built. Re-raises its init error."""
+        return self._futures[name].result()
+
+    def ready(self, name):
+        future = self._futures[name]
+        return future.done() and future.exception() is None
+
+    def report_when_ready(self, on_failure=None):
+        """
+        Reports each component that fails to initialize as soon as it fails, to
+        `on_failure(name, error)` if given, and prints the startup profile once every
+        component has finished (or failed).
+        """
+        def check(name, future):
+            error = future.exception()
+            if error is not None:
+                print(f"Component '{name}' failed to initialize: {error}")
+                if on_failure:
+                    on_failure(name, error)
+
+        for name, future in self._futures.items():
+            future.add_done_callback(functools.partial(check, name))
+
+        def wait_and_report():
+            wait(self._futures.values())
+            self.profiler.report()
+        threading.Thread(target=wait_and_report, daemon=True).start()
+        self._pool.shutdown(wait=False)
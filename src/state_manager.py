@@ -1,17 +1,35 @@
-class StateManager:
-    def __init__(self):
-        self.conversation_history = []
-        self.system_state = {
-            "open_applications": [],
-            "active_window": None
-        }
-
-    def add_message(self, role, content):
-        """Role can be 'user' or 'assistant'."""
-        self.conversation_history.append({"role": role, "content": content})
-
-    def get_history(self):
-        return self.conversation_history
-
-    def clear_history(self):
-        self.conversation_history = []
\ No newline at end of file
+from src.config import CONVERSATION_POLICY
+from src.conversation_store import ConversationStore
+
+class StateManager:
+    def __init__(self, store=None, session="default"):
+        if store is None:
+            summarizer = None
+            if CONVERSATION_POLICY == "summarize":
+                from src.agent.agent_planner import summarize_conversation
+                summarizer = summarize_conversation
+            # Each server client has its own session, so conversations never mix
+            store = ConversationStore(summarizer=summarizer, session=session)
+        # Persistent history; only a token-budgeted window of it reaches the agent
+        self.store = store
+        self.system_state = {
+            "open_applications": [],
+            "active_window": None
+        }
+
+    @property
+    def conversation_history(self):
+        return self.store.history()
+
+    def add_message(self, role, content):
+        """Role can be 'user' or 'assistant'."""
+        self.store.add(role, content)
+
+    def get_history(self):
+        return self.store.history()
+
+    def clear_history(self):
+        self.store.clear()
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,171 @@
+# src/stt_backends.py (Pluggable transcription engines for SpeechToText)
+import time
+import struct
+import threading
+from typing import NamedTuple
+import numpy as np
+from src.config import STT_NETWORK_TIMEOUT, STT_FALLBACK_COOLDOWN, LLM_MAX_RETRIES
+
+# A comprehensive list of hints to guide Whisper's transcription
+WHISPER_HINTS = "TAM-VA, Notepad, Chrome, VS Code, Aswin, Parthiban, Asin, Ai&Ds, volume, open, close, search, find, play, stop, email, Tamil, Tanglish, file, folder, weather, news, calculator, send, message, WhatsApp, flirt with, chat with."
+
+SAMPLE_RATE = 16000
+
+
+def encode_wav(pcm, sample_rate=SAMPLE_RATE):
+    """
+    The WAV file for int16 PCM samples: a 44-byte header and the samples, joined in one
+    copy. The upload is sent from these bytes as they are, also when it is retried.
+    """
+    data = memoryview(np.ascontiguousarray(pcm, dtype=np.int16)).cast("B")
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(data), b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", len(data),
+    )
+    return b"".join((header, data))
+
+
+class Transcription(NamedTuple):
+    text: str
+    avg_logprob: float | None = None # Mean token log-probability, None if the engine can't tell
+
+
+def _weighted_logprob(segments):
+    """Duration-weighted mean of Whisper's per-segment avg_logprob."""
+    total = weighted = 0.0
+    for seg in segments or ():
+        if seg.get("avg_logprob") is None:
+            continue
+        duration = max(float(seg.get("end", 0)) - float(seg.get("start", 0)), 0.01)
+        weighted += float(seg["avg_logprob"]) * duration
+        total += duration
+    return weighted / total if total else None
+
+
+class STTBackend:
+    """Turns 16kHz mono int16 PCM into a Transcription. Raises on failure."""
+    name = "base"
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GroqSTTBackend(STTBackend):
+    """
+    Whisper large-v3 on Groq Cloud. On its own it retries transient failures like the
+    LLM calls do; behind FallbackSTTBackend pass a short `timeout` and retries=0, so a
+    slow or failing request goes to the local model at once instead.
+    """
+    name = "groq"
+
+    def __init__(self, timeout=None, retries=LLM_MAX_RETRIES):
+        from src.llm_client import get_client
+        # Shares the process-wide connection pool (and GROQ_BASE_URL) with the LLM calls
+        self.client = get_client() if timeout is None else get_client().with_options(timeout=timeout)
+        self.retries = retries
+        print("Groq client initialized successfully.")
+
+    def transcribe(self, audio):
+        from src.llm_client import RETRYABLE_ERRORS, backoff_delay
+        upload = encode_wav(audio) # The only copy of the recording; the SDK and httpx send it as is
+        for attempt in range(self.retries + 1):
+            try:
+                # We need to give the in-memory file a name for the API.
+                transcription = self.client.audio.transcriptions.create(
+                    file=("recording.wav", upload),
+                    model="whisper-large-v3",
+                    prompt=WHISPER_HINTS, # Provide contextual hints
+                    language="en",
+                    response_format="verbose_json" # Adds per-segment log-probs, used to decide if correction is needed
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"Groq STT failed ({type(e).__name__}), retrying in {delay:.2f}s...")
+                time.sleep(delay)
+        return Transcription(transcription.text.strip(), _weighted_logprob(getattr(transcription, "segments", None)))
+
+
+class LocalWhisperBackend(STTBackend):
+    """
+    openai-whisper running on the CPU. The model is loaded once and kept warm, and
+    utterances up to 30s are decoded from a preallocated input buffer.
+    """
+    name = "local"
+
+    def __init__(self, model_size="small"):
+        import whisper
+        print(f"Loading local Whisper model '{model_size}' on CPU...")
+        self.whisper = whisper
+        self.model = whisper.load_model(model_size, device="cpu")
+        # Whisper always decodes 30s windows, so one padded buffer serves every utterance
+        self._buffer = np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32)
+        self._options = whisper.DecodingOptions(language="en", prompt=WHISPER_HINTS, fp16=False)
+        self._lock = threading.Lock() # The model and buffer are not safe to share between threads
+
+        # Warm-up decode so the first real command does not pay for lazy initialisation
+        self._decode(np.zeros(SAMPLE_RATE, dtype=np.int16))
+        print("Local Whisper model loaded and warmed up.")
+
+    def _decode(self, audio):
+        n = len(audio)
+        # int16 -> float32 straight into the reused buffer, the rest stays zero padded
+        np.multiply(audio, 1.0 / 32768.0, out=self._buffer[:n], casting="unsafe")
+        self._buffer[n:] = 0.0
+        mel = self.whisper.log_mel_spectrogram(self._buffer, n_mels=self.model.dims.n_mels) # 128 for large-v3
+        result = self.whisper.decode(self.model, mel, self._options)
+        return Transcription(result.text.strip(), result.avg_logprob)
+
+    def transcribe(self, audio):
+        with self._lock:
+            if len(audio) <= len(self._buffer):
+                return self._decode(audio)
+            # Longer than one window: let whisper slide over it
+            audio_f32 = audio.astype(np.float32) / 32768.0
+            result = self.model.transcribe(audio_f32, language="en", fp16=False, initial_prompt=WHISPER_HINTS)
+            return Transcription(result["text"].strip(), _weighted_logprob(result["segments"]))
+
+
+class FallbackSTTBackend(STTBackend):
+    """
+    Tries the primary (network) backend first and falls back to the secondary one when
+    it fails or times out. After a failure the primary is skipped for a cooldown period,
+    so a dead network costs us one timeout instead of one per command.
+    """
+    name = "auto"
+
+    def __init__(self, primary, fallback, cooldown=STT_FALLBACK_COOLDOWN):
+        self.primary = primary
+        self.fallback = fallback
+        self.cooldown = cooldown
+        self._primary_down_until = 0.0
+
+    def transcribe(self, audio):
+        if time.monotonic() >= self._primary_down_until:
+            try:
+                return self.primary.transcribe(audio)
+            except Exception as e:
+                print(f"{self.primary.name} STT failed ({e}), falling back to {self.fallback.name} for {self.cooldown:.0f}s.")
+                self._primary_down_until = time.monotonic() + self.cooldown
+        return self.fallback.transcribe(audio)
+
+
+def create_stt_backend(kind="groq", model_size="small"):
+    """Builds the backend selected by STT_BACKEND: 'groq', 'local' or 'auto' (Groq with local fallback)."""
+    if kind == "groq":
+        return GroqSTTBackend()
+    if kind == "local":
+        return LocalWhisperBackend(model_size)
+    if kind == "auto":
+        local = LocalWhisperBackend(model_size)
+        try:
+            # Retries are left to the fallback, a slow network should not be retried blindly
+            return FallbackSTTBackend(GroqSTTBackend(timeout=STT_NETWORK_TIMEOUT, retries=0), local)
+        except Exception as e:
+            print(f"Groq STT unavailable ({e}), using local Whisper only.")
+            return local
+    raise ValueError(f"Unknown STT_BACKEND '{kind}'. Use 'groq', 'local' or 'auto'.")
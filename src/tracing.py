@@ -0,0 +1,234 @@
+# src/tracing.py (Per-stage latency of every voice turn)
+import sys
+import json
+import math
+import time
+import queue
+import atexit
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import deque
+from src.config import TRACE_PATH, TRACE_WINDOW_TURNS
+
+# The stage a span runs in, so spans opened inside it (tool calls) know their parent.
+# asyncio tasks inherit it, including coroutines handed to an AsyncRunner.
+_parent = contextvars.ContextVar("trace_parent", default=None)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def stage_totals(turn_seconds, spans):
+    """Seconds per stage in one turn, a stage that ran several times (e.g. synthesis) summed."""
+    totals = {}
+    for span in spans:
+        totals[span["stage"]] = totals.get(span["stage"], 0.0) + span["seconds"]
+    totals["turn"] = turn_seconds
+    return totals
+
+
+class Turn:
+    """The spans of one voice turn, from the wake word to the end of the answer."""
+    def __init__(self, number, session=None):
+        self.number = number
+        self.session = session # The client of a server session, None for the desktop app
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.spans = []
+
+    def summary(self):
+        """One line with the turn's top-level stages, e.g. for the console."""
+        stages = stage_totals(self.seconds, [span for span in self.spans if span["parent"] is None])
+        del stages["turn"]
+        return f"Turn {self.number}: {self.seconds:.2f}s (" + ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in stages.items()) + ")"
+
+    def to_record(self):
+        record = {"turn": self.number, "timestamp": self.timestamp, "seconds": round(self.seconds, 4),
+                  "spans": self.spans}
+        if self.session is not None:
+            record["session"] = self.session
+        return record
+
+
+class Tracer:
+    """
+    Records a span per pipeline stage of each turn. The last `window` turns stay in
+    memory for p50/p95/p99 per stage; finished turns are also appended to `path` as
+    JSONL by a background thread, so the voice loop never waits for the disk.
+
+        tracer.start_turn()
+        with tracer.span("stt"):
+            ...
+        tracer.end_turn()
+
+    Spans outside a turn (benchmarks, prewarming) cost one check and are not recorded.
+    The open turn is context-local, so server sessions on their own threads each trace
+    their own turns; threads started for a turn must run in a copy of its context.
+    """
+    def __init__(self, path=TRACE_PATH, window=TRACE_WINDOW_TURNS):
+        self.path = path
+        self.turns = deque(maxlen=window)
+        self._current = contextvars.ContextVar("trace_turn", default=None)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._records = queue.Queue()
+        self._writer = None
+
+    def start_turn(self, session=None):
+        with self._lock:
+            self._count += 1
+            turn = Turn(self._count, session)
+        self._current.set(turn)
+
+    def end_turn(self):
+        """Closes the open turn, if any, and returns it."""
+        turn = self._current.get()
+        if turn is None:
+            return None
+        self._current.set(None)
+        with self._lock:
+            turn.seconds = time.perf_counter() - turn.started
+            self.turns.append(turn)
+        if self.path:
+            self._write(turn)
+        return turn
+
+    def record(self, stage, seconds, parent=None, start=None):
+        """Adds a stage measured elsewhere, e.g. how far behind the wake word was detected."""
+        turn = self._current.get()
+        if turn is None:
+            return
+        parent = parent or _parent.get()
+        now = time.perf_counter()
+        begin = now - seconds if start is None else start
+        span = {"stage": stage, "parent": parent, "start": round(begin - turn.started, 4),
+                "seconds": round(seconds, 4), "thread": threading.current_thread().name}
+        with self._lock:
+            if turn.seconds is None: # Work that outlived its turn is dropped
+                turn.spans.append(span)
+
+    @contextmanager
+    def span(self, stage, parent=None):
+        if self._current.get() is None:
+            yield
+            return
+        parent = parent or _parent.get()
+        token = _parent.set(stage)
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            _parent.reset(token)
+            self.record(stage, time.perf_counter() - begin, parent, begin)
+
+    def _write(self, turn):
+        self._records.put(turn.to_record())
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_records, name="trace-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def _write_records(self):
+        while True:
+            records = [self._records.get()]
+            while not self._records.empty():
+                records.append(self._records.get())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record) + "\n" for record in records))
+            except OSError as e:
+                print(f"Could not write turn traces: {e}")
+            for _ in records:
+                self._records.task_done()
+
+    def flush(self):
+        """Waits until every finished turn is on disk."""
+        if self._writer is not None:
+            self._records.join()
+
+    def stats(self, last=None):
+        """{stage: {"turns", "p50", "p95", "p99", "max"}} in seconds over the last `last` turns."""
+        with self._lock:
+            turns = list(self.turns)
+        if last:
+            turns = turns[-last:]
+        return stage_stats([stage_totals(turn.seconds, turn.spans) for turn in turns])
+
+    def report(self, last=20, top=10):
+        """Prints the slowest stages over the last `last` turns and returns them."""
+        stats = self.stats(last)
+        print_report(stats, min(last, len(self.turns)), top)
+        return stats
+
+
+def stage_stats(turns):
+    """Percentiles per stage from a list of stage_totals()."""
+    durations = {}
+    for stages in turns:
+        for stage, seconds in stages.items():
+            durations.setdefault(stage, []).append(seconds)
+    stats = {}
+    for stage, values in durations.items():
+        values.sort()
+        stats[stage] = {"turns": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+                        "p99": percentile(values, 99), "max": values[-1]}
+    return stats
+
+
+def slowest(stats, top=10):
+    """Stages by p95, slowest first; the whole turn is left out."""
+    return sorted(((stage, s) for stage, s in stats.items() if stage != "turn"),
+                  key=lambda item: item[1]["p95"], reverse=True)[:top]
+
+
+def print_report(stats, turns, top=10):
+    print(f"--- Slowest stages over the last {turns} turns ---")
+    if "turn" in stats:
+        t = stats["turn"]
+        print(f"  {'whole turn':<28} p50 {t['p50']:6.2f}s  p95 {t['p95']:6.2f}s  p99 {t['p99']:6.2f}s")
+    for stage, s in slowest(stats, top):
+        print(f"  {stage:<28} p50 {s['p50']:6.2f}s  p95 {s['p95']:6.2f}s  p99 {s['p99']:6.2f}s  "
+              f"max {s['max']:6.2f}s  in {s['turns']} turns")
+
+
+def spoken_summary(stats, turns):
+    """One sentence for the voice command."""
+    stages = slowest(stats, 1)
+    if not stages:
+        return "I have no timed turns yet."
+    stage, s = stages[0]
+    return (f"Over the last {turns} turns, the slowest stage is {stage}, "
+            f"at {s['p50']:.1f} seconds typically and {s['p95']:.1f} in the slow cases.")
+
+
+# The assistant's tracer, shared by every module that times a stage
+tracer = Tracer()
+
+
+def main():
+    """Summarizes a JSONL trace file: python -m src.tracing [--last 50]"""
+    parser = argparse.ArgumentParser(description="Slowest voice pipeline stages from recorded turn traces.")
+    parser.add_argument("path", nargs="?", default=TRACE_PATH)
+    parser.add_argument("--last", type=int, default=50, help="Only the most recent N turns")
+    parser.add_argument("--top", type=int, default=10, help="How many stages to list")
+    args = parser.parse_args()
+    if not args.path:
+        sys.exit("No trace file: pass one or set TRACE_PATH.")
+
+    turns = deque(maxlen=args.last)
+    with open(args.path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                turns.append(json.loads(line))
+    print_report(stage_stats([stage_totals(t["seconds"], t["spans"]) for t in turns]), len(turns), args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# src/transcript_gate.py (Decides when a transcript is worth an LLM correction)
+import re
+import time
+import threading
+from collections import OrderedDict
+from src.config import CORRECTION_LOGPROB_THRESHOLD, CORRECTION_CACHE_SIZE
+from src.command_router import registry
+from src.stt_backends import WHISPER_HINTS
+
+# Words that carry no command meaning but show up in almost every request
+_FILLER_WORDS = {
+    "a", "an", "the", "to", "for", "with", "on", "in", "of", "and", "my", "me", "i", "am",
+    "is", "it", "please", "can", "could", "you", "hey", "up", "down", "that", "what", "now",
+}
+
+
+def normalize(text):
+    """Lower-case words only, so "Open Notepad." and "open notepad" share a cache entry."""
+    return " ".join(re.findall(r"[a-z0-9&']+", text.lower()))
+
+
+def _build_vocabulary():
+    words = set(_FILLER_WORDS)
+    for phrase in WHISPER_HINTS.split(","):
+        words.update(normalize(phrase).split())
+    words.update(registry.vocabulary())
+    return words
+
+
+class CorrectionGate:
+    """
+    Runs the LLM transcription correction only when it is likely to help:
+
+    - a transcript corrected before is served from an LRU cache,
+    - a transcript made only of known command/hint vocabulary is left alone,
+    - a transcript Whisper is confident about (high average log-prob) is left alone.
+
+    Keeps counters so the skip rate and the LLM time saved can be reported.
+    """
+    def __init__(self, logprob_threshold=CORRECTION_LOGPROB_THRESHOLD, cache_size=CORRECTION_CACHE_SIZE):
+        self.logprob_threshold = logprob_threshold
+        self.cache_size = cache_size
+        self.vocabulary = _build_vocabulary()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.skips = {"cached": 0, "known vocabulary": 0, "confident": 0}
+        self.corrections = 0
+        self.correction_seconds = 0.0
+
+    def skip_reason(self, text, avg_logprob=None):
+        """Why the LLM call can be skipped, or None if the transcript should be corrected."""
+        key = normalize(text)
+        if key in self._cache:
+            return "cached"
+        if key and all(word in self.vocabulary for word in key.split()):
+            return "known vocabulary"
+        if avg_logprob is not None and avg_logprob >= self.logprob_threshold:
+            return "confident"
+        return None
+
+    def correct(self, text, avg_logprob, corrector):
+        """
+        Returns the corrected transcript, calling `corrector(text)` only if needed. A
+        corrector that fails returns None; the raw text is used then and nothing is cached,
+        so the next time that phrasing is corrected again.
+        """
+        key = normalize(text)
+        result = text
+        with self._lock:
+            reason = self.skip_reason(text, avg_logprob)
+            if reason == "cached":
+                self._cache.move_to_end(key)
+                result = self._cache[key]
+            if reason:
+                self.skips[reason] += 1
+        if reason:
+            print(f"Skipping LLM correction ({reason}). {self.report()}")
+            return result
+
+        started = time.perf_counter()
+        corrected = corrector(text)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.corrections += 1
+            self.correction_seconds += elapsed
+            if not corrected:
+                return text
+            self._cache[key] = corrected
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return corrected
+
+    def report(self):
+        skipped = sum(self.skips.values())
+        total = skipped + self.corrections
+        if not total:
+            return "No transcripts gated yet."
+        avg = self.correction_seconds / self.corrections if self.corrections else 0.0
+        return (f"Correction skip rate {skipped / total:.0%} ({skipped}/{total}), "
+                f"~{skipped * avg:.1f}s of LLM time saved (avg call {avg:.2f}s).")
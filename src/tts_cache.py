@@ -0,0 +1,129 @@
+# src/tts_cache.py (Cache of synthesized speech)
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.config import TTS_CACHE_DIR, TTS_CACHE_MEMORY_ITEMS, TTS_CACHE_DISK_MB
+
+
+class AudioCache:
+    """
+    Synthesized audio keyed by (engine, voice, language, text).
+
+    Recently used clips stay in an in-memory LRU, everything is also persisted to
+    disk so phrases synthesized in a previous run play instantly after a restart.
+    Most agent sentences are said once, so the disk copy is an LRU too: beyond
+    `max_disk_bytes` the clips played longest ago (by file mtime) are deleted.
+    """
+    def __init__(self, directory=TTS_CACHE_DIR, max_items=TTS_CACHE_MEMORY_ITEMS,
+                 max_disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._memory = OrderedDict()
+        self._disk = OrderedDict() # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index_disk()
+
+    def _index_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-len(".npz")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    @staticmethod
+    def key(engine, voice, language, text):
+        raw = "\x1f".join([engine, voice, language or "", text.strip()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _evict_disk(self):
+        """Deletes the least recently used clips until the disk copy fits. Needs the lock."""
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, engine, voice, language, text):
+        """Returns (audio, sample_rate) or None."""
+        key = self.key(engine, voice, language, text)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        try:
+            with np.load(self._path(key)) as data:
+                entry = (data["audio"], int(data["sample_rate"]))
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(self._path(key)) # So the order survives a restart
+        except OSError:
+            pass
+        return entry
+
+    def put(self, engine, voice, language, text, audio, sample_rate):
+        key = self.key(engine, voice, language, text)
+        audio = np.asarray(audio)
+        with self._lock:
+            self._remember(key, (audio, sample_rate))
+        # Write to a temporary file first so a crash never leaves a truncated entry behind
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, audio=audio, sample_rate=sample_rate)
+            os.replace(tmp_path, self._path(key))
+            size = os.path.getsize(self._path(key))
+        except OSError as e:
+            print(f"Could not persist TTS cache entry: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            self._evict_disk()
+
+
+def file_digest(path):
+    """Content hash of a file, used to key derived data such as speaker latents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,247 @@
+# src/tts_worker.py (XTTS and Piper in their own process)
+"""
+LocalTTS(worker=True) hosts its engines here instead of in the assistant's process, so
+a sentence of inference never holds the GIL the capture and VAD threads need. Text goes
+to the worker over a queue; audio comes back in shared-memory buffers owned by this
+process, so only (length, dtype) crosses the pipe. A worker that dies or hangs is killed
+and started again, and the requests it had are sent to the new one.
+"""
+import os
+import time
+import queue
+import atexit
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.config import TTS_WORKER_TIMEOUT, TTS_WORKER_SLOTS, TTS_WORKER_SLOT_SECONDS
+
+# Buffers are sized for XTTS, the larger of the two outputs: float32 at 24kHz
+SLOT_BYTES_PER_SECOND = 24000 * 4
+READY = "ready"
+
+
+def local_engines():
+    """The real engines: an in-process LocalTTS, loaded inside the worker."""
+    from src.local_tts import LocalTTS
+    return LocalTTS(worker=False)
+
+
+def _serve(engines_factory, requests, responses, slot_names):
+    """The worker process: loads the engines once, then answers requests until it gets None."""
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    try:
+        engines = engines_factory()
+    except Exception as e:
+        responses.put((READY, None, f"{type(e).__name__}: {e}"))
+        return
+    responses.put((READY, {
+        "primary": engines.primary_voice is not None,
+        "feedback": engines.feedback_voice is not None,
+        "speaker_id": getattr(engines, "speaker_id", None),
+        "feedback_voice_id": getattr(engines, "feedback_voice_id", None),
+        "feedback_sample_rate": getattr(engines, "feedback_sample_rate", None),
+        "pid": os.getpid(),
+    }, None))
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, kind, text, language, slot = request
+        try:
+            if kind == "primary":
+                audio = engines._infer_primary(text, language)
+            else:
+                audio = engines._infer_feedback(text)
+            audio = np.ascontiguousarray(audio)
+            buffer = slots[slot].buf
+            if audio.nbytes <= len(buffer):
+                np.ndarray(audio.shape, dtype=audio.dtype, buffer=buffer)[:] = audio
+                responses.put((request_id, (len(audio), audio.dtype.str), None))
+            else: # Longer than a slot holds, rare enough to pickle
+                responses.put((request_id, audio, None))
+        except Exception as e:
+            responses.put((request_id, None, f"{type(e).__name__}: {e}"))
+    for shm in slots:
+        shm.close()
+
+
+class TTSWorker:
+    """
+    Runs `engines()` (an object with LocalTTS's _infer_primary and _infer_feedback) in a
+    spawned process. Up to `slots` requests are in flight, each owning a shared-memory
+    buffer of `slot_seconds` of audio until its answer has been copied out.
+
+        worker = TTSWorker()
+        engines = worker.start() # What loaded: {"primary": True, "feedback_sample_rate": 22050, ...}
+        wav = worker.synthesize("primary", "Hello there.", "en")
+
+    If no answer comes for `timeout` seconds while requests wait, the worker is taken for
+    hung. A request in progress when the worker fails twice gets a RuntimeError rather
+    than a third try.
+    """
+    def __init__(self, slots=TTS_WORKER_SLOTS, slot_seconds=TTS_WORKER_SLOT_SECONDS,
+                 timeout=TTS_WORKER_TIMEOUT, engines=local_engines):
+        self.engines = engines
+        self.timeout = timeout
+        self.restarts = 0
+        self.info = None
+        self._context = multiprocessing.get_context("spawn") # Forking a process with torch loaded is unsafe
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_seconds * SLOT_BYTES_PER_SECOND)
+                       for _ in range(slots)]
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._ids = itertools.count()
+        self._pending = {} # request id -> [request, future, failures]
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._started = threading.Event()
+        self._error = None
+        self._last_progress = time.monotonic()
+        self._process = None
+        self._dispatcher = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def _spawn(self):
+        self._requests = self._context.Queue()
+        self._responses = self._context.Queue()
+        self._loaded.clear()
+        self._process = self._context.Process(
+            target=_serve, args=(self.engines, self._requests, self._responses, [s.name for s in self._slots]),
+            name="tts-worker", daemon=True)
+        self._process.start()
+
+    def start(self):
+        """Starts the worker and waits for its engines to load. Returns what loaded."""
+        with self._lock:
+            self._spawn()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="tts-dispatch", daemon=True)
+        self._dispatcher.start()
+        self._started.wait()
+        if self._error:
+            self.close()
+            raise RuntimeError(self._error)
+        print(f"TTS worker ready (pid {self.info['pid']}).")
+        return self.info
+
+    def synthesize(self, kind, text, language=None):
+        """Audio for `text` from the "primary" (XTTS, float32) or "feedback" (Piper, int16) engine."""
+        slot = self._free.get()
+        future = Future()
+        with self._lock:
+            if self._closed or self._error:
+                self._free.put(slot)
+                raise RuntimeError(self._error or "The TTS worker is closed.")
+            if not self._pending:
+                self._last_progress = time.monotonic()
+            request = (next(self._ids), kind, text, language, slot)
+            self._pending[request[0]] = [request, future, 0]
+            self._requests.put(request)
+        return future.result()
+
+    def _finish(self, request_id, audio=None, error=None):
+        with self._lock:
+            request, future, _ = self._pending.pop(request_id)
+        self._free.put(request[4])
+        if error:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(audio)
+
+    def _dispatch(self):
+        """Copies answers out of their buffers, and restarts a worker that died or hung."""
+        while not self._closed:
+            try:
+                request_id, result, error = self._responses.get(timeout=0.2)
+            except queue.Empty:
+                if self._closed:
+                    break
+                if not self._process.is_alive():
+                    self._restart(f"exited with code {self._process.exitcode}")
+                elif self._loaded.is_set() and self._pending and \
+                        time.monotonic() - self._last_progress > self.timeout:
+                    self._restart(f"did not answer for {self.timeout:.0f}s")
+                continue
+            except (EOFError, OSError, ValueError) as e: # The pipe broke with the process
+                self._restart(f"connection lost ({e})")
+                continue
+            self._last_progress = time.monotonic()
+            if request_id == READY:
+                self._ready(result, error)
+            elif request_id in self._pending:
+                if isinstance(result, tuple):
+                    length, dtype = result
+                    result = np.ndarray((length,), dtype=np.dtype(dtype),
+                                        buffer=self._slots[self._pending[request_id][0][4]].buf).copy()
+                self._finish(request_id, result, error)
+
+    def _ready(self, info, error):
+        if error:
+            self._error = f"The TTS worker could not load its engines: {error}"
+            with self._lock:
+                waiting = list(self._pending)
+            for request_id in waiting:
+                self._finish(request_id, error=self._error)
+            self._closed = True
+        else:
+            self.info = self.info or info
+            self._loaded.set()
+        self._started.set()
+
+    def _restart(self, reason):
+        if not self._started.is_set(): # Died while loading, restarting would fail the same way
+            self._ready(None, f"worker {reason}")
+            return
+        print(f"TTS worker {reason}, restarting it...")
+        self.restarts += 1
+        self._process.kill()
+        self._process.join()
+        for old in (self._requests, self._responses): # A killed process can leave them locked or half written
+            old.cancel_join_thread()
+            old.close()
+        failed = []
+        with self._lock:
+            self._spawn()
+            self._last_progress = time.monotonic()
+            if self._pending: # The worker answers in order, so the oldest request was in progress
+                oldest = self._pending[min(self._pending)]
+                oldest[2] += 1
+                if oldest[2] >= 2:
+                    failed.append(oldest[0][0])
+            for request_id, (request, _, _) in sorted(self._pending.items()):
+                if request_id not in failed:
+                    self._requests.put(request)
+        for request_id in failed:
+            self._finish(request_id, error=f"The TTS worker failed twice on this text ({reason}).")
+
+    def close(self):
+        """Stops the worker and frees the shared memory."""
+        if self._slots is None:
+            return
+        self._closed = True
+        if self._dispatcher is not None and self._dispatcher is not threading.current_thread():
+            self._dispatcher.join()
+        if self._process is not None:
+            try:
+                self._requests.put(None)
+                self._process.join(timeout=5)
+            except (OSError, ValueError):
+                pass
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        with self._lock:
+            waiting = list(self._pending)
+        for request_id in waiting:
+            self._finish(request_id, error="The TTS worker is closed.")
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+        self._slots = None
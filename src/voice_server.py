@@ -0,0 +1,327 @@
+# src/voice_server.py (Headless server mode: many clients' audio streams, one set of models)
+import json
+import time
+import asyncio
+import argparse
+import threading
+import numpy as np
+import webrtcvad
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+from src.config import (SERVER_HOST, SERVER_PORT, SERVER_MAX_SESSIONS, SERVER_WAKE_WORD_PATH, SERVER_AUDIO_LEAD_MS,
+                        STT_BACKEND, STT_PREROLL_MS, LOCAL_INTENTS)
+from src.startup import StartupProfiler, LazyComponents
+from src.async_runner import AsyncRunner
+from src.audio_capture import AudioCapture
+from src.speech_to_text import SpeechToText
+from src.state_manager import StateManager
+from src.command_router import FAST_PATH_REPLIES
+from src.voice_turn import VoiceTurn
+from src.local_tts import XTTS_SAMPLE_RATE, WAKE_ACKNOWLEDGEMENT, UNEXPECTED_ERROR_MESSAGE
+from src.tracing import tracer
+
+
+class ClientAudioStream:
+    """
+    The output stream of a session's voice: sends the audio to the client as int16 PCM.
+    Writes are paced to real time, at most `lead_ms` ahead, so speaking takes as long as
+    the client's playback and the session does not listen for the next command (or hear
+    its own answer) before the client has finished playing.
+    """
+    def __init__(self, session, sample_rate, dtype, lead_ms=SERVER_AUDIO_LEAD_MS):
+        self.session = session
+        self.sample_rate = sample_rate
+        self.float_audio = dtype != "int16"
+        self.lead = lead_ms / 1000
+        self._played_at = None # perf_counter() when the client will have played everything sent
+
+    def __enter__(self):
+        self.session.send_event("audio", sample_rate=self.sample_rate)
+        self._played_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.session.send_event("audio_end")
+        time.sleep(max(0.0, self._played_at - time.perf_counter()))
+        return False
+
+    def write(self, block):
+        block = block.reshape(-1)
+        if self.float_audio:
+            block = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        self.session.send(block.tobytes())
+        now = time.perf_counter()
+        self._played_at = max(self._played_at, now) + len(block) / self.sample_rate
+        time.sleep(max(0.0, self._played_at - self.lead - now))
+
+    def abort(self):
+        # The client drops what it has buffered
+        self.session.send_event("audio_stop")
+        self._played_at = time.perf_counter()
+
+
+class SessionComponents:
+    """The server's shared components, with a session's own "stt", "tts" and "state_manager" in front."""
+    def __init__(self, shared, **own):
+        self.shared = shared
+        self.own = own
+
+    def __contains__(self, name):
+        return name in self.own or name in self.shared
+
+    def get(self, name):
+        return self.own[name] if name in self.own else self.shared.get(name)
+
+    def ready(self, name):
+        return name in self.own or self.shared.ready(name)
+
+
+class ClientSession:
+    """
+    One connected client: its own ring buffer, VAD recorder, conversation and voice loop
+    thread, running on the server's shared models. Each command runs the desktop
+    assistant's VoiceTurn, without barge-in or flirt sessions.
+    """
+    FRAME_MS = 30
+    # Speech frames in a row that start a command without a wake word. A new webrtcvad
+    # instance calls its first few frames speech whatever they hold, so this is longer.
+    SPEECH_ONSET_FRAMES = 5
+
+    def __init__(self, server, name, websocket, loop):
+        self.server = server
+        self.name = name
+        self.websocket = websocket
+        self.loop = loop
+        self.capture = AudioCapture() # Fed with the client's audio instead of a microphone
+        self.closed = threading.Event()
+        self._vad = webrtcvad.Vad(3) # Kept for the session, see SPEECH_ONSET_FRAMES
+        self.voice = None
+        self.state_manager = None
+        self._thread = threading.Thread(target=self._run, name=f"session-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def send(self, message):
+        """Sends a text or binary message from the session thread; dropped once the client is gone."""
+        if self.closed.is_set():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.websocket.send(message), self.loop).result()
+        except Exception as e:
+            print(f"[{self.name}] Lost the connection: {e}")
+            self.close()
+
+    def send_event(self, kind, **fields):
+        self.send(json.dumps({"type": kind, **fields}))
+
+    def _on_turn_event(self, kind, **fields):
+        if kind in ("transcript", "response"): # Statuses are for the desktop window
+            self.send_event(kind, **fields)
+
+    def _open_audio_stream(self, sample_rate=XTTS_SAMPLE_RATE, dtype="float32"):
+        return ClientAudioStream(self, sample_rate, dtype)
+
+    def _wait_for_speech(self):
+        """Capture position where the client's next utterance starts, None once it disconnects."""
+        frame = np.empty(self.capture.RATE * self.FRAME_MS // 1000, dtype=np.int16)
+        cursor = self.capture.cursor()
+        speech_frames = 0
+        while cursor.readinto(frame) == len(frame):
+            if self._vad.is_speech(memoryview(frame).cast("B"), self.capture.RATE):
+                speech_frames += 1
+                if speech_frames == self.SPEECH_ONSET_FRAMES:
+                    return cursor.position - speech_frames * len(frame)
+            else:
+                speech_frames = 0
+        return None
+
+    def _run(self):
+        components = self.server.components
+        try:
+            stt = SpeechToText(capture=self.capture, backend=components.get("stt"))
+            self.voice = components.get("tts").with_output(self._open_audio_stream)
+            self.state_manager = StateManager(session=self.name)
+            voice_turn = VoiceTurn(
+                SessionComponents(components, stt=stt, tts=self.voice, state_manager=self.state_manager),
+                self.server.agent_runner, self.closed, on_event=self._on_turn_event)
+            wake_word_detector = None
+            if self.server.wake_word_path:
+                from src.wake_word import WakeWordDetector # pvporcupine is only needed with a server-side wake word
+                wake_word_detector = WakeWordDetector(keyword_path=self.server.wake_word_path, capture=self.capture)
+        except Exception as e:
+            print(f"[{self.name}] Could not start the session. Error: {e}")
+            self.send_event("error", message=str(e))
+            self.close()
+            return
+
+        while not self.closed.is_set():
+            if wake_word_detector:
+                if not wake_word_detector.wait_for_wake_word(stop_event=self.closed):
+                    break
+                listen_from = wake_word_detector.detected_at
+            else:
+                listen_from = self._wait_for_speech()
+                if listen_from is None:
+                    break
+            tracer.start_turn(session=self.name)
+            try:
+                preroll_ms = STT_PREROLL_MS
+                if wake_word_detector:
+                    tracer.record("wake word", (self.capture.position - listen_from) / self.capture.RATE)
+                    with tracer.span("acknowledgement"):
+                        self.voice.speak_feedback(WAKE_ACKNOWLEDGEMENT)
+                    # As in main.py: the command starts after "Yes?", which the client's mic may pick up
+                    listen_from, preroll_ms = self.capture.position, 0
+                voice_turn.run(listen_from, preroll_ms)
+            except Exception as e:
+                print(f"[{self.name}] An error occurred in the session loop: {e}")
+                self.voice.speak_feedback(UNEXPECTED_ERROR_MESSAGE)
+            finally:
+                turn = tracer.end_turn()
+                if turn is not None:
+                    print(f"[{self.name}] {turn.summary()}")
+                    self.send_event("turn", seconds=turn.seconds, summary=turn.summary())
+        self.state_manager.close()
+
+    def close(self):
+        """Ends the session: its loop stops listening and speaking, called on disconnect."""
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.capture.close()
+        if self.voice is not None:
+            self.voice.interrupt()
+
+
+class VoiceServer:
+    """
+    Serves thin clients (room microphones, other desktops) over a websocket, one
+    ClientSession each. `components` is a LazyComponents with the "stt" backend, "tts",
+    "agent_planner" and, with LOCAL_INTENTS, "intent_classifier"; they are loaded once and
+    shared by every session, as are the agent's event loop and the LLM connection pools.
+    Commands act on the machine the server runs on.
+
+    Protocol, JSON text messages unless noted:
+      client -> server  {"type": "hello", "session": "kitchen"}   first message, names the conversation
+                        binary                                    16kHz mono int16 microphone audio
+      monitor -> server {"type": "stats"}                         instead of the hello: one stats() reply
+      server -> client  {"type": "ready", "session": ..., "sample_rate": 16000}
+                        {"type": "transcript", "text": ...}       what was heard
+                        {"type": "response", "text": ...}         the answer
+                        {"type": "audio", "sample_rate": ...}     binary int16 speech follows...
+                        {"type": "audio_end"}                     ...until this, or "audio_stop" if cut short
+                        {"type": "turn", "seconds": ..., "summary": ...}
+    """
+    def __init__(self, components, host=SERVER_HOST, port=SERVER_PORT, max_sessions=SERVER_MAX_SESSIONS,
+                 wake_word_path=SERVER_WAKE_WORD_PATH):
+        self.components = components
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.wake_word_path = wake_word_path
+        self.sessions = {}
+        self.agent_runner = AsyncRunner("agent")
+        self._connections = 0
+
+    def stats(self):
+        """Active sessions, CPU time used so far and the per-stage latency of recent turns."""
+        return {"type": "stats", "sessions": len(self.sessions), "cpu_seconds": time.process_time(),
+                "stages": tracer.stats()}
+
+    async def _handle(self, websocket):
+        self._connections += 1
+        try:
+            hello = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10))
+        except (asyncio.TimeoutError, ValueError, ConnectionClosed):
+            await websocket.close(1002, "Expected a hello message")
+            return
+        if hello.get("type") == "stats":
+            await websocket.send(json.dumps(self.stats()))
+            return
+        name = str(hello.get("session") or f"client-{self._connections}")
+        if len(self.sessions) >= self.max_sessions:
+            await websocket.close(1013, "Server is full, try again later")
+            return
+        if name in self.sessions:
+            await websocket.close(1008, f"Session '{name}' is already connected")
+            return
+
+        session = ClientSession(self, name, websocket, asyncio.get_running_loop())
+        self.sessions[name] = session
+        print(f"Session '{name}' connected from {websocket.remote_address} ({len(self.sessions)} active).")
+        await websocket.send(json.dumps({"type": "ready", "session": name, "sample_rate": AudioCapture.RATE}))
+        session.start()
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    session.capture.write(np.frombuffer(message, dtype=np.int16))
+        except ConnectionClosed:
+            pass
+        finally:
+            session.close()
+            del self.sessions[name]
+            print(f"Session '{name}' disconnected ({len(self.sessions)} active).")
+
+    async def serve(self, stop=None):
+        """Accepts clients until `stop` (an asyncio.Future) is done, forever by default."""
+        async with serve(self._handle, self.host, self.port):
+            print(f"Voice server listening on ws://{self.host}:{self.port} (up to {self.max_sessions} sessions).")
+            await (stop if stop is not None else asyncio.get_running_loop().create_future())
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("Stopping the voice server...")
+        finally:
+            for session in list(self.sessions.values()):
+                session.close()
+            self.agent_runner.stop()
+            tracer.flush()
+
+
+def start_components(profiler):
+    """The models every session shares, built concurrently as in main.py."""
+    components = LazyComponents(profiler)
+
+    def build_stt():
+        from src.stt_backends import create_stt_backend
+        return create_stt_backend(STT_BACKEND, "small")
+
+    def build_tts():
+        from src.local_tts import LocalTTS
+        tts = LocalTTS()
+        threading.Thread(target=tts.prewarm, args=(FAST_PATH_REPLIES.values(),), daemon=True).start()
+        return tts
+
+    def build_agent():
+        from src.agent.agent_planner import AgentPlanner
+        return AgentPlanner()
+
+    def build_intent_classifier():
+        from src.agent.intent_classifier import IntentClassifier
+        return IntentClassifier()
+
+    components.add("stt", build_stt)
+    components.add("tts", build_tts)
+    if LOCAL_INTENTS:
+        components.add("intent_classifier", build_intent_classifier)
+    components.add("agent_planner", build_agent)
+    components.report_when_ready()
+    return components
+
+
+def main():
+    """Runs the assistant headless for network clients: python -m src.voice_server"""
+    parser = argparse.ArgumentParser(description="Headless voice assistant serving many clients over a websocket.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    args = parser.parse_args()
+    profiler = StartupProfiler()
+    VoiceServer(start_components(profiler), args.host, args.port, args.max_sessions).run()
+
+
+if __name__ == "__main__":
+    main()
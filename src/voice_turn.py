@@ -0,0 +1,174 @@
+# src/voice_turn.py (One voice turn: transcript -> route -> flirt, local tool or agent -> speech)
+import time
+import contextlib
+from src.config import LOCAL_INTENTS, AGENT_ASYNC, AGENT_STREAMING, STT_PREROLL_MS
+from src.command_router import route_command, match_command, execute_match
+from src.agent.agent_planner import correct_transcription_with_llm
+from src.agent.intent_classifier import run_tool
+from src.sentence_stream import iter_sentences
+from src.tracing import tracer
+
+FLIRT_UNAVAILABLE_MESSAGE = "Flirt mode is only available in the desktop app."
+
+
+class VoiceTurn:
+    """
+    What the assistant does from the start of a command to the end of its answer:
+    transcription, routing (only a transcript without a confident match pays for the LLM
+    correction), flirt sessions, the on-device intent classifier or the agent, and speech.
+    The desktop assistant (main.py), every voice server session and the replay benchmark
+    run this same turn, each with its own I/O:
+
+    - `components` is a LazyComponents (get, ready, `in`) with "stt" (a SpeechToText on
+      the capture to listen to), "tts" (the voice to answer with), "state_manager",
+      "agent_planner", "intent_classifier" with LOCAL_INTENTS and, where the WhatsApp
+      desktop app is available, "flirt_sessions". Each is fetched only when the turn
+      needs it, so a command can be heard while the voices are still loading.
+    - `barge_in` is a BargeInMonitor that interrupts the answer when the user talks, or None.
+    - `on_event(kind, **fields)` gets "status" (message, color), "transcript" (text, as
+      heard) and "response" (text, as spoken).
+
+        barge_position = turn.run(listen_from, preroll_ms) # Where the user cut the answer short, or None
+    """
+    def __init__(self, components, agent_runner, stop_event, barge_in=None, on_event=None):
+        self.components = components
+        self.agent_runner = agent_runner
+        self.stop_event = stop_event
+        self.barge_in = barge_in
+        self.on_event = on_event
+
+    def _event(self, kind, **fields):
+        if self.on_event:
+            self.on_event(kind, **fields)
+
+    def _status(self, message, color):
+        self._event("status", message=message, color=color)
+
+    def run(self, listen_from, preroll_ms=STT_PREROLL_MS):
+        """
+        Listens from `preroll_ms` before capture position `listen_from` and answers.
+        Returns the barge-in position or None.
+        """
+        stt = self.components.get("stt")
+        raw_user_text = stt.listen_and_transcribe(start_position=listen_from, preroll_ms=preroll_ms)
+        if not raw_user_text:
+            return None
+        self._event("transcript", text=raw_user_text)
+
+        # Route the raw transcript first: a confident fast-path or flirt match commits right
+        # away, and only the rest pays for an LLM correction.
+        # Sessions that "stop chatting with ..." can end; the router leaves other "stop" sentences alone
+        flirt_contacts = ()
+        if "flirt_sessions" in self.components and self.components.ready("flirt_sessions"):
+            flirt_contacts = self.components.get("flirt_sessions").active()
+        with tracer.span("route"):
+            speculative_match = match_command(raw_user_text, flirt_contacts)
+        if speculative_match.confident:
+            user_text = raw_user_text
+            with tracer.span("command"):
+                action_result = execute_match(speculative_match)
+        else:
+            with tracer.span("llm correction"):
+                user_text = correct_transcription_with_llm(raw_user_text, stt.last_avg_logprob)
+            if not user_text:
+                return None
+            # Route the command to the appropriate handler
+            with tracer.span("command"):
+                action_result = route_command(user_text, flirt_contacts)
+
+        # --- DECISION LOGIC ---
+        # 1. Start or stop a background "Flirt Mode" session, then keep listening
+        if isinstance(action_result, tuple) and action_result[0] in ("FLIRT_MODE", "STOP_FLIRT"):
+            return self._speak(self._flirt(*action_result))
+        # 2. Check if we need to call the general-purpose AI agent
+        if action_result == "AGENT":
+            return self._answer(user_text)
+        # 3. Handle simple, fast-path commands
+        self._status(f"Executing: '{user_text}'", "green")
+        return self._speak(action_result)
+
+    def _flirt(self, mode, contact_name):
+        """Starts or stops the session with `contact_name`, returns what to say about it."""
+        if "flirt_sessions" not in self.components:
+            # Flirt sessions drive the WhatsApp desktop app, which only the desktop assistant has
+            return FLIRT_UNAVAILABLE_MESSAGE
+        flirt_sessions = self.components.get("flirt_sessions")
+        if mode == "STOP_FLIRT":
+            stopped = flirt_sessions.stop(contact_name)
+            return f"Stopped chatting with {contact_name}." if stopped else f"I wasn't chatting with {contact_name}."
+        if flirt_sessions.start(contact_name):
+            self._status(f"Entering Flirt Mode with {contact_name} via Desktop App...", "purple")
+            return f"Chatting with {contact_name} in the background."
+        if contact_name in flirt_sessions.active():
+            return f"I'm already chatting with {contact_name}."
+        # The backend follows a limited number of chats at once, the desktop app only one
+        active = flirt_sessions.active()
+        if len(active) == 1:
+            return f"I can only chat with one contact at a time. Stop chatting with {active[0]} first."
+        return f"I can only chat with {len(active)} contacts at a time. Stop chatting with one of them first."
+
+    def _answer(self, user_text):
+        state_manager = self.components.get("state_manager")
+        state_manager.add_message("user", user_text)
+        # Clear tool requests are picked on-device, only the rest pays for an agent round-trip
+        with tracer.span("intent classifier"):
+            prediction = self.components.get("intent_classifier").predict(user_text) if LOCAL_INTENTS else None
+        if prediction:
+            self._status(f"Running {prediction.tool} locally...", "green")
+            with tracer.span(f"tool {prediction.tool}"):
+                final_response = run_tool(prediction)
+            return self._reply(state_manager, final_response)
+
+        self._status(f"Thinking about: '{user_text}'", "purple")
+        agent_planner = self.components.get("agent_planner")
+        history = state_manager.get_history()
+        if AGENT_ASYNC and AGENT_STREAMING:
+            # Each sentence of the answer is spoken while the model writes the next
+            started_at = time.perf_counter()
+            tokens = self.agent_runner.iterate(agent_planner.astream_agent(user_text, history),
+                                               stop_event=self.stop_event)
+            self._status("Responding...", "green")
+            voice = self.components.get("tts")
+            # A barge-in stops the answer; only what was heard goes into the history
+            # The model's and tools' spans nest under "speak", they overlap with speech
+            with self._listening(voice), tracer.span("speak"):
+                final_response = voice.speak_stream(iter_sentences(tokens), started_at=started_at)
+            if self.stop_event.is_set():
+                return None
+            self._event("response", text=final_response)
+            self._remember(state_manager, final_response)
+            return self._interrupted_at()
+        if AGENT_ASYNC:
+            # Tools run in parallel on the agent loop; stopping cancels the turn
+            with tracer.span("agent"):
+                final_response = self.agent_runner.run(
+                    agent_planner.arun_agent(user_text, history), stop_event=self.stop_event)
+            if final_response is None:
+                return None
+        else:
+            with tracer.span("agent"):
+                final_response = agent_planner.run_agent(user_text, history)
+        return self._reply(state_manager, final_response)
+
+    def _reply(self, state_manager, final_response):
+        self._remember(state_manager, final_response)
+        self._status("Responding...", "green")
+        return self._speak(final_response)
+
+    def _remember(self, state_manager, final_response):
+        if LOCAL_INTENTS:
+            print(self.components.get("intent_classifier").report())
+        state_manager.add_message("assistant", final_response)
+
+    def _speak(self, text):
+        self._event("response", text=text)
+        voice = self.components.get("tts")
+        with self._listening(voice), tracer.span("speak"):
+            voice.speak_primary(text)
+        return self._interrupted_at()
+
+    def _listening(self, voice):
+        return self.barge_in.listening(voice) if self.barge_in else contextlib.nullcontext()
+
+    def _interrupted_at(self):
+        return self.barge_in.detected_at if self.barge_in else None
@@ -1,41 +1,47 @@
-import pvporcupine
-import pyaudio
-import struct
-from src.config import PICOVOICE_ACCESS_KEY
-
-class WakeWordDetector:
-    def __init__(self, keyword_path):
-        self.access_key = PICOVOICE_ACCESS_KEY
-        if not self.access_key:
-            raise ValueError("PICOVOICE_ACCESS_KEY is not set in the .env file.")
-        
-        self.porcupine = pvporcupine.create(
-            access_key=self.access_key,
-            keyword_paths=[keyword_path]
-        )
-        self.pa = pyaudio.PyAudio()
-        self.audio_stream = self.pa.open(
-            rate=self.porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=self.porcupine.frame_length
-        )
-
-    def wait_for_wake_word(self):
-        print(f"Listening for wake word...")
-        while True:
-            pcm = self.audio_stream.read(self.porcupine.frame_length)
-            pcm = struct.unpack_from("h" * self.porcupine.frame_length, pcm)
-            result = self.porcupine.process(pcm)
-            if result >= 0:
-                print("Wake word detected!")
-                return True
-
-    def __del__(self):
-        if hasattr(self, 'porcupine') and self.porcupine is not None:
-            self.porcupine.delete()
-        if hasattr(self, 'audio_stream') and self.audio_stream is not None:
-            self.audio_stream.close()
-        if hasattr(self, 'pa') and self.pa is not None:
-            self.pa.terminate()
\ No newline at end of file
+import pvporcupine
+import numpy as np
+from src.config import PICOVOICE_ACCESS_KEY
+
+class WakeWordDetector:
+    def __init__(self, keyword_path, capture, porcupine=None):
+        """`porcupine` replaces the Picovoice engine, e.g. with a stand-in for offline runs."""
+        self.access_key = PICOVOICE_ACCESS_KEY
+        if porcupine is None:
+            if not self.access_key:
+                raise ValueError("PICOVOICE_ACCESS_KEY is not set in the .env file.")
+            porcupine = pvporcupine.create(
+                access_key=self.access_key,
+                keyword_paths=[keyword_path]
+            )
+        self.porcupine = porcupine
+        if self.porcupine.sample_rate != capture.RATE:
+            raise ValueError(f"Porcupine expects {self.porcupine.sample_rate}Hz audio, capture runs at {capture.RATE}Hz.")
+        # The microphone is owned by the shared AudioCapture, we only read from it.
+        self.capture = capture
+        self.detected_at = None # Absolute capture position of the last detection
+
+    def process(self, frame):
+        """True if the wake word ends in this frame of `porcupine.frame_length` samples."""
+        return self.porcupine.process(frame.tolist()) >= 0
+
+    def wait_for_wake_word(self, stop_event=None):
+        """
+        Blocks until the wake word is heard. Returns False if `stop_event` is set
+        or the capture is closed before that happens.
+        """
+        print(f"Listening for wake word...")
+        # Start from live audio so we never react to speech captured while we were busy.
+        cursor = self.capture.cursor()
+        frame = np.empty(self.porcupine.frame_length, dtype=np.int16)
+        while stop_event is None or not stop_event.is_set():
+            if cursor.readinto(frame) < len(frame):
+                return False
+            if self.process(frame):
+                self.detected_at = cursor.position
+                print("Wake word detected!")
+                return True
+        return False
+
+    def __del__(self):
+        if hasattr(self, 'porcupine') and self.porcupine is not None:
+            self.porcupine.delete()
@@ -0,0 +1,82 @@
+# tests/test_barge_in.py
+"""
+BargeInMonitor (src/barge_in.py) and LocalTTS interruption on the file-driven room from
+benchmarks/bench_barge_in.py: the assistant's voice is my_voice.wav, coming back at the
+microphone as echo, and the user is temp_recording.wav. Runs in real time, a few seconds.
+"""
+import os
+import argparse
+
+import pytest
+
+pytest.importorskip("webrtcvad")
+
+from benchmarks.bench_barge_in import Room, fake_voice, first_speech
+from benchmarks.common import REPO_ROOT, SAMPLE_RATE, load_wav_16k
+from src.audio_capture import AudioCapture
+from src.barge_in import BargeInMonitor
+from src.config import TTS_PLAYBACK_BLOCK_MS
+
+ECHO = 0.3
+
+
+@pytest.fixture(scope="module")
+def recordings():
+    voice_audio = load_wav_16k(os.path.join(REPO_ROOT, "my_voice.wav"))
+    user_audio = load_wav_16k(os.path.join(REPO_ROOT, "temp_recording.wav"))
+    # Starting at the first word, so "user_at" is when the user is heard
+    onset = int(first_speech(user_audio) * SAMPLE_RATE)
+    return fake_voice(voice_audio, real_time_factor=0.1), user_audio[onset:].astype("float32") * 1.5
+
+
+def speak(capture, monitor, voice_class, sentences, user_audio=None, user_at=None):
+    room = Room(capture, ECHO, 0.05, user_audio, user_at).start()
+    tts = voice_class(room)
+    try:
+        with monitor.listening(tts):
+            tts.speak_primary(" ".join(f"Sentence {i} of a long answer." for i in range(sentences)))
+    finally:
+        room.stop()
+    return tts
+
+
+def test_interrupt_to_silence_is_measured(recordings):
+    voice_class, user_audio = recordings
+    capture = AudioCapture()
+    monitor = BargeInMonitor(capture, mode="vad")
+    try:
+        tts = speak(capture, monitor, voice_class, sentences=4, user_audio=user_audio, user_at=1.0)
+    finally:
+        capture.close()
+    assert monitor.detected_at is not None
+    # Playback stops at the next block boundary
+    assert tts.last_interrupt_to_silence is not None
+    assert tts.last_interrupt_to_silence < 2 * TTS_PLAYBACK_BLOCK_MS / 1000
+
+
+def test_echo_alone_does_not_interrupt(recordings):
+    voice_class, _ = recordings
+    capture = AudioCapture()
+    monitor = BargeInMonitor(capture, mode="vad")
+    try:
+        tts = speak(capture, monitor, voice_class, sentences=2)
+    finally:
+        capture.close()
+    assert monitor.detected_at is None
+    assert tts.last_interrupt_to_silence is None
+
+
+def test_echo_gain_is_kept_when_the_user_talks_during_calibration(recordings):
+    voice_class, user_audio = recordings
+    capture = AudioCapture()
+    monitor = BargeInMonitor(capture, mode="vad")
+    try:
+        speak(capture, monitor, voice_class, sentences=1)
+        calibrated = monitor.echo_gain
+        assert calibrated is not None and monitor.detected_at is None
+        # The user talks over the start of the next answer, while it calibrates
+        speak(capture, monitor, voice_class, sentences=2, user_audio=user_audio, user_at=0.0)
+    finally:
+        capture.close()
+    assert monitor.detected_at is not None
+    assert monitor.echo_gain < 1.5 * calibrated
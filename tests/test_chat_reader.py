@@ -0,0 +1,99 @@
+# tests/test_chat_reader.py
+"""IncrementalReader (src/agent/chat_reader.py) against an in-memory chat page."""
+from src.agent.chat_reader import IncrementalReader, NEW_MESSAGES_SCRIPT
+
+
+class FakeChatDriver:
+    """A chat page with `rows` of [data-id, incoming, text], as NEW_MESSAGES_SCRIPT sees it."""
+    def __init__(self):
+        self.rows = []
+        self._next_id = 0
+
+    def add(self, incoming, text):
+        sender = "false" if incoming else "true"
+        self._next_id += 1
+        self.rows.append([f"{sender}_chat@c.us_{self._next_id:08X}", incoming, text])
+
+    def scroll_out(self, keep):
+        """Drops all but the newest `keep` rows, like WhatsApp unrendering a long chat."""
+        self.rows = self.rows[-keep:]
+
+    def execute_script(self, script, cursor):
+        assert script == NEW_MESSAGES_SCRIPT
+        start, found = 0, cursor is None
+        for i in range(len(self.rows) - 1, -1, -1):
+            if cursor is not None and self.rows[i][0] == cursor:
+                start, found = i + 1, True
+                break
+        return {"found": found, "messages": [list(row) for row in self.rows[start:]]}
+
+
+def texts(messages):
+    return [m.text for m in messages]
+
+
+def primed_reader(history=5):
+    driver = FakeChatDriver()
+    for i in range(history):
+        driver.add(i % 2 == 0, f"history {i}")
+    reader = IncrementalReader(driver)
+    reader.prime()
+    return driver, reader
+
+
+def test_prime_skips_the_existing_history():
+    driver, reader = primed_reader()
+    assert reader.cursor == driver.rows[-1][0]
+    assert reader.read_new() == []
+
+
+def test_burst_is_returned_once_in_order():
+    driver, reader = primed_reader()
+    for text in ("are you there?", "hello", "call me"):
+        driver.add(True, text)
+    assert texts(reader.read_new()) == ["are you there?", "hello", "call me"]
+    assert reader.read_new() == []
+
+
+def test_repeated_identical_texts_are_all_returned():
+    driver, reader = primed_reader()
+    driver.add(True, "haha")
+    assert texts(reader.read_new()) == ["haha"]
+    driver.add(True, "haha")
+    driver.add(True, "haha")
+    assert texts(reader.read_new()) == ["haha", "haha"]
+
+
+def test_outgoing_and_empty_messages_are_skipped_but_move_the_cursor():
+    driver, reader = primed_reader()
+    driver.add(False, "my reply")
+    driver.add(True, "") # A sticker or photo without a caption
+    driver.add(True, "nice")
+    assert texts(reader.read_new()) == ["nice"]
+    assert reader.cursor == driver.rows[-1][0]
+    driver.add(False, "thanks")
+    assert reader.read_new() == []
+    assert reader.cursor == driver.rows[-1][0]
+
+
+def test_cursor_row_scrolled_out_returns_only_unseen_messages():
+    driver, reader = primed_reader(history=20)
+    driver.add(True, "first")
+    assert texts(reader.read_new()) == ["first"]
+    for i in range(3):
+        driver.add(True, f"new {i}")
+    # The cursor row ("first") is gone, already seen rows before it are still there
+    driver.rows = [row for row in driver.rows if row[2] != "first"]
+    assert texts(reader.read_new()) == ["new 0", "new 1", "new 2"]
+    assert reader.read_new() == []
+
+
+def test_more_new_messages_than_the_dom_keeps():
+    driver, reader = primed_reader()
+    for i in range(10):
+        driver.add(True, f"new {i}")
+    driver.scroll_out(keep=4)
+    # Only what is still rendered can be read, each once
+    assert texts(reader.read_new()) == ["new 6", "new 7", "new 8", "new 9"]
+    driver.add(True, "new 10")
+    assert texts(reader.read_new()) == ["new 10"]